@@ -1,99 +1,169 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Dict, Any
+import json
 import uuid
 from datetime import datetime
 
 from app.models.chat import ChatRequest, ChatResponse, Message, MessageRole, Conversation
 from app.services.ai_agent import ai_agent
 from app.services.guardrails import guardrails
+from app.services.quota_scheduler import quota_scheduler
 
 router = APIRouter()
 
 # In-memory storage for conversations (use database in production)
 conversations = {}
 
+def _start_turn(request: ChatRequest):
+    """Get or create the conversation, record the user message and build the history for the AI"""
+    # Generate conversation ID if not provided
+    conversation_id = request.conversation_id or str(uuid.uuid4())
+    
+    # Get or create conversation
+    if conversation_id not in conversations:
+        conversations[conversation_id] = Conversation(
+            id=conversation_id,
+            user_id=request.user_id,
+            messages=[],
+            created_at=datetime.now(),
+            updated_at=datetime.now()
+        )
+    
+    conversation = conversations[conversation_id]
+    
+    # Add user message to conversation
+    user_message = Message(
+        role=MessageRole.USER,
+        content=request.message,
+        timestamp=datetime.now()
+    )
+    conversation.messages.append(user_message)
+    
+    # Prepare conversation history for AI
+    conversation_history = []
+    for msg in conversation.messages[-10:]:  # Last 10 messages
+        conversation_history.append({
+            'role': msg.role.value,
+            'content': msg.content
+        })
+    
+    return conversation, conversation_history
+
+def _finish_turn(conversation: Conversation, request: ChatRequest, ai_response: Dict[str, Any]):
+    """Record the assistant reply on the conversation and log guardrail violations"""
+    # Add AI response to conversation
+    assistant_message = Message(
+        role=MessageRole.ASSISTANT,
+        content=ai_response['message'],
+        timestamp=datetime.now(),
+        metadata={
+            'confidence': ai_response.get('confidence', 0.0),
+            'sources': ai_response.get('sources', []),
+            'guardrail_triggered': ai_response.get('guardrail_triggered', False)
+        }
+    )
+    conversation.messages.append(assistant_message)
+    
+    # Update conversation timestamp
+    conversation.updated_at = datetime.now()
+    
+    # Log guardrail violations if any
+    if ai_response.get('guardrail_triggered'):
+        guardrails.log_violation(
+            user_id=request.user_id or 'anonymous',
+            violation_type=ai_response.get('guardrail_type', 'unknown'),
+            details={'message': request.message}
+        )
+
+def _response_metadata(ai_response: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the response metadata returned to the client"""
+    return {
+        'guardrail_triggered': ai_response.get('guardrail_triggered', False),
+        'guardrail_type': ai_response.get('guardrail_type'),
+        'tool_used': ai_response.get('tool_used'),
+        'meeting_id': ai_response.get('meeting_id'),
+        'cached': ai_response.get('cached', False)
+    }
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_agent(request: ChatRequest):
     """Chat with the AI agent"""
     try:
-        # Generate conversation ID if not provided
-        conversation_id = request.conversation_id or str(uuid.uuid4())
-        
-        # Get or create conversation
-        if conversation_id not in conversations:
-            conversations[conversation_id] = Conversation(
-                id=conversation_id,
-                user_id=request.user_id,
-                messages=[],
-                created_at=datetime.now(),
-                updated_at=datetime.now()
-            )
-        
-        conversation = conversations[conversation_id]
-        
-        # Add user message to conversation
-        user_message = Message(
-            role=MessageRole.USER,
-            content=request.message,
-            timestamp=datetime.now()
-        )
-        conversation.messages.append(user_message)
-        
-        # Prepare conversation history for AI
-        conversation_history = []
-        for msg in conversation.messages[-10:]:  # Last 10 messages
-            conversation_history.append({
-                'role': msg.role.value,
-                'content': msg.content
-            })
+        conversation, conversation_history = _start_turn(request)
         
         # Generate AI response
-        ai_response = ai_agent.generate_response(
+        ai_response = await ai_agent.agenerate_response(
             user_message=request.message,
             conversation_history=conversation_history,
             context=request.context
         )
         
-        # Add AI response to conversation
-        assistant_message = Message(
-            role=MessageRole.ASSISTANT,
-            content=ai_response['message'],
-            timestamp=datetime.now(),
-            metadata={
-                'confidence': ai_response.get('confidence', 0.0),
-                'sources': ai_response.get('sources', []),
-                'guardrail_triggered': ai_response.get('guardrail_triggered', False)
-            }
-        )
-        conversation.messages.append(assistant_message)
-        
-        # Update conversation timestamp
-        conversation.updated_at = datetime.now()
-        
-        # Log guardrail violations if any
-        if ai_response.get('guardrail_triggered'):
-            guardrails.log_violation(
-                user_id=request.user_id or 'anonymous',
-                violation_type=ai_response.get('guardrail_type', 'unknown'),
-                details={'message': request.message}
-            )
+        _finish_turn(conversation, request, ai_response)
         
         return ChatResponse(
             message=ai_response['message'],
-            conversation_id=conversation_id,
+            conversation_id=conversation.id,
             sources=ai_response.get('sources', []),
             confidence=ai_response.get('confidence', 0.0),
-            metadata={
-                'guardrail_triggered': ai_response.get('guardrail_triggered', False),
-                'guardrail_type': ai_response.get('guardrail_type'),
-                'tool_used': ai_response.get('tool_used'),
-                'meeting_id': ai_response.get('meeting_id')
-            }
+            metadata=_response_metadata(ai_response)
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing chat request: {str(e)}")
 
+@router.post("/chat/stream")
+async def stream_chat_with_agent(request: ChatRequest):
+    """Chat with the AI agent over Server-Sent Events
+    
+    Events: `sources` (sources + confidence, sent right after retrieval),
+    `token` (incremental answer text) and `done` (final message and metadata).
+    The conversation is updated once the stream completes.
+    """
+    try:
+        conversation, conversation_history = _start_turn(request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing chat request: {str(e)}")
+    
+    async def event_stream():
+        try:
+            async for event in ai_agent.astream_response(
+                user_message=request.message,
+                conversation_history=conversation_history,
+                context=request.context
+            ):
+                if event['event'] == 'sources':
+                    payload = {
+                        'conversation_id': conversation.id,
+                        'sources': event['sources'],
+                        'confidence': event['confidence']
+                    }
+                elif event['event'] == 'token':
+                    payload = {'text': event['text']}
+                else:
+                    ai_response = event['response']
+                    _finish_turn(conversation, request, ai_response)
+                    payload = {
+                        'message': ai_response['message'],
+                        'conversation_id': conversation.id,
+                        'sources': ai_response.get('sources', []),
+                        'confidence': ai_response.get('confidence', 0.0),
+                        'metadata': _response_metadata(ai_response)
+                    }
+                yield _sse(event['event'], payload)
+        except Exception as e:
+            yield _sse('error', {'detail': f"Error processing chat request: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 @router.get("/conversations/{conversation_id}", response_model=Conversation)
 async def get_conversation(conversation_id: str):
     """Get a specific conversation"""
@@ -137,4 +207,11 @@ async def clear_conversation(conversation_id: str):
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "conversations_count": len(conversations)} 
\ No newline at end of file
+    return {
+        "status": "healthy",
+        "conversations_count": len(conversations),
+        "response_cache": ai_agent.response_cache.stats() if ai_agent.response_cache else None,
+        "request_coalescing": ai_agent.single_flight.stats() if ai_agent.single_flight else None,
+        "llm": ai_agent.llm.stats(),
+        "quota": quota_scheduler.stats()
+    } 
\ No newline at end of file
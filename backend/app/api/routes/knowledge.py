@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Dict, Any, Optional
+import asyncio
 from app.services.vector_store import vector_store
 
 router = APIRouter()
@@ -13,9 +14,9 @@ async def search_knowledge(
     """Search the knowledge base"""
     try:
         if product:
-            results = vector_store.search_by_product(query, product, k)
+            results = await vector_store.asearch_by_product(query, product, k)
         else:
-            results = vector_store.search(query, k)
+            results = await vector_store.asearch(query, k)
         
         return {
             "query": query,
@@ -31,7 +32,7 @@ async def search_knowledge(
 async def get_products():
     """Get all available products in the knowledge base"""
     try:
-        products = vector_store.get_all_products()
+        products = await asyncio.to_thread(vector_store.get_all_products)
         return {
             "products": products,
             "total_products": len(products)
@@ -44,7 +45,7 @@ async def get_products():
 async def get_product_summary(product: str):
     """Get summary information for a specific product"""
     try:
-        summary = vector_store.get_product_summary(product)
+        summary = await vector_store.aget_product_summary(product)
         return summary
         
     except Exception as e:
@@ -54,7 +55,7 @@ async def get_product_summary(product: str):
 async def get_knowledge_stats():
     """Get statistics about the knowledge base"""
     try:
-        stats = vector_store.get_index_stats()
+        stats = await asyncio.to_thread(vector_store.get_index_stats)
         return stats
         
     except Exception as e:
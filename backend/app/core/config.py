@@ -1,11 +1,15 @@
 from pydantic_settings import BaseSettings
 from typing import Optional
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Repository-level data directory (scraped corpus, local indexes, caches)
+DATA_DIR = Path(__file__).resolve().parents[3] / "data"
+
 class Settings(BaseSettings):
     # Google Gemini Configuration
     google_api_key: str = os.getenv("GOOGLE_API_KEY", "")
@@ -34,6 +38,75 @@ class Settings(BaseSettings):
     vector_dimension: int = int(os.getenv("VECTOR_DIMENSION", "768"))
     vector_metric: str = os.getenv("VECTOR_METRIC", "cosine")
     
+    # Vector Backend Configuration ("pinecone", "local" or "hnsw")
+    vector_backend: str = os.getenv("VECTOR_BACKEND", "pinecone")
+    local_index_path: str = os.getenv("LOCAL_INDEX_PATH", str(DATA_DIR / "local_index"))
+    
+    # HNSW Index Configuration (used when VECTOR_BACKEND=hnsw)
+    hnsw_m: int = int(os.getenv("HNSW_M", "16"))
+    hnsw_ef_construction: int = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+    hnsw_ef_search: int = int(os.getenv("HNSW_EF_SEARCH", "64"))
+    
+    # Query Embedding Cache
+    embedding_cache_size: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+    embedding_cache_ttl_seconds: int = int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "3600"))
+    
+    # Persistent Document Embedding Cache (keyed by model + chunk text hash)
+    document_embedding_cache_enabled: bool = os.getenv("DOCUMENT_EMBEDDING_CACHE_ENABLED", "True").lower() == "true"
+    document_embedding_cache_path: str = os.getenv("DOCUMENT_EMBEDDING_CACHE_PATH", str(DATA_DIR / "embedding_cache.sqlite3"))
+    
+    # Semantic Response Cache
+    response_cache_enabled: bool = os.getenv("RESPONSE_CACHE_ENABLED", "True").lower() == "true"
+    response_cache_threshold: float = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95"))
+    response_cache_max_entries: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+    response_cache_max_bytes: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+    response_cache_ttl_seconds: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+    index_generation_path: str = os.getenv("INDEX_GENERATION_PATH", str(DATA_DIR / "index_generation.json"))
+    
+    # Coalesce concurrent identical chat requests into one computation
+    request_coalescing_enabled: bool = os.getenv("REQUEST_COALESCING_ENABLED", "True").lower() == "true"
+    
+    # Gemini Call Resilience (retries with jittered backoff, circuit breaker)
+    llm_max_retries: int = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    llm_backoff_base_seconds: float = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.3"))
+    llm_backoff_max_seconds: float = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "4"))
+    llm_circuit_failure_threshold: int = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+    llm_circuit_reset_seconds: float = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+    
+    # Gemini Quota Scheduling (requests per minute per API key, shared across processes through QUOTA_STATE_PATH)
+    gemini_generate_rpm: int = int(os.getenv("GEMINI_GENERATE_RPM", "60"))
+    gemini_embed_rpm: int = int(os.getenv("GEMINI_EMBED_RPM", "600"))
+    quota_background_share: float = float(os.getenv("QUOTA_BACKGROUND_SHARE", "0.5"))
+    quota_state_path: str = os.getenv("QUOTA_STATE_PATH", str(DATA_DIR / "quota_state.sqlite3"))
+    embedding_batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+    
+    # Chunking ("recursive": 1000-char RecursiveCharacterTextSplitter, "token": sentence-aware token budget)
+    chunker: str = os.getenv("CHUNKER", "recursive")
+    chunk_max_tokens: int = int(os.getenv("CHUNK_MAX_TOKENS", "256"))
+    chunk_overlap_tokens: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+    
+    # Document Preparation (worker processes for chunking; 1 = serial)
+    prepare_workers: int = int(os.getenv("PREPARE_WORKERS", "1"))
+    prepare_batch_pages: int = int(os.getenv("PREPARE_BATCH_PAGES", "16"))
+    
+    # Boilerplate Stripping (word shingles repeated across pages are removed before chunking)
+    boilerplate_strip_enabled: bool = os.getenv("BOILERPLATE_STRIP_ENABLED", "True").lower() == "true"
+    boilerplate_shingle_size: int = int(os.getenv("BOILERPLATE_SHINGLE_SIZE", "8"))
+    boilerplate_min_page_fraction: float = float(os.getenv("BOILERPLATE_MIN_PAGE_FRACTION", "0.2"))
+    
+    # Near-Duplicate Chunk Filtering (MinHash / LSH)
+    dedup_enabled: bool = os.getenv("DEDUP_ENABLED", "True").lower() == "true"
+    dedup_threshold: float = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+    dedup_num_perm: int = int(os.getenv("DEDUP_NUM_PERM", "64"))
+    dedup_window: int = int(os.getenv("DEDUP_WINDOW", "1000"))
+    
+    # Ingestion Pipeline (concurrent embed/upsert workers, bounded queues, resume checkpoint)
+    ingest_embed_workers: int = int(os.getenv("INGEST_EMBED_WORKERS", "4"))
+    ingest_upsert_workers: int = int(os.getenv("INGEST_UPSERT_WORKERS", "2"))
+    ingest_max_pending_batches: int = int(os.getenv("INGEST_MAX_PENDING_BATCHES", "8"))
+    ingest_checkpoint_every: int = int(os.getenv("INGEST_CHECKPOINT_EVERY", "10"))
+    ingest_checkpoint_path: str = os.getenv("INGEST_CHECKPOINT_PATH", str(DATA_DIR / "ingest_checkpoint.json"))
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
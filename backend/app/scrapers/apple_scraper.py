@@ -1,48 +1,48 @@
 import requests
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
 import time
 import json
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from urllib.parse import urljoin, urlparse
 import logging
+from app.scrapers.checkpoint import CrawlCheckpoint
+from app.scrapers.corpus import CorpusWriter
+from app.scrapers.extraction import extract_page
+from app.scrapers.frontier import CrawlFrontier, extract_links
+from app.scrapers.http_cache import HTTPCache
+from app.scrapers.driver_pool import DriverPool, RenderHints, RenderOnDemand
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class AppleSupportScraper:
-    def __init__(self):
-        self.base_url = "https://support.apple.com"
+    def __init__(self, cache: Optional[HTTPCache] = None, render_pool_size: int = 2,
+                 render_hints_path: Optional[str] = os.path.join("data", "render_hints.json"),
+                 base_url: str = "https://support.apple.com"):
+        self.base_url = base_url.rstrip('/')
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
-        self.driver = None
+        self.render_pool_size = render_pool_size
+        self.render_hints_path = render_hints_path
+        self.renderer = None
         self.scraped_data = []
+        self.frontier = None
+        self.cache = cache
         
     def setup_driver(self):
-        """Setup Chrome driver with headless options"""
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
+        """Set up on-demand rendering through a pool of headless Chrome drivers (started lazily)"""
+        hints = RenderHints(self.render_hints_path) if self.render_hints_path else None
+        self.renderer = RenderOnDemand(DriverPool(size=self.render_pool_size), hints)
         
     def close_driver(self):
-        """Close the Chrome driver"""
-        if self.driver:
-            self.driver.quit()
+        """Close the Chrome drivers and save render hints"""
+        if self.renderer:
+            logger.info(f"Rendering: {self.renderer.stats()}")
+            self.renderer.close()
+            self.renderer = None
             
     def get_product_categories(self) -> List[Dict[str, str]]:
         """Get all product categories from Apple support"""
@@ -87,167 +87,158 @@ class AppleSupportScraper:
         else:
             return 'Other'
     
+    def fetch_and_parse(self, url: str):
+        """Fetch and extract a page, returning (html, page record)
+        
+        Pages are fetched statically and only rendered in a browser when the
+        static HTML lacks main content. URLs that render hints mark as
+        needing JavaScript skip the static fetch altogether; the rendered
+        HTML is still stored in the cache. Otherwise, with a cache, the
+        static fetch is a conditional GET and an unchanged page reuses the
+        stored HTML and record.
+        """
+        if self.renderer and self.renderer.hint(url) == 'js':
+            # Known to need JavaScript: go straight to the browser
+            page_source, page_data = self.renderer.extract_rendered(url, self.parse_page)
+            if self.cache is not None:
+                rendered = page_source.encode('utf-8')
+                self.cache.store(url, {}, rendered, page_data, html=rendered)
+            return page_source, page_data
+        
+        headers = self.cache.conditional_headers(url) if self.cache is not None else None
+        response = self.session.get(url, headers=headers, timeout=10)
+        if self.cache is not None:
+            cached = self.cache.reuse(url, response.status_code, response.content)
+            if cached is not None:
+                return self.cache.get_html(url), cached
+        response.raise_for_status()
+        
+        if self.renderer:
+            page_source, page_data = self.renderer.extract(url, response.text, self.parse_page)
+        else:
+            page_source, page_data = response.text, self.parse_page(url, response.text)
+        if self.cache is not None:
+            self.cache.store(url, response.headers, response.content, page_data, html=page_source.encode('utf-8'))
+        return page_source, page_data
+    
     def scrape_support_page(self, url: str) -> Dict[str, Any]:
         """Scrape a single support page"""
         try:
-            if self.driver:
-                self.driver.get(url)
-                time.sleep(2)
-                
-                # Wait for content to load
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
-                
-                page_source = self.driver.page_source
-            else:
-                response = self.session.get(url)
-                page_source = response.text
-                
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            # Extract title
-            title = soup.find('title')
-            title_text = title.get_text(strip=True) if title else ""
-            
-            # Extract main content
-            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content')
-            
-            if main_content:
-                # Remove script and style elements
-                for script in main_content(["script", "style"]):
-                    script.decompose()
-                    
-                content_text = main_content.get_text(separator=' ', strip=True)
-            else:
-                content_text = soup.get_text(separator=' ', strip=True)
-            
-            # Extract FAQ items if present
-            faq_items = self._extract_faq_items(soup)
-            
-            # Extract troubleshooting steps
-            troubleshooting = self._extract_troubleshooting(soup)
-            
-            return {
-                'url': url,
-                'title': title_text,
-                'content': content_text,
-                'faq_items': faq_items,
-                'troubleshooting': troubleshooting,
-                'product': self._extract_product_from_url(url),
-                'scraped_at': time.time()
-            }
+            return self.fetch_and_parse(url)[1]
             
         except Exception as e:
             logger.error(f"Error scraping {url}: {e}")
-            return {
-                'url': url,
-                'title': '',
-                'content': '',
-                'faq_items': [],
-                'troubleshooting': [],
-                'product': 'Unknown',
-                'scraped_at': time.time(),
-                'error': str(e)
-            }
+            return self.error_page(url, e)
     
-    def _extract_faq_items(self, soup: BeautifulSoup) -> List[Dict[str, str]]:
-        """Extract FAQ items from the page"""
-        faq_items = []
-        
-        # Look for common FAQ patterns
-        faq_selectors = [
-            'div[class*="faq"]',
-            'div[class*="accordion"]',
-            'details',
-            'div[class*="question"]'
-        ]
+    def parse_page(self, url: str, html) -> Dict[str, Any]:
+        """Extract a page record from fetched or rendered HTML (shared with the async crawler)"""
+        # Title, content, FAQ items and troubleshooting steps in one pass
+        page = extract_page(html)
         
-        for selector in faq_selectors:
-            elements = soup.select(selector)
-            for element in elements:
-                question_elem = element.find(['h3', 'h4', 'h5', 'summary'])
-                answer_elem = element.find(['div', 'p', 'span'])
-                
-                if question_elem and answer_elem:
-                    faq_items.append({
-                        'question': question_elem.get_text(strip=True),
-                        'answer': answer_elem.get_text(strip=True)
-                    })
-                    
-        return faq_items
+        return {
+            'url': url,
+            'title': page['title'],
+            'content': page['content'],
+            'faq_items': page['faq_items'],
+            'troubleshooting': page['troubleshooting'],
+            'product': self._extract_product_from_url(url),
+            'scraped_at': time.time()
+        }
+    
+    def error_page(self, url: str, error: Exception) -> Dict[str, Any]:
+        """Placeholder record for a page that could not be scraped"""
+        return {
+            'url': url,
+            'title': '',
+            'content': '',
+            'faq_items': [],
+            'troubleshooting': [],
+            'product': 'Unknown',
+            'scraped_at': time.time(),
+            'error': str(error)
+        }
+    
+    def _emit(self, page_data: Dict[str, Any], writer: Optional[CorpusWriter]):
+        """Stream a scraped page to the writer, or buffer it when there is none"""
+        if writer:
+            writer.write(page_data)
+        else:
+            self.scraped_data.append(page_data)
     
-    def _extract_troubleshooting(self, soup: BeautifulSoup) -> List[str]:
-        """Extract troubleshooting steps from the page"""
-        troubleshooting = []
+    def scrape_all_support_pages(self, max_pages: int = 100, writer: Optional[CorpusWriter] = None,
+                                 max_depth: int = 1, use_bloom: bool = False, render: bool = True,
+                                 checkpoint: Optional[CrawlCheckpoint] = None):
+        """Scrape all support pages
         
-        # Look for numbered lists or steps
-        step_selectors = [
-            'ol li',
-            'div[class*="step"]',
-            'div[class*="troubleshoot"]'
-        ]
+        Category pages (depth 0) and the support pages they link to (depth 1,
+        up to max_depth) are crawled breadth-first from a CrawlFrontier, which
+        normalizes URLs so each page is fetched once however it is spelled.
+        With a writer, each page is streamed to it as soon as it is scraped
+        instead of being buffered in self.scraped_data. render=False keeps
+        every fetch static (no browser). With a checkpoint (and a writer
+        opened by checkpoint.open_writer), the frontier and output offset are
+        saved periodically and a restarted crawl continues from them.
+        """
+        if checkpoint is not None and writer is None:
+            raise ValueError("Checkpointing needs a writer: buffered pages cannot be resumed")
+        
+        self.frontier = checkpoint.restore_frontier() if checkpoint is not None else None
+        scraped_count = checkpoint.extra.get('scraped_count', 0) if checkpoint is not None else 0
         
-        for selector in step_selectors:
-            elements = soup.select(selector)
-            for element in elements:
-                text = element.get_text(strip=True)
-                if text and len(text) > 10:  # Filter out very short text
-                    troubleshooting.append(text)
-                    
-        return troubleshooting
-    
-    def scrape_all_support_pages(self, max_pages: int = 100):
-        """Scrape all support pages"""
         try:
-            self.setup_driver()
-            
-            # Get product categories
-            categories = self.get_product_categories()
-            logger.info(f"Found {len(categories)} product categories")
-            
-            scraped_count = 0
+            if render:
+                self.setup_driver()
             
-            for category in categories:
-                if scraped_count >= max_pages:
-                    break
-                    
-                logger.info(f"Scraping category: {category['name']}")
+            if self.frontier is None:
+                self.frontier = CrawlFrontier(
+                    max_depth=max_depth,
+                    allowed_hosts=[urlparse(self.base_url).hostname],
+                    use_bloom=use_bloom
+                )
                 
-                # Scrape the category page
-                category_data = self.scrape_support_page(category['url'])
-                if category_data['content']:
-                    self.scraped_data.append(category_data)
-                    scraped_count += 1
+                # Get product categories
+                categories = self.get_product_categories()
+                logger.info(f"Found {len(categories)} product categories")
+                for category in categories:
+                    self.frontier.add(category['url'], depth=0)
+            else:
+                logger.info(f"Resuming with {len(self.frontier)} queued pages, {scraped_count} already scraped")
+            
+            while self.frontier and scraped_count < max_pages:
+                url, depth = self.frontier.pop()
+                logger.info(f"Scraping {'category' if depth == 0 else 'sub-page'}: {url}")
                 
-                # Find and scrape sub-pages
                 try:
-                    response = self.session.get(category['url'])
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # Find links to other support pages
-                    links = soup.find_all('a', href=True)
-                    for link in links:
-                        if scraped_count >= max_pages:
-                            break
-                            
-                        href = link.get('href')
-                        if href and 'support.apple.com' in href and href not in [d['url'] for d in self.scraped_data]:
-                            logger.info(f"Scraping sub-page: {href}")
-                            page_data = self.scrape_support_page(href)
-                            if page_data['content']:
-                                self.scraped_data.append(page_data)
-                                scraped_count += 1
-                                
+                    page_source, page_data = self.fetch_and_parse(url)
                 except Exception as e:
-                    logger.error(f"Error scraping sub-pages for {category['name']}: {e}")
+                    logger.error(f"Error scraping {url}: {e}")
+                    continue
+                
+                if page_data['content']:
+                    self._emit(page_data, writer)
+                    scraped_count += 1
+                
+                # Queue links to other support pages from the same fetch
+                if depth < max_depth:
+                    self.frontier.add_many(extract_links(url, page_source), depth + 1)
+                
+                if checkpoint is not None:
+                    checkpoint.step(self.frontier, writer, extra={'scraped_count': scraped_count})
                     
+            if checkpoint is not None:
+                checkpoint.complete()
         finally:
             self.close_driver()
             
-        logger.info(f"Scraped {len(self.scraped_data)} pages total")
+        logger.info(f"Scraped {scraped_count} pages total; frontier: {self.frontier.stats()}")
+        if self.cache is not None:
+            logger.info(f"HTTP cache: {self.cache.stats()}")
         return self.scraped_data
     
+    def open_writer(self, filename: str = "apple_support_data.jsonl") -> CorpusWriter:
+        """Open a streaming JSON Lines writer in the data directory"""
+        return CorpusWriter(os.path.join("data", filename))
+    
     def save_data(self, filename: str = "apple_support_data.json"):
         """Save scraped data to JSON file"""
         os.makedirs("data", exist_ok=True)
@@ -261,27 +252,22 @@ class AppleSupportScraper:
 
 def main():
     """Main function to run the scraper"""
-    scraper = AppleSupportScraper()
+    scraper = AppleSupportScraper(cache=HTTPCache(os.path.join("data", "http_cache.sqlite3")))
     
     print("Starting Apple Support scraper...")
-    print("This will scrape Apple support pages and save them to data/apple_support_data.json")
+    print("This will scrape Apple support pages and save them to data/apple_support_data.jsonl")
     
-    # Scrape all support pages
-    scraped_data = scraper.scrape_all_support_pages(max_pages=50)
+    # Scrape all support pages, streaming each one to disk; an interrupted run resumes from its checkpoint
+    output = os.path.join("data", "apple_support_data.jsonl")
+    checkpoint = CrawlCheckpoint(f"{output}.checkpoint", every=10)
+    with checkpoint.open_writer(output) as writer:
+        scraper.scrape_all_support_pages(max_pages=50, writer=writer, checkpoint=checkpoint)
     
-    # Save the data
-    filepath = scraper.save_data()
-    
-    print(f"Scraping completed! Saved {len(scraped_data)} pages to {filepath}")
+    print(f"Scraping completed! Saved {writer.count} pages to {writer.path}")
     
     # Print summary
-    products = {}
-    for item in scraped_data:
-        product = item.get('product', 'Unknown')
-        products[product] = products.get(product, 0) + 1
-    
     print("\nScraping Summary:")
-    for product, count in products.items():
+    for product, count in writer.product_counts.items():
         print(f"  {product}: {count} pages")
 
 if __name__ == "__main__":
@@ -0,0 +1,382 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+from urllib.parse import urlparse
+from typing import List, Dict, Any, Optional, Iterable, Callable, Awaitable
+import httpx
+from app.scrapers.corpus import CorpusWriter
+from app.scrapers.checkpoint import CrawlCheckpoint
+from app.scrapers.frontier import CrawlFrontier, extract_links
+from app.scrapers.http_cache import HTTPCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Status codes worth retrying (rate limiting and transient server errors)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+class HostLimiter:
+    """Per-host politeness: at most `concurrency` requests in flight, spaced `delay` seconds apart"""
+
+    def __init__(self, concurrency: int, delay: float):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.delay = delay
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        # Reserve the next start slot for this host, then wait for it
+        async with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot)
+            self._next_slot = start + self.delay
+        if start > now:
+            await asyncio.sleep(start - now)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.semaphore.release()
+
+    def back_off(self, seconds: float):
+        """Push this host's next slot out (e.g. after a 429 / Retry-After)"""
+        self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
+class AsyncCrawler:
+    """Concurrent asyncio crawler with a pooled HTTP client
+
+    A global semaphore bounds total in-flight requests; each host gets its
+    own HostLimiter so the origin sees at most `per_host_concurrency`
+    requests, spaced `per_host_delay` apart. Timeouts, connection errors,
+    429 and 5xx responses are retried with jittered exponential backoff
+    (honouring Retry-After). Pages are parsed by `extractor.parse_page`,
+    the same extraction code the sequential scrapers use, in a worker
+    thread so parsing does not stall the event loop.
+
+    URLs come from a CrawlFrontier: `concurrency` worker tasks pop URLs
+    and, below the frontier's max_depth, queue the links found on each
+    page. The crawl ends when the frontier is empty and no worker is busy.
+
+    With an HTTPCache, requests are conditional: a 304 (or an unchanged
+    body) reuses the stored page record without parsing, and links are
+    followed from the stored HTML.
+
+    With a renderer (driver_pool.RenderOnDemand), pages whose static HTML
+    lacks main content are rendered in a pooled headless browser; URLs its
+    hints mark 'js' are rendered directly, without a static request.
+    """
+
+    def __init__(self, extractor, concurrency: int = 16, per_host_concurrency: int = 4,
+                 per_host_delay: float = 0.25, timeout: float = 10.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 10.0, cache: Optional[HTTPCache] = None,
+                 renderer=None):
+        self.extractor = extractor
+        self.cache = cache
+        self.renderer = renderer
+        self.concurrency = concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_delay = per_host_delay
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._hosts: Dict[str, HostLimiter] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.client: Optional[httpx.AsyncClient] = None
+        self.frontier: Optional[CrawlFrontier] = None
+
+        # Metrics
+        self.pages = 0
+        self.unchanged = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.elapsed = 0.0
+
+    def _host(self, url: str) -> HostLimiter:
+        host = urlparse(url).netloc
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            limiter = HostLimiter(self.per_host_concurrency, self.per_host_delay)
+            self._hosts[host] = limiter
+        return limiter
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(self.backoff_max, float(retry_after))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            headers={'User-Agent': USER_AGENT},
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        )
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """GET a URL within the global and per-host limits, retrying transient failures
+
+        A 304 Not Modified (answer to conditional headers) is returned, not raised.
+        """
+        host = self._host(url)
+        attempt = 0
+        while True:
+            try:
+                async with host:
+                    async with self._semaphore:
+                        response = await self.client.get(url, headers=headers)
+                if response.status_code == 304:
+                    return response
+                if response.status_code not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return response
+                delay = self._backoff(attempt, response.headers.get('Retry-After'))
+                host.back_off(delay)
+                logger.warning(f"HTTP {response.status_code} for {url}, retrying in {delay:.1f}s")
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"{type(e).__name__} for {url}, retrying in {delay:.1f}s")
+
+            self.retries += 1
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _fetch_page(self, url: str):
+        """Fetch (conditionally, with a cache) and extract a page; returns (final url, html, page record)"""
+        headers = await asyncio.to_thread(self.cache.conditional_headers, url) if self.cache is not None else None
+        response = await self.fetch(url, headers)
+        self.bytes += len(response.content)
+        html = response.content
+
+        page = None
+        if self.cache is not None:
+            page = await asyncio.to_thread(self.cache.reuse, url, response.status_code, html)
+        if page is not None:
+            # Unchanged since the last crawl: no parse, and the same chunk ids downstream
+            self.unchanged += 1
+            html = await asyncio.to_thread(self.cache.get_html, url)
+        elif self.renderer is not None:
+            html, page = await asyncio.to_thread(self.renderer.extract, url, html, self.extractor.parse_page)
+            if self.cache is not None:
+                stored = html if isinstance(html, bytes) else html.encode('utf-8')
+                await asyncio.to_thread(self.cache.store, url, response.headers, response.content, page, stored)
+        else:
+            page = await asyncio.to_thread(self.extractor.parse_page, url, html)
+            if self.cache is not None:
+                await asyncio.to_thread(self.cache.store, url, response.headers, html, page)
+        return str(response.url), html, page
+
+    async def _render_page(self, url: str):
+        """Render a page hinted as needing JavaScript, with no static request; returns (url, html, page record)"""
+        html, page = await asyncio.to_thread(self.renderer.extract_rendered, url, self.extractor.parse_page)
+        if self.cache is not None:
+            rendered = html.encode('utf-8')
+            await asyncio.to_thread(self.cache.store, url, {}, rendered, page, rendered)
+        return url, html, page
+
+    async def crawl_page(self, url: str, depth: int = 0) -> Dict[str, Any]:
+        """Fetch and extract one page, queueing its links; failures become error records"""
+        try:
+            if self.renderer is not None and self.renderer.hint(url) == 'js':
+                final_url, html, page = await self._render_page(url)
+            else:
+                final_url, html, page = await self._fetch_page(url)
+            self.pages += 1
+
+            if self.frontier is not None and depth < self.frontier.max_depth:
+                links = await asyncio.to_thread(extract_links, final_url, html)
+                self.frontier.add_many(links, depth + 1)
+            return page
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error crawling {url}: {e}")
+            return self.extractor.error_page(url, e)
+
+    async def acrawl(self, urls: Iterable[str], writer: Optional[CorpusWriter] = None,
+                     frontier: Optional[CrawlFrontier] = None, max_depth: int = 0,
+                     max_pages: Optional[int] = None,
+                     on_page: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                     checkpoint: Optional[CrawlCheckpoint] = None) -> List[Dict[str, Any]]:
+        """Crawl from seed urls; pages with content are streamed to writer (or returned)
+
+        Without a frontier, one is created that stays on the seeds' hosts
+        and follows links up to max_depth (0 = fetch only the seeds).
+        With on_page, each page is awaited through it instead, so a slow
+        consumer holds workers back (backpressure) without blocking the loop.
+        With a checkpoint (and a writer opened by checkpoint.open_writer), a
+        saved frontier replaces the one given and progress is saved
+        periodically; pages still in flight at a save are re-queued in it.
+        """
+        if checkpoint is not None and writer is None:
+            raise ValueError("Checkpointing needs a writer: streamed or returned pages cannot be resumed")
+
+        started = time.monotonic()
+        seeds = list(urls)
+        restored = checkpoint.restore_frontier() if checkpoint is not None else None
+        if restored is not None:
+            frontier = restored
+        elif frontier is None:
+            frontier = CrawlFrontier(
+                max_depth=max_depth,
+                allowed_hosts={urlparse(url).hostname for url in seeds if urlparse(url).hostname}
+            )
+        self.frontier = frontier
+        if restored is None:
+            self.frontier.add_many(seeds, depth=0)
+
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._hosts = {}
+        results = []
+        state = {'active': 0, 'written': checkpoint.extra.get('written', 0) if checkpoint is not None else 0}
+        in_flight: Dict[str, int] = {}
+        changed = asyncio.Condition()
+
+        async def worker():
+            while True:
+                async with changed:
+                    # Wait while the frontier is empty but busy workers may still add links
+                    while not self.frontier and state['active']:
+                        await changed.wait()
+                    if not self.frontier or (max_pages and state['written'] >= max_pages):
+                        changed.notify_all()
+                        return
+                    url, depth = self.frontier.pop()
+                    in_flight[url] = depth
+                    state['active'] += 1
+
+                try:
+                    page = await self.crawl_page(url, depth)
+                    if page['content'] and not (max_pages and state['written'] >= max_pages):
+                        state['written'] += 1
+                        if on_page is not None:
+                            await on_page(page)
+                        elif writer:
+                            writer.write(page)
+                        else:
+                            results.append(page)
+                    if checkpoint is not None:
+                        # The page and its links are recorded; only unfinished pages are re-queued
+                        del in_flight[url]
+                        checkpoint.step(self.frontier, writer, pending=in_flight.items(),
+                                        extra={'written': state['written']})
+                finally:
+                    in_flight.pop(url, None)
+                    async with changed:
+                        state['active'] -= 1
+                        changed.notify_all()
+
+        async with self._new_client() as client:
+            self.client = client
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        self.client = None
+        if checkpoint is not None:
+            checkpoint.complete()
+
+        self.elapsed += time.monotonic() - started
+        logger.info(f"Crawl finished: {self.stats()}")
+        return results
+
+    def crawl(self, urls: Iterable[str], writer: Optional[CorpusWriter] = None, **kwargs) -> List[Dict[str, Any]]:
+        """Synchronous entry point for acrawl"""
+        return asyncio.run(self.acrawl(urls, writer, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get crawl counters and throughput"""
+        return {
+            'pages': self.pages,
+            'unchanged': self.unchanged,
+            'errors': self.errors,
+            'retries': self.retries,
+            'bytes': self.bytes,
+            'seconds': round(self.elapsed, 2),
+            'pages_per_second': round(self.pages / self.elapsed, 2) if self.elapsed else 0.0,
+            'frontier': self.frontier.stats() if self.frontier is not None else None,
+            'http_cache': self.cache.stats() if self.cache is not None else None,
+            'rendering': self.renderer.stats() if self.renderer is not None else None
+        }
+
+def main():
+    """Crawl the SimpleAppleScraper page list concurrently"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Concurrent Apple support crawler")
+    parser.add_argument('--concurrency', type=int, default=16, help="Max requests in flight overall")
+    parser.add_argument('--per-host', type=int, default=4, help="Max requests in flight per host")
+    parser.add_argument('--delay', type=float, default=0.25, help="Min seconds between request starts per host")
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--depth', type=int, default=0, help="Follow links this many hops from the seed pages")
+    parser.add_argument('--max-pages', type=int, help="Stop after this many pages with content")
+    parser.add_argument('--bloom', action='store_true', help="Track seen URLs in a Bloom filter (very large crawls)")
+    parser.add_argument('--output', default="../data/apple_support_data.jsonl")
+    parser.add_argument('--base-url', default="https://support.apple.com", help="Site to crawl (e.g. the fixture server)")
+    parser.add_argument('--cache', default="../data/http_cache.sqlite3", help="HTTP cache for conditional recrawls")
+    parser.add_argument('--no-cache', action='store_true', help="Fetch every page in full")
+    parser.add_argument('--render', action='store_true', help="Render pages without main content in headless Chrome")
+    parser.add_argument('--render-pool', type=int, default=2, help="Headless drivers to keep open")
+    parser.add_argument('--render-hints', default="../data/render_hints.json", help="Per-URL js/static fetcher hints")
+    parser.add_argument('--checkpoint', help="Crawl checkpoint to save and resume from (default: <output>.checkpoint)")
+    parser.add_argument('--checkpoint-every', type=int, default=50, help="Save the checkpoint every this many pages")
+    parser.add_argument('--fresh', action='store_true', help="Discard an existing checkpoint and start over")
+    args = parser.parse_args()
+
+    # The sequential scraper supplies the seed list and the extraction logic
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+    from simple_scraper import SimpleAppleScraper
+    scraper = SimpleAppleScraper(base_url=args.base_url)
+
+    renderer = None
+    if args.render:
+        from app.scrapers.driver_pool import DriverPool, RenderHints, RenderOnDemand
+        renderer = RenderOnDemand(DriverPool(size=args.render_pool), RenderHints(args.render_hints))
+
+    crawler = AsyncCrawler(
+        extractor=scraper,
+        concurrency=args.concurrency,
+        per_host_concurrency=args.per_host,
+        per_host_delay=args.delay,
+        timeout=args.timeout,
+        max_retries=args.retries,
+        cache=None if args.no_cache else HTTPCache(args.cache),
+        renderer=renderer
+    )
+
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint"
+    if args.fresh and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = CrawlCheckpoint(checkpoint_path, every=args.checkpoint_every)
+
+    print("Resuming concurrent Apple Support crawl..." if checkpoint.resumed else "Starting concurrent Apple Support crawler...")
+    with checkpoint.open_writer(args.output) as writer:
+        seeds = scraper.get_support_pages()
+        frontier = CrawlFrontier(
+            max_depth=args.depth,
+            allowed_hosts={urlparse(url).hostname for url in seeds},
+            use_bloom=args.bloom
+        )
+        try:
+            crawler.crawl(seeds, writer, frontier=frontier, max_pages=args.max_pages, checkpoint=checkpoint)
+        finally:
+            if renderer is not None:
+                renderer.close()
+
+    stats = crawler.stats()
+    print(f"Crawling completed! Saved {writer.count} pages to {writer.path} "
+          f"in {stats['seconds']}s ({stats['pages_per_second']} pages/sec, {stats['retries']} retries, "
+          f"{stats['frontier']['duplicates_avoided']} duplicate URLs skipped, "
+          f"{stats['unchanged']} unchanged since the last crawl)")
+
+    print("\nScraping Summary:")
+    for product, count in writer.product_counts.items():
+        print(f"  {product}: {count} pages")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable, Iterable, Tuple
+
+from app.scrapers.corpus import CorpusWriter
+from app.scrapers.frontier import CrawlFrontier
+
+logger = logging.getLogger(__name__)
+
+class CrawlCheckpoint:
+    """Periodic, atomic snapshot of a crawl so a restarted run resumes where it stopped
+
+    Every `every` finished pages, step() saves the frontier (queue, seen
+    URLs, counters), the corpus writer's byte offset and counts, and any
+    scraper counters to one JSON file (written to a temp file and renamed,
+    so a crash mid-save keeps the previous checkpoint). On restart,
+    open_writer() truncates the corpus back to the saved offset and
+    restore_frontier() rebuilds the queue, so pages finished after the last
+    checkpoint are fetched again rather than lost or duplicated.
+    complete() removes the checkpoint once the crawl has finished.
+    """
+
+    def __init__(self, path: str, every: int = 50):
+        self.path = path
+        self.every = every
+        self.state: Optional[Dict[str, Any]] = None
+        self.saves = 0
+        self._since_save = 0
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.state = json.load(f)
+                logger.info(f"Resuming crawl from checkpoint {path} "
+                            f"({len(self.state['frontier']['queue'])} URLs queued, "
+                            f"{self.state['output']['count']} pages written)")
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable crawl checkpoint {path}: {e}")
+                self.state = None
+
+    @property
+    def resumed(self) -> bool:
+        return self.state is not None
+
+    @property
+    def extra(self) -> Dict[str, Any]:
+        """Scraper counters saved with the checkpoint (empty on a fresh crawl)"""
+        return self.state.get('extra', {}) if self.state else {}
+
+    def open_writer(self, path: str) -> CorpusWriter:
+        """A writer for path that continues after the checkpointed output, or starts it fresh"""
+        if not self.state:
+            return CorpusWriter(path)
+        saved = self.state['output']
+        if os.path.abspath(saved['path']) != os.path.abspath(path):
+            raise ValueError(f"Checkpoint {self.path} belongs to {saved['path']}, not {path}; "
+                             f"delete it to start a fresh crawl")
+        return CorpusWriter(path, resume=saved)
+
+    def restore_frontier(self, url_filter: Optional[Callable[[str], bool]] = None,
+                         priority_fn: Optional[Callable[[str, int], float]] = None) -> Optional[CrawlFrontier]:
+        """The checkpointed frontier, or None on a fresh crawl"""
+        if not self.state:
+            return None
+        return CrawlFrontier.from_state(self.state['frontier'], url_filter=url_filter, priority_fn=priority_fn)
+
+    def save(self, frontier: CrawlFrontier, writer: CorpusWriter,
+             pending: Iterable[Tuple[str, int]] = (), extra: Optional[Dict[str, Any]] = None):
+        """Write the checkpoint now; `pending` (url, depth) pairs are re-queued on resume"""
+        self.state = {
+            'saved_at': time.time(),
+            'frontier': frontier.to_state(pending),
+            'output': writer.state(),
+            'extra': extra or {}
+        }
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+        self.saves += 1
+        self._since_save = 0
+
+    def step(self, frontier: CrawlFrontier, writer: CorpusWriter,
+             pending: Iterable[Tuple[str, int]] = (), extra: Optional[Dict[str, Any]] = None):
+        """Record one finished page; saves every `every` pages"""
+        self._since_save += 1
+        if self._since_save >= self.every:
+            self.save(frontier, writer, pending, extra)
+
+    def complete(self):
+        """Remove the checkpoint after a finished crawl"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.state = None
+        logger.info(f"Crawl complete; removed checkpoint {self.path} after {self.saves} saves")
+
+    def stats(self) -> Dict[str, Any]:
+        return {'path': self.path, 'every': self.every, 'saves': self.saves}
@@ -0,0 +1,98 @@
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Any, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+class CorpusWriter:
+    """Streaming JSON Lines writer for scraped pages (one page object per line)
+
+    Pages are written and flushed as they are scraped, so scrapers never
+    hold the corpus in memory and an interrupted run keeps every page
+    written so far. `resume` takes a state() snapshot (from a crawl
+    checkpoint): the file is truncated back to the saved offset, dropping
+    pages written after it, and the counters continue from there.
+    """
+
+    def __init__(self, path: str, append: bool = False, resume: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.count = 0
+        self.product_counts: Dict[str, int] = {}
+        self._file = None
+        self._append = append
+        self._resume = resume
+
+    def open(self) -> "CorpusWriter":
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        if self._resume:
+            offset = self._resume['offset']
+            size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            if size < offset:
+                raise ValueError(f"Cannot resume {self.path}: it has {size} bytes, the checkpoint expects {offset}")
+            if size > offset:
+                with open(self.path, 'r+b') as f:
+                    f.truncate(offset)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self.count = self._resume['count']
+            self.product_counts = dict(self._resume['product_counts'])
+            logger.info(f"Resuming {self.path} after {self.count} pages")
+        else:
+            self._file = open(self.path, 'a' if self._append else 'w', encoding='utf-8')
+        return self
+
+    def write(self, page: Dict[str, Any]):
+        """Append one scraped page"""
+        self._file.write(json.dumps(page, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self.count += 1
+        product = page.get('product', 'Unknown')
+        self.product_counts[product] = self.product_counts.get(product, 0) + 1
+
+    def state(self) -> Dict[str, Any]:
+        """Byte offset and counters of everything written so far"""
+        return {
+            'path': self.path,
+            'offset': self._file.tell(),
+            'count': self.count,
+            'product_counts': dict(self.product_counts)
+        }
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        logger.info(f"Saved {self.count} pages to {self.path}")
+
+    def __enter__(self) -> "CorpusWriter":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def iter_corpus(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield scraped pages from a .jsonl corpus (streamed) or a legacy .json array"""
+    if str(path).endswith('.jsonl'):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    # A crash mid-write can leave a truncated last line
+                    logger.warning(f"Skipping malformed line {line_number} in {path}: {e}")
+    else:
+        # Legacy format: a single JSON array, which has to be loaded whole
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+
+def find_corpus(data_dir: str, name: str = "apple_support_data") -> Optional[str]:
+    """Locate a corpus in data_dir, preferring JSON Lines over the legacy JSON array"""
+    for extension in ('.jsonl', '.json'):
+        path = os.path.join(data_dir, name + extension)
+        if os.path.exists(path):
+            return path
+    return None
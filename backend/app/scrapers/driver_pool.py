@@ -0,0 +1,287 @@
+import os
+import re
+import json
+import time
+import queue
+import threading
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable, Tuple, List
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from webdriver_manager.chrome import ChromeDriverManager
+from selenium.webdriver.chrome.service import Service
+from app.scrapers.frontier import normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Elements that hold a support article's main content (same as the extractors look for)
+READY_SELECTOR = "main, article, div.content"
+
+_MAIN_TAG = re.compile(r'<(?:main|article)\b|<div\b[^>]*\bclass\s*=\s*["\'][^"\']*\bcontent\b', re.IGNORECASE)
+
+def has_main_content(html, page: Dict[str, Any], min_chars: int = 200) -> bool:
+    """Whether a static fetch already holds the article (a main element with real text)"""
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', errors='ignore')
+    return bool(_MAIN_TAG.search(html)) and len(page.get('content', '')) >= min_chars
+
+class DriverPool:
+    """Small pool of reusable headless Chrome drivers
+
+    Drivers start lazily (up to `size`) and are returned to the pool after
+    each render, so the browser start-up cost is paid once per driver, not
+    per page. render() waits until `ready_selector` is present rather than
+    sleeping a fixed time; a driver that errors is discarded and replaced.
+    """
+
+    def __init__(self, size: int = 2, ready_selector: str = READY_SELECTOR,
+                 ready_timeout: float = 10.0, page_load_timeout: float = 30.0):
+        self.size = size
+        self.ready_selector = ready_selector
+        self.ready_timeout = ready_timeout
+        self.page_load_timeout = page_load_timeout
+
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._drivers: List[Any] = []
+        self._lock = threading.Lock()
+
+        # Counters
+        self.renders = 0
+        self.ready_timeouts = 0
+        self.failures = 0
+        self.render_seconds = 0.0
+
+    def _new_driver(self):
+        chrome_options = Options()
+        chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--window-size=1920,1080")
+        # Return from get() at DOMContentLoaded; readiness is checked explicitly
+        chrome_options.page_load_strategy = 'eager'
+
+        service = Service(ChromeDriverManager().install())
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        driver.set_page_load_timeout(self.page_load_timeout)
+        logger.info(f"Started headless driver ({len(self._drivers) + 1} of up to {self.size})")
+        return driver
+
+    @contextmanager
+    def acquire(self):
+        """Borrow a driver, starting one if no idle driver is available"""
+        self._slots.acquire()
+        discard = False
+        try:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self._new_driver()
+                with self._lock:
+                    self._drivers.append(driver)
+            try:
+                yield driver
+            except WebDriverException:
+                # A crashed or wedged browser is not reused
+                self.failures += 1
+                discard = True
+                raise
+            finally:
+                if discard:
+                    self._discard(driver)
+                else:
+                    self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    def _discard(self, driver):
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def render(self, url: str) -> str:
+        """Load a URL in a pooled browser and return the DOM once main content is present"""
+        start = time.perf_counter()
+        with self.acquire() as driver:
+            driver.get(url)
+            try:
+                WebDriverWait(driver, self.ready_timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, self.ready_selector))
+                )
+            except TimeoutException:
+                self.ready_timeouts += 1
+                logger.warning(f"No {self.ready_selector} after {self.ready_timeout}s on {url}, using the DOM as is")
+            html = driver.page_source
+        self.renders += 1
+        self.render_seconds += time.perf_counter() - start
+        return html
+
+    def close(self):
+        """Quit every driver"""
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self._idle = queue.LifoQueue()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get render counters"""
+        return {
+            'drivers': len(self._drivers),
+            'renders': self.renders,
+            'ready_timeouts': self.ready_timeouts,
+            'failures': self.failures,
+            'avg_render_seconds': round(self.render_seconds / self.renders, 2) if self.renders else None
+        }
+
+class RenderHints:
+    """Persisted per-URL fetcher choice: 'js' (needs a browser) or 'static'"""
+
+    def __init__(self, path: str, save_every: int = 20):
+        self.path = path
+        self.save_every = save_every
+        self.hints: Dict[str, str] = {}
+        self._unsaved = 0
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.hints = json.load(f).get('hints', {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable render hints {path}: {e}")
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return normalize_url(url) or url
+
+    def get(self, url: str) -> Optional[str]:
+        return self.hints.get(self._key(url))
+
+    def record(self, url: str, mode: str):
+        """Remember which fetcher a URL needs"""
+        with self._lock:
+            key = self._key(url)
+            if self.hints.get(key) == mode:
+                return
+            self.hints[key] = mode
+            self._unsaved += 1
+            due = self._unsaved >= self.save_every
+        if due:
+            self.save()
+
+    def save(self):
+        """Write the hints atomically"""
+        with self._lock:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'hints': self.hints}, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self._unsaved = 0
+
+    def stats(self) -> Dict[str, Any]:
+        modes = list(self.hints.values())
+        return {'js': modes.count('js'), 'static': modes.count('static')}
+
+class RenderOnDemand:
+    """Static-first extraction that renders in a browser only when main content is missing
+
+    extract() parses the static HTML; if it has no main element with at
+    least `min_chars` of text, the page is rendered through the DriverPool
+    and re-parsed. The outcome is recorded in RenderHints: URLs marked 'js'
+    skip the static parse next time, and URLs where rendering did not help
+    are marked 'static' so they are not rendered again. Callers check
+    hint(url) == 'js' before fetching and use extract_rendered() instead,
+    so those URLs get no static request at all.
+    """
+
+    def __init__(self, pool: DriverPool, hints: Optional[RenderHints] = None, min_chars: int = 200):
+        self.pool = pool
+        self.hints = hints
+        self.min_chars = min_chars
+
+        # Counters
+        self.static_pages = 0
+        self.rendered_pages = 0
+        self.render_errors = 0
+
+    def hint(self, url: str) -> Optional[str]:
+        return self.hints.get(url) if self.hints is not None else None
+
+    def _record(self, url: str, mode: str):
+        if self.hints is not None:
+            self.hints.record(url, mode)
+
+    def render(self, url: str) -> str:
+        return self.pool.render(url)
+
+    def extract_rendered(self, url: str, parse: Callable[[str, Any], Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+        """Return (rendered html, page record) for a URL hinted 'js', without any static fetch"""
+        rendered = self.pool.render(url)
+        self.rendered_pages += 1
+        return rendered, parse(url, rendered)
+
+    def extract(self, url: str, html, parse: Callable[[str, Any], Dict[str, Any]]) -> Tuple[Any, Dict[str, Any]]:
+        """Return (html, page record), rendering the URL first if the static HTML lacks main content"""
+        mode = self.hint(url)
+        page = parse(url, html) if mode != 'js' else None
+        if page is not None and (mode == 'static' or has_main_content(html, page, self.min_chars)):
+            self.static_pages += 1
+            return html, page
+
+        try:
+            rendered = self.pool.render(url)
+        except WebDriverException as e:
+            self.render_errors += 1
+            logger.error(f"Error rendering {url}, keeping the static HTML: {e}")
+            self.static_pages += 1
+            return html, page if page is not None else parse(url, html)
+
+        rendered_page = parse(url, rendered)
+        static_chars = len(page['content']) if page is not None else 0
+        if len(rendered_page['content']) > static_chars:
+            self._record(url, 'js' if has_main_content(rendered, rendered_page, self.min_chars) else 'static')
+            self.rendered_pages += 1
+            return rendered, rendered_page
+
+        # Rendering added nothing: fetch this URL statically from now on
+        self._record(url, 'static')
+        self.static_pages += 1
+        return html, page if page is not None else parse(url, html)
+
+    def close(self):
+        """Save hints and quit the browsers"""
+        if self.hints is not None:
+            self.hints.save()
+        self.pool.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get static/rendered counts, pool and hint stats"""
+        return {
+            'static_pages': self.static_pages,
+            'rendered_pages': self.rendered_pages,
+            'render_errors': self.render_errors,
+            'pool': self.pool.stats(),
+            'hints': self.hints.stats() if self.hints is not None else None
+        }
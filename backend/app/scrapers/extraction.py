@@ -0,0 +1,216 @@
+import logging
+from typing import List, Dict, Any, Optional
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+logger = logging.getLogger(__name__)
+
+# Page furniture removed before extraction
+STRIP_TAGS = ('script', 'style', 'noscript', 'template', 'nav', 'header', 'footer')
+
+FAQ_CONTAINER_CLASSES = ('faq', 'accordion', 'question')
+STEP_CONTAINER_CLASSES = ('step', 'troubleshoot')
+QUESTION_TAGS = ('h2', 'h3', 'h4', 'h5', 'summary', 'dt')
+HEADING_TAGS = ('h2', 'h3', 'h4', 'h5')
+
+MIN_QUESTION_CHARS = 10
+MIN_ANSWER_CHARS = 20
+MIN_STEP_CHARS = 20
+
+def _clean(text: str) -> str:
+    return ' '.join(text.split())
+
+class _LxmlTree:
+    """lxml backend (C parser and tree walks)"""
+
+    name = 'lxml'
+
+    def __init__(self, html):
+        if isinstance(html, str):
+            # lxml refuses str input that carries an XML encoding declaration
+            html = html.encode('utf-8')
+        self.root = lxml.html.document_fromstring(html) if html.strip() else lxml.html.document_fromstring(b'<html></html>')
+
+    def title(self) -> str:
+        title = self.root.find('.//title')
+        return _clean(title.text_content()) if title is not None else ''
+
+    def main(self):
+        for path in ('.//main', './/article'):
+            found = self.root.find(path)
+            if found is not None:
+                return found
+        content = self.root.xpath("(.//div[contains(concat(' ', normalize-space(@class), ' '), ' content ')])[1]")
+        if content:
+            return content[0]
+        body = self.root.find('.//body')
+        return body if body is not None else self.root
+
+    def strip(self, element):
+        for junk in list(element.iter(*STRIP_TAGS)):
+            junk.drop_tree()
+        # Comments and processing instructions carry no visible text
+        for junk in list(element.iter(etree.Comment, etree.ProcessingInstruction)):
+            junk.drop_tree()
+
+    @staticmethod
+    def iter(element):
+        return (el for el in element.iter() if isinstance(el.tag, str))
+
+    @staticmethod
+    def tag(element) -> str:
+        return element.tag.lower()
+
+    @staticmethod
+    def classes(element) -> str:
+        return (element.get('class') or '').lower()
+
+    @staticmethod
+    def text(element) -> str:
+        return _clean(' '.join(element.itertext()))
+
+    @staticmethod
+    def find(element, tags):
+        for el in element.iterdescendants(*tags):
+            return el
+        return None
+
+    @staticmethod
+    def next_sibling(element, tags):
+        sibling = element.getnext()
+        while sibling is not None:
+            if isinstance(sibling.tag, str) and sibling.tag.lower() in tags:
+                return sibling
+            sibling = sibling.getnext()
+        return None
+
+class _SoupTree:
+    """BeautifulSoup/html.parser backend, used when lxml is not installed"""
+
+    name = 'html.parser'
+
+    def __init__(self, html):
+        self.root = BeautifulSoup(html, 'html.parser')
+
+    def title(self) -> str:
+        title = self.root.find('title')
+        return _clean(title.get_text(' ')) if title else ''
+
+    def main(self):
+        return (self.root.find('main') or self.root.find('article') or self.root.find('div', class_='content')
+                or self.root.find('body') or self.root)
+
+    def strip(self, element):
+        for junk in element(list(STRIP_TAGS)):
+            junk.decompose()
+
+    @staticmethod
+    def iter(element):
+        yield element
+        yield from element.find_all(True)
+
+    @staticmethod
+    def tag(element) -> str:
+        return element.name
+
+    @staticmethod
+    def classes(element) -> str:
+        return ' '.join(element.get('class') or []).lower()
+
+    @staticmethod
+    def text(element) -> str:
+        return _clean(element.get_text(' '))
+
+    @staticmethod
+    def find(element, tags):
+        return element.find(list(tags))
+
+    @staticmethod
+    def next_sibling(element, tags):
+        return element.find_next_sibling(list(tags))
+
+def _backend(html, parser: Optional[str]):
+    if parser == 'html.parser' or (parser is None and lxml is None):
+        return _SoupTree(html)
+    if lxml is None:
+        raise ImportError("lxml is not installed")
+    return _LxmlTree(html)
+
+def extract_page(html, parser: Optional[str] = None) -> Dict[str, Any]:
+    """Extract title, cleaned main content, FAQ pairs and steps from a page in one pass
+
+    The main element (main, article, div.content, else body) is cleaned of
+    scripts, navigation, headers and footers, then walked once:
+
+    - FAQ pairs come from <details>, faq/accordion/question containers
+      (first heading/summary is the question, the rest the answer) and
+      from headings containing '?' followed by a p/div answer.
+    - Steps are list items and leaf step/troubleshoot containers.
+
+    Both are de-duplicated (case- and whitespace-insensitive), so an item
+    matched by several rules, or repeated on the page, is emitted once.
+    Uses lxml when available, else BeautifulSoup with html.parser.
+    """
+    tree = _backend(html, parser)
+    title = tree.title()
+    main = tree.main()
+    tree.strip(main)
+
+    faq_items: List[Dict[str, str]] = []
+    steps: List[str] = []
+    seen_questions = set()
+    seen_steps = set()
+
+    def add_faq(question: str, answer: str):
+        key = question.lower()
+        if len(question) > MIN_QUESTION_CHARS and len(answer) > MIN_ANSWER_CHARS and key not in seen_questions:
+            seen_questions.add(key)
+            faq_items.append({'question': question, 'answer': answer})
+
+    def add_step(text: str):
+        key = text.lower()
+        if len(text) > MIN_STEP_CHARS and key not in seen_steps:
+            seen_steps.add(key)
+            steps.append(text)
+
+    for element in tree.iter(main):
+        tag = tree.tag(element)
+
+        if tag == 'li':
+            add_step(tree.text(element))
+            continue
+
+        if tag in HEADING_TAGS:
+            question = tree.text(element)
+            if '?' in question:
+                answer = tree.next_sibling(element, ('p', 'div'))
+                if answer is not None:
+                    add_faq(question, tree.text(answer))
+            continue
+
+        if tag not in ('div', 'section', 'details'):
+            continue
+        classes = tree.classes(element)
+
+        if tag == 'details' or any(name in classes for name in FAQ_CONTAINER_CLASSES):
+            question_element = tree.find(element, QUESTION_TAGS)
+            if question_element is not None:
+                question = tree.text(question_element)
+                text = tree.text(element)
+                answer = text[len(question):].strip() if text.startswith(question) else text
+                add_faq(question, answer)
+        elif any(name in classes for name in STEP_CONTAINER_CLASSES) and tree.find(element, ('li', 'div')) is None:
+            # Only leaf step containers; list items inside bigger ones are taken individually
+            add_step(tree.text(element))
+
+    return {
+        'title': title,
+        'content': tree.text(main),
+        'faq_items': faq_items,
+        'troubleshooting': steps
+    }
@@ -0,0 +1,276 @@
+import re
+import math
+import base64
+import heapq
+import hashlib
+import itertools
+import logging
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+from typing import List, Dict, Any, Optional, Callable, Iterable, Tuple, Set
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that never change page content
+TRACKING_PARAMS = {'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'cid', 'gclid', 'fbclid'}
+
+_HREF = re.compile(r'''<a\s[^>]*?href\s*=\s*["']([^"'#][^"']*)["']''', re.IGNORECASE)
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """Canonical form of a URL for de-duplication, or None if it is not crawlable
+
+    Resolves relative links against base, lowercases scheme and host, drops
+    default ports, fragments, tracking parameters and trailing slashes, and
+    sorts the query string.
+    """
+    if base:
+        url = urljoin(base, url)
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https') or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    if parts.port and not ((scheme == 'http' and parts.port == 80) or (scheme == 'https' and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r'/{2,}', '/', parts.path or '/')
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                             if k.lower() not in TRACKING_PARAMS))
+    return urlunsplit((scheme, host, path, query, ''))
+
+def extract_links(base_url: str, html) -> List[str]:
+    """Absolute, normalized link targets in an HTML page (in document order, de-duplicated)"""
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', errors='ignore')
+    links = (normalize_url(href, base_url) for href in _HREF.findall(html))
+    return list(dict.fromkeys(link for link in links if link))
+
+class BloomFilter:
+    """Fixed-memory probabilistic set for very large crawls (false positives, no false negatives)"""
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: h1 + i * h2 over one 128-bit digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str) -> bool:
+        """Add item; returns False if it was (probably) already present"""
+        added = False
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self._bits[byte] & (1 << bit):
+                self._bits[byte] |= 1 << bit
+                added = True
+        if added:
+            self._count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[p // 8] & (1 << (p % 8)) for p in self._positions(item))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            'type': 'bloom',
+            'capacity': self.capacity,
+            'error_rate': self.error_rate,
+            'count': self._count,
+            'bits': base64.b64encode(bytes(self._bits)).decode('ascii')
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "BloomFilter":
+        bloom = cls(state['capacity'], state['error_rate'])
+        bits = base64.b64decode(state['bits'])
+        if len(bits) != len(bloom._bits):
+            raise ValueError("Bloom filter state does not match its capacity and error rate")
+        bloom._bits = bytearray(bits)
+        bloom._count = state['count']
+        return bloom
+
+class SeenSet:
+    """Exact seen-URL set with the same interface as BloomFilter"""
+
+    def __init__(self):
+        self._items: Set[str] = set()
+
+    def add(self, item: str) -> bool:
+        if item in self._items:
+            return False
+        self._items.add(item)
+        return True
+
+    def __contains__(self, item: str) -> bool:
+        return item in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def to_state(self) -> Dict[str, Any]:
+        return {'type': 'set', 'items': sorted(self._items)}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "SeenSet":
+        seen = cls()
+        seen._items = set(state['items'])
+        return seen
+
+class CrawlFrontier:
+    """URL frontier: normalized URLs, O(1) seen tracking, depth limits and priority order
+
+    URLs are normalized before the seen check, so one page is only queued
+    once however it is spelled. The queue is a heap ordered by
+    (priority, depth, arrival): with the default priority (0) that is a
+    breadth-first crawl; pass priority_fn(url, depth) to prefer some URLs.
+    `allowed_hosts` (and an optional url_filter) keep the crawl in scope.
+    With use_bloom=True, seen URLs are tracked in a BloomFilter instead of
+    an exact set, trading a small false-positive (skip) rate for fixed memory.
+    """
+
+    def __init__(self, max_depth: int = 1, allowed_hosts: Optional[Iterable[str]] = None,
+                 url_filter: Optional[Callable[[str], bool]] = None,
+                 priority_fn: Optional[Callable[[str, int], float]] = None,
+                 use_bloom: bool = False, bloom_capacity: int = 1_000_000):
+        self.max_depth = max_depth
+        self.allowed_hosts = {host.lower() for host in allowed_hosts} if allowed_hosts else None
+        self.url_filter = url_filter
+        self.priority_fn = priority_fn
+        self.seen = BloomFilter(bloom_capacity) if use_bloom else SeenSet()
+
+        self._heap: List[Tuple[float, int, int, str]] = []
+        self._sequence = itertools.count()
+
+        # Counters
+        self.enqueued = 0
+        self.popped = 0
+        self.duplicates_avoided = 0
+        self.out_of_scope = 0
+        self.too_deep = 0
+        self.invalid = 0
+        self.depth_counts: Dict[int, int] = {}
+
+    def add(self, url: str, depth: int = 0, base: Optional[str] = None) -> bool:
+        """Queue a URL if it is valid, in scope, within depth and not seen; returns True if queued"""
+        normalized = normalize_url(url, base)
+        if normalized is None:
+            self.invalid += 1
+            return False
+        if depth > self.max_depth:
+            self.too_deep += 1
+            return False
+        if self.allowed_hosts and urlsplit(normalized).hostname not in self.allowed_hosts:
+            self.out_of_scope += 1
+            return False
+        if self.url_filter and not self.url_filter(normalized):
+            self.out_of_scope += 1
+            return False
+        if not self.seen.add(normalized):
+            self.duplicates_avoided += 1
+            return False
+
+        priority = self.priority_fn(normalized, depth) if self.priority_fn else 0
+        heapq.heappush(self._heap, (priority, depth, next(self._sequence), normalized))
+        self.enqueued += 1
+        self.depth_counts[depth] = self.depth_counts.get(depth, 0) + 1
+        return True
+
+    def add_many(self, urls: Iterable[str], depth: int, base: Optional[str] = None) -> int:
+        """Queue several URLs at one depth; returns how many were new"""
+        return sum(1 for url in urls if self.add(url, depth, base))
+
+    def pop(self) -> Tuple[str, int]:
+        """Next (url, depth) to crawl"""
+        _, depth, _, url = heapq.heappop(self._heap)
+        self.popped += 1
+        return url, depth
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __bool__(self) -> bool:
+        return bool(self._heap)
+
+    def to_state(self, pending: Iterable[Tuple[str, int]] = ()) -> Dict[str, Any]:
+        """JSON-serializable snapshot: queue, seen URLs and counters
+
+        `pending` (url, depth) pairs were popped but not finished (e.g. pages
+        in flight); they are put back in the queue so a resumed crawl
+        fetches them again. url_filter and priority_fn are not saved.
+        """
+        pending = list(pending)
+        queue = [list(entry) for entry in self._heap]
+        for url, depth in pending:
+            priority = self.priority_fn(url, depth) if self.priority_fn else 0
+            queue.append([priority, depth, -1, url])
+        return {
+            'max_depth': self.max_depth,
+            'allowed_hosts': sorted(self.allowed_hosts) if self.allowed_hosts else None,
+            'queue': queue,
+            'sequence': next(self._sequence),
+            'seen': self.seen.to_state(),
+            'counters': {
+                'enqueued': self.enqueued,
+                'popped': self.popped - len(pending),
+                'duplicates_avoided': self.duplicates_avoided,
+                'out_of_scope': self.out_of_scope,
+                'too_deep': self.too_deep,
+                'invalid': self.invalid,
+                'depth_counts': {str(depth): count for depth, count in self.depth_counts.items()}
+            }
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], url_filter: Optional[Callable[[str], bool]] = None,
+                   priority_fn: Optional[Callable[[str, int], float]] = None) -> "CrawlFrontier":
+        """Rebuild a frontier saved with to_state()"""
+        frontier = cls(max_depth=state['max_depth'], allowed_hosts=state['allowed_hosts'],
+                       url_filter=url_filter, priority_fn=priority_fn)
+        seen = state['seen']
+        frontier.seen = BloomFilter.from_state(seen) if seen['type'] == 'bloom' else SeenSet.from_state(seen)
+
+        frontier._heap = [tuple(entry) for entry in state['queue']]
+        heapq.heapify(frontier._heap)
+        frontier._sequence = itertools.count(state['sequence'])
+
+        counters = state['counters']
+        frontier.enqueued = counters['enqueued']
+        frontier.popped = counters['popped']
+        frontier.duplicates_avoided = counters['duplicates_avoided']
+        frontier.out_of_scope = counters['out_of_scope']
+        frontier.too_deep = counters['too_deep']
+        frontier.invalid = counters['invalid']
+        frontier.depth_counts = {int(depth): count for depth, count in counters['depth_counts'].items()}
+        return frontier
+
+    def stats(self) -> Dict[str, Any]:
+        """Get frontier counters"""
+        return {
+            'queued': len(self._heap),
+            'enqueued': self.enqueued,
+            'popped': self.popped,
+            'seen': len(self.seen),
+            'duplicates_avoided': self.duplicates_avoided,
+            'out_of_scope': self.out_of_scope,
+            'too_deep': self.too_deep,
+            'invalid': self.invalid,
+            'by_depth': dict(sorted(self.depth_counts.items())),
+            'seen_store': 'bloom' if isinstance(self.seen, BloomFilter) else 'set'
+        }
@@ -0,0 +1,203 @@
+import os
+import sys
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional, Iterator, Tuple, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+class CachedPage(NamedTuple):
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+    record: Optional[Dict[str, Any]]
+
+class HTTPCache:
+    """Recrawl cache: validators, compressed raw HTML and the extracted record per URL (SQLite)
+
+    Scrapers send conditional requests (If-None-Match / If-Modified-Since)
+    built from the stored ETag and Last-Modified. A 304, or a 200 whose
+    body hashes the same as the stored copy, means the page is unchanged:
+    the stored extracted record is reused without parsing, and its chunk
+    ids (content hashes) match what is indexed, so nothing is re-embedded.
+
+    The raw HTML is kept zlib-compressed so extraction can be re-run
+    offline over the whole cache (see reextract()).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL keeps the per-page commits of a crawl cheap
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_hash TEXT NOT NULL, "
+            "html BLOB NOT NULL, record TEXT, fetched_at REAL NOT NULL, checked_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.not_modified = 0
+        self.unchanged = 0
+        self.stored = 0
+        self.bytes_stored = 0
+        self.bytes_compressed = 0
+
+    @staticmethod
+    def content_hash(body: bytes) -> str:
+        return hashlib.sha256(body).hexdigest()
+
+    def lookup(self, url: str) -> Optional[CachedPage]:
+        """Get the cached validators and extracted record for a URL"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, etag, last_modified, content_hash, record FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return CachedPage(row[0], row[1], row[2], row[3], json.loads(row[4]) if row[4] else None)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Request headers that let the origin answer 304 Not Modified"""
+        cached = self.lookup(url)
+        headers = {}
+        if cached and cached.record is not None:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+        return headers
+
+    def get_html(self, url: str) -> Optional[bytes]:
+        """Get the stored raw HTML for a URL"""
+        with self._lock:
+            row = self._conn.execute("SELECT html FROM pages WHERE url = ?", (url,)).fetchone()
+        return zlib.decompress(row[0]) if row else None
+
+    def store(self, url: str, headers, body: bytes, record: Optional[Dict[str, Any]] = None,
+              html: Optional[bytes] = None):
+        """Store a 200 response's validators and body hash, the page HTML (compressed) and its record
+
+        html defaults to body; pass it separately when the page was rendered
+        (the validators and hash still describe the origin response).
+        """
+        html = body if html is None else html
+        compressed = zlib.compress(html, 6)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, content_hash, html, record, fetched_at, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, headers.get('ETag'), headers.get('Last-Modified'), self.content_hash(body),
+                 compressed, json.dumps(record, ensure_ascii=False) if record is not None else None, now, now)
+            )
+            self._conn.commit()
+        self.stored += 1
+        self.bytes_stored += len(html)
+        self.bytes_compressed += len(compressed)
+
+    def reuse(self, url: str, status_code: int, body: bytes = b'') -> Optional[Dict[str, Any]]:
+        """The stored record if a response shows the page is unchanged (304, or an identical 200 body), else None"""
+        cached = self.lookup(url)
+        if cached is None or cached.record is None:
+            return None
+        if status_code == 304:
+            self.not_modified += 1
+        elif 200 <= status_code < 300 and cached.content_hash == self.content_hash(body):
+            self.unchanged += 1
+        else:
+            return None
+
+        with self._lock:
+            self._conn.execute("UPDATE pages SET checked_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+        return cached.record
+
+    def update_record(self, url: str, record: Dict[str, Any]):
+        """Replace the extracted record for a URL (after offline re-extraction)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET record = ? WHERE url = ?", (json.dumps(record, ensure_ascii=False), url)
+            )
+            self._conn.commit()
+
+    def iter_html(self) -> Iterator[Tuple[str, bytes]]:
+        """Yield (url, raw HTML) for every cached page"""
+        with self._lock:
+            urls = [row[0] for row in self._conn.execute("SELECT url FROM pages ORDER BY url")]
+        for url in urls:
+            html = self.get_html(url)
+            if html is not None:
+                yield url, html
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache size and revalidation counters"""
+        return {
+            'path': self.path,
+            'pages': len(self),
+            'not_modified': self.not_modified,
+            'unchanged': self.unchanged,
+            'stored': self.stored,
+            'compression_ratio': round(self.bytes_compressed / self.bytes_stored, 3) if self.bytes_stored else None
+        }
+
+def reextract(cache: HTTPCache, extractor, writer=None) -> int:
+    """Re-run extraction over every cached page without touching the network
+
+    Updates each stored record (so later 304s reuse the new extraction)
+    and streams pages with content to writer. Returns the pages written.
+    """
+    written = 0
+    for url, html in cache.iter_html():
+        try:
+            page = extractor.parse_page(url, html)
+        except Exception as e:
+            logger.error(f"Error re-extracting {url}: {e}")
+            continue
+        cache.update_record(url, page)
+        if page['content'] and writer:
+            writer.write(page)
+            written += 1
+    logger.info(f"Re-extracted {len(cache)} cached pages, wrote {written}")
+    return written
+
+def main():
+    """Rebuild the corpus from cached HTML with the current extraction code"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Re-extract the corpus from the HTTP cache (offline)")
+    parser.add_argument('--cache', default="../data/http_cache.sqlite3")
+    parser.add_argument('--output', default="../data/apple_support_data.jsonl")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.cache):
+        print(f"Error: no HTTP cache at {args.cache}; crawl with the cache enabled first")
+        return
+
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+    from simple_scraper import SimpleAppleScraper
+    from app.scrapers.corpus import CorpusWriter
+
+    cache = HTTPCache(args.cache)
+    with CorpusWriter(args.output) as writer:
+        reextract(cache, SimpleAppleScraper(), writer)
+    print(f"Re-extracted {len(cache)} cached pages; saved {writer.count} to {writer.path}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,8 +1,15 @@
 import google.generativeai as genai
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, AsyncIterator
 from app.core.config import settings
 from app.services.vector_store import vector_store
 from app.services.guardrails import GuardrailsService
+from app.services.response_cache import SemanticResponseCache, source_key
+from app.services.embedding_cache import normalize_query
+from app.services.single_flight import SingleFlight
+from app.services.llm_client import LLMCallWrapper, CircuitBreaker, CircuitOpenError
+from app.services.quota_scheduler import quota_scheduler
+from app.services.sync_bridge import run_sync
+import hashlib
 import json
 import logging
 import time
@@ -16,6 +23,30 @@ class AIAgentService:
         self.model = genai.GenerativeModel(settings.gemini_model)
         self.guardrails = GuardrailsService()
         
+        # Every Gemini call goes through retries with backoff and a shared circuit breaker
+        self.llm = LLMCallWrapper(
+            max_retries=settings.llm_max_retries,
+            backoff_base=settings.llm_backoff_base_seconds,
+            backoff_max=settings.llm_backoff_max_seconds,
+            breaker=CircuitBreaker(
+                failure_threshold=settings.llm_circuit_failure_threshold,
+                reset_timeout=settings.llm_circuit_reset_seconds
+            ),
+            scheduler=quota_scheduler,
+            quota_kind='generate'
+        )
+        
+        # Near-duplicate questions with the same retrieved sources reuse a cached answer
+        self.response_cache = SemanticResponseCache(
+            similarity_threshold=settings.response_cache_threshold,
+            max_entries=settings.response_cache_max_entries,
+            max_bytes=settings.response_cache_max_bytes,
+            ttl_seconds=settings.response_cache_ttl_seconds
+        ) if settings.response_cache_enabled else None
+        
+        # Concurrent identical questions share one retrieval + generation
+        self.single_flight = SingleFlight() if settings.request_coalescing_enabled else None
+        
         # System prompt for the AI agent
         self.system_prompt = """You are an Apple Support AI Agent, designed to help users with questions about Apple products and services. 
 
@@ -40,96 +71,286 @@ Available tools:
 Remember: You are not a replacement for official Apple Support, but a helpful assistant to guide users to the right information."""
     
     def generate_response(self, user_message: str, conversation_history: List[Dict] = None, context: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Generate a response using RAG"""
+        """Generate a response using RAG (blocking wrapper over the async pipeline)"""
+        return run_sync(self._agenerate_response(user_message, conversation_history, context))
+    
+    async def agenerate_response(self, user_message: str, conversation_history: List[Dict] = None, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Generate a response using RAG without blocking the event loop
+        
+        Concurrent identical requests (same normalized message and prior
+        turns) are coalesced into a single computation.
+        """
+        if not self.single_flight:
+            return await self._agenerate_response(user_message, conversation_history, context)
+        
+        response_data = await self.single_flight.do(
+            self._coalescing_key(user_message, conversation_history),
+            lambda: self._agenerate_response(user_message, conversation_history, context)
+        )
+        return dict(response_data)
+    
+    def _coalescing_key(self, user_message: str, conversation_history: List[Dict] = None) -> str:
+        """Key identifying requests that must produce the same answer"""
+        key = normalize_query(user_message)
+        
+        # The chat route includes the current message as the last history entry
+        prior_turns = [
+            (msg['role'], msg['content']) for msg in (conversation_history or [])[:-1]
+        ]
+        if prior_turns:
+            digest = hashlib.sha1(json.dumps(prior_turns).encode('utf-8')).hexdigest()
+            key = f"{key}|{digest}"
+        
+        return key
+    
+    async def _agenerate_response(self, user_message: str, conversation_history: List[Dict] = None, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Run the async RAG pipeline for one request"""
         try:
             # Check guardrails first
             guardrail_check = self.guardrails.check_message(user_message)
             if guardrail_check['flagged']:
-                return {
-                    'message': guardrail_check['response'],
-                    'sources': [],
-                    'confidence': 0.0,
-                    'guardrail_triggered': True,
-                    'guardrail_type': guardrail_check['type']
-                }
+                return self._guardrail_response(guardrail_check)
             
             # Search for relevant information
-            try:
-                search_results = vector_store.search(user_message, k=5)
-                # Prepare context from search results
-                context_text = self._prepare_context(search_results)
-            except Exception as search_error:
-                logger.warning(f"Vector search failed: {search_error}")
-                search_results = []
-                context_text = "No specific information found in the knowledge base."
+            search_results, context_text = await self._aretrieve(user_message)
+            
+            # Serve near-duplicate first-turn questions from the semantic cache
+            cache_entry = None
+            if self._is_cacheable(conversation_history, search_results):
+                cache_entry = await self._aget_cache_entry(user_message, search_results)
+            cached_response = self._lookup_cached_response(cache_entry)
+            if cached_response:
+                return cached_response
             
-            # Prepare conversation history
             messages = self._prepare_messages(user_message, conversation_history, context_text)
             
-            # Generate response using Gemini with better error handling
             try:
-                response = self.model.generate_content(
-                    messages,
-                    generation_config=genai.types.GenerationConfig(
-                        temperature=0.7,
-                        max_output_tokens=1000,
-                    )
-                )
-                
-                # Process response
+                response = await self.llm.acall(self.model.generate_content_async, messages, generation_config=self._generation_config())
                 assistant_message = response.text
-                    
             except Exception as gemini_error:
-                error_str = str(gemini_error)
-                logger.error(f"Gemini API error: {error_str}")
-                
-                # Handle quota exceeded error
-                if "429" in error_str or "quota" in error_str.lower():
-                    return {
-                        'message': "I'm currently experiencing high demand. Please try again in a few minutes, or contact Apple Support directly for immediate assistance.",
-                        'sources': self._format_sources(search_results),
-                        'confidence': 0.3,
-                        'error': 'quota_exceeded',
-                        'fallback_response': True
-                    }
-                else:
-                    # For other Gemini errors, provide a helpful fallback
-                    return {
-                        'message': "I'm having trouble processing your request right now. Here's what I found in our knowledge base that might help:",
-                        'sources': self._format_sources(search_results),
-                        'confidence': 0.2,
-                        'error': 'gemini_error',
-                        'fallback_response': True
-                    }
+                return self._generation_error_response(gemini_error, search_results)
             
-            # Check if response contains tool usage (simplified for Gemini)
-            if self._should_use_tools(user_message):
-                tool_response = self._handle_tool_usage(assistant_message, user_message, conversation_history)
-                if tool_response:
-                    return tool_response
-            
-            # Format sources
-            sources = self._format_sources(search_results)
-            
-            # Calculate confidence based on search results
-            confidence = self._calculate_confidence(search_results)
-            
-            return {
-                'message': assistant_message,
-                'sources': sources,
-                'confidence': confidence,
-                'guardrail_triggered': False
-            }
+            return self._complete_response(assistant_message, user_message, conversation_history, search_results, cache_entry)
             
         except Exception as e:
             logger.error(f"Error generating response: {e}")
+            return self._technical_difficulties_response(e)
+    
+    def _generation_config(self, max_output_tokens: int = 1000):
+        """Gemini generation settings shared by the chat paths"""
+        return genai.types.GenerationConfig(
+            temperature=0.7,
+            max_output_tokens=max_output_tokens,
+        )
+    
+    def _generation_error_response(self, gemini_error: Exception, search_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the fallback reply for a failed Gemini call"""
+        error_str = str(gemini_error)
+        logger.error(f"Gemini API error: {error_str}")
+        
+        # Gemini is unhealthy and the circuit breaker is failing fast
+        if isinstance(gemini_error, CircuitOpenError):
             return {
-                'message': "I apologize, but I'm experiencing technical difficulties. Please try again or contact Apple Support directly for assistance.",
-                'sources': [],
-                'confidence': 0.0,
-                'error': str(e)
+                'message': "I'm currently experiencing high demand. Please try again in a few minutes, or contact Apple Support directly for immediate assistance.",
+                'sources': self._format_sources(search_results),
+                'confidence': 0.3,
+                'error': 'circuit_open',
+                'fallback_response': True
+            }
+        
+        # Handle quota exceeded error (still failing after retries)
+        if "429" in error_str or "quota" in error_str.lower():
+            return {
+                'message': "I'm currently experiencing high demand. Please try again in a few minutes, or contact Apple Support directly for immediate assistance.",
+                'sources': self._format_sources(search_results),
+                'confidence': 0.3,
+                'error': 'quota_exceeded',
+                'fallback_response': True
+            }
+        else:
+            # For other Gemini errors, provide a helpful fallback
+            return {
+                'message': "I'm having trouble processing your request right now. Here's what I found in our knowledge base that might help:",
+                'sources': self._format_sources(search_results),
+                'confidence': 0.2,
+                'error': 'gemini_error',
+                'fallback_response': True
             }
     
+    def _complete_response(self, assistant_message: str, user_message: str, conversation_history: List[Dict],
+                           search_results: List[Dict[str, Any]], cache_entry) -> Dict[str, Any]:
+        """Turn the generated text into the response dict (tool handling, sources, confidence, caching)"""
+        # Check if response contains tool usage (simplified for Gemini)
+        if self._should_use_tools(user_message):
+            tool_response = self._handle_tool_usage(assistant_message, user_message, conversation_history)
+            if tool_response:
+                return tool_response
+        
+        # Format sources
+        sources = self._format_sources(search_results)
+        
+        # Calculate confidence based on search results
+        confidence = self._calculate_confidence(search_results)
+        
+        response_data = {
+            'message': assistant_message,
+            'sources': sources,
+            'confidence': confidence,
+            'guardrail_triggered': False
+        }
+        
+        self._store_cached_response(cache_entry, response_data)
+        
+        return response_data
+    
+    def _technical_difficulties_response(self, error: Exception) -> Dict[str, Any]:
+        """Build the reply for an unexpected failure"""
+        return {
+            'message': "I apologize, but I'm experiencing technical difficulties. Please try again or contact Apple Support directly for assistance.",
+            'sources': [],
+            'confidence': 0.0,
+            'error': str(error)
+        }
+    
+    async def astream_response(self, user_message: str, conversation_history: List[Dict] = None, context: Dict[str, Any] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Generate a RAG response as a stream of events
+        
+        Yields a 'sources' event (sources + confidence) as soon as retrieval
+        finishes, then 'token' events as Gemini produces text, and finally a
+        'done' event carrying the complete response dict.
+        """
+        guardrail_check = self.guardrails.check_message(user_message)
+        if guardrail_check['flagged']:
+            for event in self._stream_complete_response(self._guardrail_response(guardrail_check)):
+                yield event
+            return
+        
+        # Tool handling needs the whole answer, so use the non-streaming path
+        if self._should_use_tools(user_message):
+            response_data = await self.agenerate_response(user_message, conversation_history, context)
+            for event in self._stream_complete_response(response_data):
+                yield event
+            return
+        
+        search_results, context_text = await self._aretrieve(user_message)
+        
+        cache_entry = None
+        if self._is_cacheable(conversation_history, search_results):
+            cache_entry = await self._aget_cache_entry(user_message, search_results)
+        cached_response = self._lookup_cached_response(cache_entry)
+        if cached_response:
+            for event in self._stream_complete_response(cached_response):
+                yield event
+            return
+        
+        sources = self._format_sources(search_results)
+        confidence = self._calculate_confidence(search_results)
+        yield {'event': 'sources', 'sources': sources, 'confidence': confidence}
+        
+        messages = self._prepare_messages(user_message, conversation_history, context_text)
+        
+        chunks = []
+        response = None
+        try:
+            response = await self.llm.acall(
+                self.model.generate_content_async,
+                messages,
+                generation_config=self._generation_config(),
+                stream=True
+            )
+            async for chunk in response:
+                text = chunk.text
+                if text:
+                    chunks.append(text)
+                    yield {'event': 'token', 'text': text}
+                    
+        except Exception as gemini_error:
+            logger.error(f"Gemini streaming error: {gemini_error}")
+            if response is not None:
+                # The stream opened (and was counted as a success) but failed while being read
+                self.llm.record_error(gemini_error)
+            fallback = self._generation_error_response(gemini_error, search_results)
+            if chunks:
+                # Keep the partial answer the user has already seen
+                fallback['message'] = ''.join(chunks)
+            else:
+                yield {'event': 'token', 'text': fallback['message']}
+            yield {'event': 'done', 'response': fallback}
+            return
+        
+        response_data = {
+            'message': ''.join(chunks),
+            'sources': sources,
+            'confidence': confidence,
+            'guardrail_triggered': False
+        }
+        
+        self._store_cached_response(cache_entry, response_data)
+        
+        yield {'event': 'done', 'response': response_data}
+    
+    def _stream_complete_response(self, response_data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Emit an already complete response as stream events"""
+        yield {
+            'event': 'sources',
+            'sources': response_data.get('sources', []),
+            'confidence': response_data.get('confidence', 0.0)
+        }
+        yield {'event': 'token', 'text': response_data['message']}
+        yield {'event': 'done', 'response': response_data}
+    
+    def _guardrail_response(self, guardrail_check: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the reply for a message flagged by the guardrails"""
+        return {
+            'message': guardrail_check['response'],
+            'sources': [],
+            'confidence': 0.0,
+            'guardrail_triggered': True,
+            'guardrail_type': guardrail_check['type']
+        }
+    
+    async def _aretrieve(self, user_message: str, k: int = 5):
+        """Search the knowledge base and build the prompt context without blocking"""
+        try:
+            search_results = await vector_store.asearch(user_message, k=k)
+        except Exception as search_error:
+            logger.warning(f"Vector search failed: {search_error}")
+            search_results = []
+        
+        return search_results, self._prepare_context(search_results)
+    
+    def _lookup_cached_response(self, cache_entry) -> Optional[Dict[str, Any]]:
+        """Get a cached answer for a cacheable request, if any"""
+        if not cache_entry:
+            return None
+        
+        cached_response = self.response_cache.lookup(*cache_entry)
+        if cached_response:
+            cached_response['cached'] = True
+        return cached_response
+    
+    def _store_cached_response(self, cache_entry, response_data: Dict[str, Any]):
+        """Cache a generated answer under the entry it was looked up with"""
+        if cache_entry:
+            embedding, sources, generation = cache_entry
+            self.response_cache.store(embedding, sources, response_data, generation=generation)
+    
+    def _is_cacheable(self, conversation_history: List[Dict], search_results: List[Dict[str, Any]]) -> bool:
+        """Whether a request's answer may be served from / stored in the response cache"""
+        if not self.response_cache or not search_results:
+            return False
+        
+        # Answers that depend on earlier turns are not reusable for other users
+        return not (conversation_history and any(msg['role'] == 'assistant' for msg in conversation_history))
+    
+    async def _aget_cache_entry(self, user_message: str, search_results: List[Dict[str, Any]]):
+        """Get the (query embedding, source key, index generation) entry for the response cache without blocking"""
+        try:
+            return await vector_store.aembed_query(user_message), source_key(search_results), vector_store.generation()
+        except Exception as e:
+            logger.warning(f"Response cache unavailable: {e}")
+            return None
+    
     def _prepare_context(self, search_results: List[Dict[str, Any]]) -> str:
         """Prepare context from search results"""
         if not search_results:
@@ -258,11 +479,15 @@ You can also call Apple Support directly at 1-800-275-2273 for immediate assista
             return None
     
     def get_product_specific_response(self, user_message: str, product: str, conversation_history: List[Dict] = None) -> Dict[str, Any]:
-        """Generate a product-specific response"""
+        """Generate a product-specific response (blocking wrapper)"""
+        return run_sync(self.aget_product_specific_response(user_message, product, conversation_history))
+    
+    async def aget_product_specific_response(self, user_message: str, product: str, conversation_history: List[Dict] = None) -> Dict[str, Any]:
+        """Generate a product-specific response without blocking the event loop"""
         try:
             # Add product context to the search
             product_query = f"{product} {user_message}"
-            search_results = vector_store.search(product_query, k=5)
+            search_results = await vector_store.asearch(product_query, k=5)
             
             # Filter results for the specific product
             product_results = [
@@ -284,13 +509,12 @@ You can also call Apple Support directly at 1-800-275-2273 for immediate assista
             messages = [system_content, f"User: {user_message}", "Assistant:"]
             
             # Generate response
-            response = self.model.generate_content(
-                messages,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=1000,
-                )
-            )
+            try:
+                response = await self.llm.acall(self.model.generate_content_async, messages, generation_config=self._generation_config())
+            except Exception as gemini_error:
+                fallback = self._generation_error_response(gemini_error, product_results)
+                fallback['product'] = product
+                return fallback
             
             # Format sources
             sources = self._format_sources(product_results)
@@ -315,7 +539,11 @@ You can also call Apple Support directly at 1-800-275-2273 for immediate assista
             }
     
     def get_voice_response(self, user_message: str, conversation_history: List[Dict] = None) -> Dict[str, Any]:
-        """Generate a response optimized for voice interaction"""
+        """Generate a response optimized for voice interaction (blocking wrapper)"""
+        return run_sync(self.aget_voice_response(user_message, conversation_history))
+    
+    async def aget_voice_response(self, user_message: str, conversation_history: List[Dict] = None) -> Dict[str, Any]:
+        """Generate a response optimized for voice interaction without blocking the event loop"""
         try:
             # Check guardrails
             guardrail_check = self.guardrails.check_message(user_message)
@@ -329,7 +557,7 @@ You can also call Apple Support directly at 1-800-275-2273 for immediate assista
                 }
             
             # Search for relevant information
-            search_results = vector_store.search(user_message, k=3)  # Fewer results for voice
+            search_results = await vector_store.asearch(user_message, k=3)  # Fewer results for voice
             context_text = self._prepare_context(search_results)
             
             # Prepare voice-optimized system prompt
@@ -346,14 +574,13 @@ For voice interactions:
             
             messages = [voice_system_prompt, f"User: {user_message}", "Assistant:"]
             
-            # Generate response
-            response = self.model.generate_content(
-                messages,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=500,  # Shorter for voice
-                )
-            )
+            # Generate response (shorter for voice)
+            try:
+                response = await self.llm.acall(self.model.generate_content_async, messages, generation_config=self._generation_config(max_output_tokens=500))
+            except Exception as gemini_error:
+                fallback = self._generation_error_response(gemini_error, search_results)
+                fallback['voice_optimized'] = True
+                return fallback
             
             sources = self._format_sources(search_results)
             confidence = self._calculate_confidence(search_results)
@@ -0,0 +1,164 @@
+import re
+import zlib
+import hashlib
+import logging
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Set
+
+logger = logging.getLogger(__name__)
+
+# Rolling hash parameters for word shingles
+_BASE = 1000003
+_MOD = 1 << 64
+
+_WORD = re.compile(r'\S+')
+
+class BoilerplateDetector:
+    """Corpus-level detector for navigation, footers and other repeated page furniture
+
+    fit() counts, for every word shingle (`shingle_size` consecutive words),
+    how many distinct pages contain it; shingles found on at least
+    `min_page_fraction` of pages (and at least `min_pages` pages) are
+    boilerplate. strip() then cuts every run of words covered by a
+    boilerplate shingle out of the text, keeping its line breaks. Short
+    list items (troubleshooting steps, FAQ answers) are judged as whole
+    blocks the same way.
+
+    Byte-identical pages are counted once, so a page scraped under several
+    URLs is not mistaken for site-wide furniture.
+    """
+
+    def __init__(self, shingle_size: int = 8, min_page_fraction: float = 0.2,
+                 min_pages: int = 3, max_fit_pages: int = 2000):
+        self.shingle_size = shingle_size
+        self.min_page_fraction = min_page_fraction
+        self.min_pages = min_pages
+        self.max_fit_pages = max_fit_pages
+
+        self.boilerplate_shingles: Set[int] = set()
+        self.boilerplate_blocks: Set[str] = set()
+        self.pages_fitted = 0
+
+        # Counters
+        self.chars_seen = 0
+        self.chars_removed = 0
+        self.blocks_removed = 0
+
+    @staticmethod
+    def _block_key(text: str) -> str:
+        return ' '.join(text.lower().split())
+
+    def _shingles(self, words: List[str]) -> Iterable[int]:
+        """64-bit rolling hashes of each window of shingle_size words
+
+        Built from crc32 word hashes rather than hash(), so values are stable
+        across processes (worker processes agree with the parent).
+        """
+        size = self.shingle_size
+        word_hashes = [zlib.crc32(word.lower().encode('utf-8')) for word in words]
+        high = pow(_BASE, size - 1, _MOD)
+        rolling = 0
+        for i, word_hash in enumerate(word_hashes):
+            if i >= size:
+                rolling = (rolling - word_hashes[i - size] * high) % _MOD
+            rolling = (rolling * _BASE + word_hash) % _MOD
+            if i >= size - 1:
+                yield rolling
+
+    def fit(self, pages: Iterable[Dict[str, Any]]) -> "BoilerplateDetector":
+        """Learn boilerplate from scraped pages (a sample of up to max_fit_pages distinct pages)"""
+        shingle_pages: Counter = Counter()
+        block_pages: Counter = Counter()
+        seen_pages: Set[str] = set()
+
+        for page in pages:
+            content = page.get('content', '')
+            page_hash = hashlib.sha1(content.encode('utf-8')).hexdigest()
+            if page_hash in seen_pages:
+                continue
+            seen_pages.add(page_hash)
+
+            shingle_pages.update(set(self._shingles(content.split())))
+            blocks = set(page.get('troubleshooting', []))
+            blocks.update(faq.get('answer', '') for faq in page.get('faq_items', []))
+            block_pages.update({self._block_key(block) for block in blocks if block})
+
+            if len(seen_pages) >= self.max_fit_pages:
+                break
+
+        self.pages_fitted = len(seen_pages)
+        threshold = max(self.min_pages, self.min_page_fraction * self.pages_fitted)
+        self.boilerplate_shingles = {shingle for shingle, count in shingle_pages.items() if count >= threshold}
+        self.boilerplate_blocks = {block for block, count in block_pages.items() if count >= threshold}
+
+        logger.info(f"Boilerplate detector fitted on {self.pages_fitted} pages: "
+                    f"{len(self.boilerplate_shingles)} shingles, {len(self.boilerplate_blocks)} blocks "
+                    f"repeated on >= {threshold:.0f} pages")
+        return self
+
+    def strip(self, text: str) -> str:
+        """Remove boilerplate word runs from page content, keeping the text's own separators
+
+        Each removed run is cut out of the original string; the gap it leaves
+        takes the stronger of the separators around it (a paragraph break
+        beats a space), so newlines the chunk splitter relies on survive.
+        chars_removed counts the removed runs only.
+        """
+        self.chars_seen += len(text)
+        if not self.boilerplate_shingles:
+            return text
+
+        spans = [match.span() for match in _WORD.finditer(text)]
+        words = [text[start:end] for start, end in spans]
+        covered = bytearray(len(words))
+        for i, shingle in enumerate(self._shingles(words)):
+            if shingle in self.boilerplate_shingles:
+                covered[i:i + self.shingle_size] = b'\x01' * self.shingle_size
+
+        parts = []
+        kept_end = None  # end of the last kept word
+        cursor = 0       # start of text not yet copied
+        i = 0
+        while i < len(words):
+            if not covered[i]:
+                kept_end = spans[i][1]
+                i += 1
+                continue
+            run_start = spans[i][0]
+            while i < len(words) and covered[i]:
+                i += 1
+            run_end = spans[i - 1][1]
+            self.chars_removed += run_end - run_start
+
+            if kept_end is None or i == len(words):
+                # Leading or trailing run: drop it with its surrounding whitespace
+                gap = ''
+                parts.append(text[cursor:kept_end if kept_end is not None else 0])
+            else:
+                before, after = text[kept_end:run_start], text[run_end:spans[i][0]]
+                gap = max(before, after, key=lambda g: (g.count('\n'), len(g)))
+                parts.append(text[cursor:kept_end])
+            parts.append(gap)
+            cursor = spans[i][0] if i < len(words) else len(text)
+
+        parts.append(text[cursor:])
+        return ''.join(parts)
+
+    def is_boilerplate_block(self, text: str) -> bool:
+        """Whether a short block (list item, FAQ answer) is repeated site furniture"""
+        if self._block_key(text) in self.boilerplate_blocks:
+            self.blocks_removed += 1
+            return True
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Get fitted model size and how much text has been removed"""
+        return {
+            'pages_fitted': self.pages_fitted,
+            'boilerplate_shingles': len(self.boilerplate_shingles),
+            'boilerplate_blocks': len(self.boilerplate_blocks),
+            'chars_seen': self.chars_seen,
+            'chars_removed': self.chars_removed,
+            'removed_fraction': round(self.chars_removed / self.chars_seen, 4) if self.chars_seen else 0.0,
+            'blocks_removed': self.blocks_removed
+        }
@@ -0,0 +1,109 @@
+import re
+import logging
+from typing import List, Callable
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Sentence ends, plus step markers in flattened list text ("Step 2", "2. Tap")
+# (matches a single whitespace character first, which keeps the scan fast)
+_BOUNDARY = re.compile(r'\s(?=["“(\[]?[A-Z0-9])(?:(?<=[.!?]\s)(?<!\b\d\.\s)(?<!\b\d\d\.\s)|(?=Step \d|\d\d?\.\s[A-Z]))')
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English Gemini text)"""
+    return (len(text) + 3) // 4
+
+def split_sentences(text: str) -> List[str]:
+    """Split text on sentence and step boundaries"""
+    return [sentence.strip() for sentence in _BOUNDARY.split(text) if sentence and not sentence.isspace()]
+
+class TokenBudgetChunker:
+    """Sentence-aware chunker that packs whole sentences up to a token budget
+
+    Sentences (and numbered steps) are packed greedily until adding the
+    next one would exceed `max_tokens`; the next chunk starts with the
+    trailing sentences of the previous one, up to `overlap_tokens`, so
+    overlap is sentence-aligned and never cuts a word. A single sentence
+    longer than the budget is split on word boundaries.
+
+    `length_function` measures tokens; the default is a character-based
+    estimate, and any tokenizer's count function can be plugged in.
+    Implements split_text() so it is a drop-in for the langchain splitters.
+    """
+
+    def __init__(self, max_tokens: int = 256, overlap_tokens: int = 32,
+                 length_function: Callable[[str], int] = estimate_tokens):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.length_function = length_function
+
+    def _split_long(self, sentence: str) -> List[str]:
+        """Break an over-budget sentence into word-aligned pieces"""
+        pieces, current, current_tokens = [], [], 0
+        for word in sentence.split():
+            word_tokens = self.length_function(word + ' ')
+            if current and current_tokens + word_tokens > self.max_tokens:
+                pieces.append(' '.join(current))
+                current, current_tokens = [], 0
+            current.append(word)
+            current_tokens += word_tokens
+        if current:
+            pieces.append(' '.join(current))
+        return pieces
+
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunks of at most max_tokens"""
+        units = []
+        for sentence in split_sentences(text):
+            tokens = self.length_function(sentence)
+            if tokens > self.max_tokens:
+                units.extend((piece, self.length_function(piece)) for piece in self._split_long(sentence))
+            else:
+                units.append((sentence, tokens))
+
+        chunks = []
+        current: List[tuple] = []
+        current_tokens = 0
+        # Sentences in `current` that were carried over as overlap
+        carried = 0
+        for sentence, tokens in units:
+            # +1 for the joining space
+            if current and current_tokens + tokens + 1 > self.max_tokens:
+                chunks.append(' '.join(s for s, _ in current))
+
+                # Carry trailing sentences into the next chunk as overlap
+                overlap, overlap_tokens = [], 0
+                for previous in reversed(current[carried:]):
+                    if overlap_tokens + previous[1] > self.overlap_tokens:
+                        break
+                    overlap.insert(0, previous)
+                    overlap_tokens += previous[1] + 1
+                if overlap_tokens + tokens + 1 > self.max_tokens:
+                    overlap, overlap_tokens = [], 0
+                current, current_tokens, carried = overlap, overlap_tokens, len(overlap)
+
+            current.append((sentence, tokens))
+            current_tokens += tokens + 1
+
+        if len(current) > carried:
+            chunks.append(' '.join(s for s, _ in current))
+        return chunks
+
+def create_text_splitter():
+    """Build the configured chunker ("recursive" characters or "token" budget)"""
+    if settings.chunker == "token":
+        logger.info(f"Using token-budget chunker ({settings.chunk_max_tokens} tokens, "
+                    f"{settings.chunk_overlap_tokens} overlap)")
+        return TokenBudgetChunker(
+            max_tokens=settings.chunk_max_tokens,
+            overlap_tokens=settings.chunk_overlap_tokens
+        )
+
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=200,
+        length_function=len,
+    )
@@ -0,0 +1,185 @@
+import re
+import zlib
+import hashlib
+import logging
+from collections import OrderedDict, defaultdict
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Mersenne prime used for the universal hash family
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Metadata keys merged across duplicates into list-valued "<key>s" fields
+MERGED_KEYS = ('url', 'content_type')
+
+class NearDuplicateFilter:
+    """MinHash / LSH near-duplicate filter for prepared documents
+
+    Each document's word 3-gram shingles are summarised in a MinHash
+    signature of `num_perm` values; LSH banding finds candidate pairs and
+    the estimated Jaccard similarity confirms them against `threshold`.
+    The first document of each cluster is kept as the representative and
+    absorbs its duplicates' metadata (urls, content types, duplicate_count).
+    Documents are only compared within one product, so every chunk keeps
+    the scalar `product` that search_by_product filters on.
+
+    Representatives are held in a buffer of `window` documents before being
+    yielded, so duplicates that arrive while their representative is still
+    buffered are merged. A representative's signature and LSH entries leave
+    with it, so memory stays bounded by the window; a duplicate arriving
+    later starts a new cluster. window=None buffers everything (exact
+    merge, memory grows with the corpus).
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, shingle_size: int = 3,
+                 window: Optional[int] = 1000, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.window = window
+        self.bands, self.rows = self._choose_bands(num_perm, threshold)
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+        # LSH tables: (product, band, band hash) -> representative ids; signatures for verification
+        self._buckets: Dict[Tuple[str, int, bytes], List[str]] = defaultdict(list)
+        self._signatures: Dict[str, np.ndarray] = {}
+
+        # Counters
+        self.documents_seen = 0
+        self.duplicates_merged = 0
+
+    @staticmethod
+    def _choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+        """Pick the band count whose LSH S-curve midpoint (1/b)^(1/r) is closest to threshold"""
+        best = None
+        for bands in range(1, num_perm + 1):
+            if num_perm % bands:
+                continue
+            rows = num_perm // bands
+            error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+            if best is None or error < best[0]:
+                best = (error, bands, rows)
+        return best[1], best[2]
+
+    def _shingles(self, text: str) -> np.ndarray:
+        words = re.findall(r'\w+', text.lower())
+        size = self.shingle_size
+        if len(words) < size:
+            grams = [' '.join(words)]
+        else:
+            grams = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+        return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a text"""
+        shingles = self._shingles(text)
+        hashed = (np.outer(shingles, self._a) + self._b) % _PRIME & _MAX_HASH
+        return hashed.min(axis=0)
+
+    def similarity(self, sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return float(np.mean(sig_a == sig_b))
+
+    def _band_keys(self, sig: np.ndarray, scope: str) -> List[Tuple[str, int, bytes]]:
+        return [(scope, band, sig[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    @staticmethod
+    def _scope(doc: Dict[str, Any]) -> str:
+        # Near-duplicates are only merged within one product
+        return str(doc['metadata'].get('product', ''))
+
+    def _find_representative(self, sig: np.ndarray, scope: str) -> Optional[str]:
+        candidates = []
+        for key in self._band_keys(sig, scope):
+            candidates.extend(self._buckets.get(key, ()))
+        for candidate in dict.fromkeys(candidates):
+            if self.similarity(sig, self._signatures[candidate]) >= self.threshold:
+                return candidate
+        return None
+
+    def _forget(self, doc: Dict[str, Any]):
+        """Drop a representative's signature and LSH entries once it leaves the window"""
+        sig = self._signatures.pop(doc['id'])
+        for key in self._band_keys(sig, self._scope(doc)):
+            bucket = self._buckets[key]
+            bucket.remove(doc['id'])
+            if not bucket:
+                del self._buckets[key]
+
+    @staticmethod
+    def _merge(representative: Dict[str, Any], duplicate: Dict[str, Any]):
+        """Fold a duplicate's metadata into its representative"""
+        metadata = representative['metadata']
+        for key in MERGED_KEYS:
+            values = metadata.setdefault(f"{key}s", [metadata.get(key, '')])
+            value = duplicate['metadata'].get(key, '')
+            if value not in values:
+                values.append(value)
+        metadata['duplicate_count'] = metadata.get('duplicate_count', 1) + 1
+
+    @staticmethod
+    def _finalize(doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Give merged representatives an id that changes when their cluster does"""
+        metadata = doc['metadata']
+        if metadata.get('duplicate_count', 1) > 1:
+            cluster = '\x1f'.join(sorted(str(value) for key in MERGED_KEYS for value in metadata[f"{key}s"]))
+            doc['id'] = f"{doc['id']}+{hashlib.sha1(cluster.encode('utf-8')).hexdigest()[:8]}"
+        return doc
+
+    def iter_filter(self, documents: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield one representative per near-duplicate cluster, in input order"""
+        pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+        for doc in documents:
+            self.documents_seen += 1
+            sig = self.signature(doc['text'])
+            scope = self._scope(doc)
+            representative_id = self._find_representative(sig, scope)
+
+            if representative_id is not None:
+                self._merge(pending[representative_id], doc)
+                self.duplicates_merged += 1
+                continue
+
+            doc = {**doc, 'metadata': dict(doc['metadata'])}
+            self._signatures[doc['id']] = sig
+            for key in self._band_keys(sig, scope):
+                self._buckets[key].append(doc['id'])
+            pending[doc['id']] = doc
+
+            if self.window is not None and len(pending) > self.window:
+                _, oldest = pending.popitem(last=False)
+                self._forget(oldest)
+                yield self._finalize(oldest)
+
+        for doc in pending.values():
+            self._forget(doc)
+            yield self._finalize(doc)
+
+        logger.info(f"Near-duplicate filter: {self.stats()}")
+
+    def filter(self, documents: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Deduplicate a complete document list, merging every duplicate's metadata"""
+        window, self.window = self.window, None
+        try:
+            return list(self.iter_filter(documents))
+        finally:
+            self.window = window
+
+    def stats(self) -> Dict[str, Any]:
+        """Get duplicate counts"""
+        removed = self.duplicates_merged
+        return {
+            'documents_seen': self.documents_seen,
+            'kept': self.documents_seen - removed,
+            'duplicates_merged': self.duplicates_merged,
+            'duplicate_fraction': round(removed / self.documents_seen, 4) if self.documents_seen else 0.0,
+            'bands': self.bands,
+            'rows': self.rows
+        }
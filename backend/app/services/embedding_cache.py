@@ -0,0 +1,227 @@
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from pathlib import Path
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable, Awaitable, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def normalize_query(text: str) -> str:
+    """Normalize a query so trivially different spellings share one cache entry"""
+    text = ' '.join(text.lower().split())
+    return re.sub(r'[\s?!.]+$', '', text)
+
+# Models trained so that a prefix of the embedding is itself a usable embedding
+# (Matryoshka representation learning); only these may be truncated
+MATRYOSHKA_MODELS = frozenset({"text-embedding-004", "gemini-embedding-001"})
+
+def supports_truncation(model: str) -> bool:
+    """Whether a model's vectors stay meaningful when truncated to a prefix"""
+    return model.split('/')[-1] in MATRYOSHKA_MODELS
+
+def fit_dimension(vector, dimension: Optional[int], model: str) -> List[float]:
+    """Return vector at the requested dimension
+
+    Vectors of a Matryoshka model (MATRYOSHKA_MODELS) that are longer
+    than needed are truncated and re-normalized, so every vector that
+    reaches the index or a query has the same width. Any other mismatch
+    raises ValueError: a truncated embedding of another model is not a
+    valid embedding, and would silently degrade retrieval.
+    """
+    vector = np.asarray(vector, dtype=np.float32)
+    if dimension is None or len(vector) == dimension:
+        return vector.tolist()
+    if len(vector) < dimension or not supports_truncation(model):
+        raise ValueError(f"Embedding model {model} returned {len(vector)} dimensions; the index needs "
+                         f"{dimension} (set VECTOR_DIMENSION to match, or use a model that supports truncation: "
+                         f"{', '.join(sorted(MATRYOSHKA_MODELS))})")
+    vector = vector[:dimension]
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+class EmbeddingCache:
+    """Bounded in-memory LRU cache of query embeddings with TTL expiry"""
+
+    def __init__(self, max_size: int = 2048, ttl_seconds: float = 3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        # normalized query -> (stored_at, embedding); ordered oldest to most recently used
+        self._entries: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """Get a cached embedding, or None on a miss"""
+        key = normalize_query(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, embedding = entry
+            if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, text: str, embedding: List[float]):
+        """Store an embedding, evicting the least recently used entries when full"""
+        key = normalize_query(text)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, text: str, compute: Callable[[str], List[float]]) -> List[float]:
+        """Return the cached embedding for text, computing it on a miss"""
+        embedding = self.get(text)
+        if embedding is None:
+            # The normalized form is only the key; the query is embedded as the user wrote it
+            embedding = compute(text)
+            self.put(text, embedding)
+        return embedding
+
+    async def aget_or_compute(self, text: str, compute: Callable[[str], Awaitable[List[float]]]) -> List[float]:
+        """Async variant of get_or_compute for coroutine embedders"""
+        embedding = self.get(text)
+        if embedding is None:
+            embedding = await compute(text)
+            self.put(text, embedding)
+        return embedding
+
+    def clear(self):
+        """Drop all cached embeddings"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+class DocumentEmbeddingStore:
+    """Persistent content-addressed cache of document embeddings (SQLite)
+
+    Vectors are keyed by (embedding model, sha256 of the chunk text), so
+    they survive index resets, backend switches and rebuilds: re-indexing
+    unchanged text is a disk read instead of an embedding API call. Vectors
+    are stored at full width; a smaller requested dimension is served by
+    fit_dimension(), the same step applied to freshly embedded vectors
+    (and the same ValueError for models that cannot be truncated).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, dimension INTEGER NOT NULL, "
+            "vector BLOB NOT NULL, PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get_many(self, model: str, texts: List[str], dimension: Optional[int] = None) -> List[Optional[List[float]]]:
+        """Look up embeddings for texts; misses are None
+
+        Raises ValueError if a stored vector cannot be fitted to dimension.
+        """
+        hashes = [self.text_hash(text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+
+        with self._lock:
+            unique = list(set(hashes))
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch]
+                )
+                for text_hash, blob in rows:
+                    found[text_hash] = np.frombuffer(blob, dtype=np.float32)
+
+        results = []
+        for text_hash in hashes:
+            vector = found.get(text_hash)
+            vector = fit_dimension(vector, dimension, model) if vector is not None else None
+            results.append(vector)
+
+        hits = sum(1 for vector in results if vector is not None)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def put_many(self, model: str, texts: List[str], vectors: List[List[float]]):
+        """Store embeddings for texts"""
+        rows = []
+        for text, vector in zip(texts, vectors):
+            array = np.asarray(vector, dtype=np.float32)
+            rows.append((model, self.text_hash(text), len(array), array.tobytes()))
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, dimension, vector) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+        self.writes += len(rows)
+
+    def count(self, model: Optional[str] = None) -> int:
+        """Number of stored embeddings, optionally for one model"""
+        with self._lock:
+            if model is None:
+                return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", (model,)).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get store size and lookup counters"""
+        total = self.hits + self.misses
+        return {
+            'path': self.path,
+            'stored': self.count(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            'writes': self.writes
+        }
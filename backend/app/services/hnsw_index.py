@@ -0,0 +1,266 @@
+import os
+import json
+import math
+import heapq
+import random
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from app.services.local_index import LocalVectorIndex
+
+logger = logging.getLogger(__name__)
+
+class HNSWIndex(LocalVectorIndex):
+    """Approximate nearest-neighbour index (HNSW graph) over the local embedding matrix
+
+    Vectors and metadata live in the same contiguous matrix/table as
+    LocalVectorIndex; the graph only stores neighbour row numbers per layer.
+    Filtered searches fall back to the exact vectorized scan over the
+    matching rows, which is cheap for selective filters such as product.
+    """
+
+    def __init__(self, dimension: int, metric: str = "cosine", m: int = 16,
+                 ef_construction: int = 200, ef_search: int = 64, seed: int = 42):
+        super().__init__(dimension, metric)
+
+        # Build/search parameters
+        self.m = m
+        self.max_m0 = 2 * m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._level_mult = 1 / math.log(max(m, 2))
+        self._rng = random.Random(seed)
+
+        # Graph: row -> layer -> neighbour rows
+        self._links: List[List[List[int]]] = []
+        self._entry_point: Optional[int] = None
+        self._max_level = -1
+
+        # Tombstoned rows; compacted once they make up a large share of the index
+        self._deleted = set()
+
+    def __len__(self) -> int:
+        return self._size - len(self._deleted)
+
+    def _distances(self, query: np.ndarray, rows: List[int]) -> np.ndarray:
+        """Distance from query to the given rows (negated similarity, lower is closer)"""
+        return -(self._vectors[rows] @ query)
+
+    def _search_layer(self, query: np.ndarray, entry_points: List[int], ef: int, level: int) -> List[Tuple[float, int]]:
+        """Greedy beam search within one layer; returns (distance, row) pairs, closest first"""
+        visited = set(entry_points)
+        distances = self._distances(query, entry_points).tolist()
+
+        candidates = list(zip(distances, entry_points))
+        heapq.heapify(candidates)
+        results = [(-d, row) for d, row in candidates]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            distance, row = heapq.heappop(candidates)
+            if distance > -results[0][0]:
+                break
+
+            neighbors = [n for n in self._links[row][level] if n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+
+            for neighbor_distance, neighbor in zip(self._distances(query, neighbors).tolist(), neighbors):
+                if len(results) < ef or neighbor_distance < -results[0][0]:
+                    heapq.heappush(candidates, (neighbor_distance, neighbor))
+                    heapq.heappush(results, (-neighbor_distance, neighbor))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted((-d, row) for d, row in results)
+
+    def _select_neighbors(self, candidates: List[Tuple[float, int]], m: int) -> List[int]:
+        """Pick up to m diverse neighbours (HNSW heuristic, keeping pruned links as filler)"""
+        selected: List[int] = []
+        pruned: List[int] = []
+
+        for distance, row in candidates:
+            if len(selected) >= m:
+                break
+            if selected and (self._distances(self._vectors[row], selected) < distance).any():
+                pruned.append(row)
+                continue
+            selected.append(row)
+
+        for row in pruned:
+            if len(selected) >= m:
+                break
+            selected.append(row)
+
+        return selected
+
+    def _insert(self, row: int):
+        """Link a freshly appended matrix row into the graph"""
+        level = int(-math.log(1.0 - self._rng.random()) * self._level_mult)
+        self._links.append([[] for _ in range(level + 1)])
+
+        if self._entry_point is None:
+            self._entry_point = row
+            self._max_level = level
+            return
+
+        query = self._vectors[row]
+        entry_points = [self._entry_point]
+
+        # Greedy descent through the layers above the new node's level
+        for layer in range(self._max_level, level, -1):
+            entry_points = [self._search_layer(query, entry_points, 1, layer)[0][1]]
+
+        for layer in range(min(level, self._max_level), -1, -1):
+            candidates = self._search_layer(query, entry_points, self.ef_construction, layer)
+            max_links = self.max_m0 if layer == 0 else self.m
+
+            neighbors = self._select_neighbors(candidates, self.m)
+            self._links[row][layer] = neighbors
+
+            # Add reverse links, shrinking neighbour lists that overflow
+            for neighbor in neighbors:
+                links = self._links[neighbor][layer]
+                links.append(row)
+                if len(links) > max_links:
+                    neighbor_vector = self._vectors[neighbor]
+                    ranked = sorted(zip(self._distances(neighbor_vector, links).tolist(), links))
+                    self._links[neighbor][layer] = self._select_neighbors(ranked, max_links)
+
+            entry_points = [r for _, r in candidates]
+
+        if level > self._max_level:
+            self._max_level = level
+            self._entry_point = row
+
+    def add(self, ids: List[str], vectors, metadatas: List[Dict[str, Any]]) -> List[int]:
+        """Insert vectors incrementally; re-added ids replace their previous vector"""
+        existing = [vector_id for vector_id in ids if vector_id in self._id_to_row]
+        if existing:
+            self.delete(existing)
+
+        rows = super().add(ids, vectors, metadatas)
+        for row in range(len(self._links), self._size):
+            self._insert(row)
+
+        return rows
+
+    def delete(self, ids: List[str]) -> int:
+        """Tombstone vectors by id; the graph is rebuilt when tombstones pile up"""
+        removed = 0
+        for vector_id in ids:
+            row = self._id_to_row.pop(vector_id, None)
+            if row is not None:
+                self._deleted.add(row)
+                removed += 1
+
+        if removed:
+            self._columns.clear()
+            if len(self._deleted) > 0.25 * self._size:
+                self.compact()
+
+        return removed
+
+    def compact(self):
+        """Drop tombstoned rows and rebuild the graph from the live vectors"""
+        live = [row for row in range(self._size) if row not in self._deleted]
+        fresh = HNSWIndex(self.dimension, self.metric, self.m, self.ef_construction, self.ef_search)
+        if live:
+            fresh.add([self.ids[row] for row in live], self._vectors[live], [self.metadatas[row] for row in live])
+
+        self.__dict__.update(fresh.__dict__)
+        logger.info(f"Compacted HNSW index to {self._size} vectors")
+
+    def _row_mask(self, filter_dict: Optional[Dict]) -> Optional[np.ndarray]:
+        mask = super()._row_mask(filter_dict)
+        if not self._deleted:
+            return mask
+        if mask is None:
+            mask = np.ones(self._size, dtype=bool)
+        mask[list(self._deleted)] = False
+        return mask
+
+    def search(self, query_vector, k: int = 5, filter_dict: Optional[Dict] = None,
+               ef: Optional[int] = None) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Approximate top-k search; returns (id, score, metadata) tuples, best first
+
+        Tombstoned rows still occupy slots in the beam, so ef is scaled up
+        by the share of deleted rows and doubled until k live results are
+        found (or the whole graph has been covered).
+        """
+        if filter_dict or self._entry_point is None or k <= 0:
+            return super().search(query_vector, k, filter_dict)
+
+        query = self._prepare_vectors(query_vector)[0]
+        entry_points = [self._entry_point]
+        for layer in range(self._max_level, 0, -1):
+            entry_points = [self._search_layer(query, entry_points, 1, layer)[0][1]]
+
+        wanted = min(k, len(self))
+        ef = math.ceil(max(ef or self.ef_search, k) * self._size / max(len(self), 1))
+        while True:
+            live = [(distance, row) for distance, row in self._search_layer(query, entry_points, ef, 0)
+                    if row not in self._deleted]
+            if len(live) >= wanted or ef >= self._size:
+                break
+            ef = min(2 * ef, self._size)
+
+        return [(self.ids[row], -distance, self.metadatas[row]) for distance, row in live[:k]]
+
+    def distinct(self, field: str) -> List[Any]:
+        column = self._column(field)
+        return sorted({value for row, value in enumerate(column) if value and row not in self._deleted})
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({
+            'total_vector_count': len(self),
+            'deleted_vector_count': len(self._deleted),
+            'm': self.m,
+            'ef_construction': self.ef_construction,
+            'ef_search': self.ef_search,
+            'max_level': self._max_level
+        })
+        return stats
+
+    def save(self, path: str):
+        """Persist vectors, metadata and the graph (graph.json)"""
+        super().save(path)
+        with open(os.path.join(path, "graph.json"), 'w', encoding='utf-8') as f:
+            json.dump({
+                'm': self.m,
+                'ef_construction': self.ef_construction,
+                'ef_search': self.ef_search,
+                'entry_point': self._entry_point,
+                'max_level': self._max_level,
+                'deleted': sorted(self._deleted),
+                'links': self._links
+            }, f)
+
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        return super().exists(path) and os.path.exists(os.path.join(path, "graph.json"))
+
+    @classmethod
+    def load(cls, path: str) -> "HNSWIndex":
+        index = super().load(path)
+        with open(os.path.join(path, "graph.json"), 'r', encoding='utf-8') as f:
+            graph = json.load(f)
+
+        index.m = graph['m']
+        index.max_m0 = 2 * index.m
+        index.ef_construction = graph['ef_construction']
+        index.ef_search = graph['ef_search']
+        index._level_mult = 1 / math.log(max(index.m, 2))
+        index._entry_point = graph['entry_point']
+        index._max_level = graph['max_level']
+        index._deleted = set(graph['deleted'])
+        index._links = graph['links']
+        index._id_to_row = {
+            vector_id: row for row, vector_id in enumerate(index.ids) if row not in index._deleted
+        }
+
+        return index
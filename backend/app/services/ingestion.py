@@ -0,0 +1,273 @@
+import os
+import json
+import time
+import uuid
+import queue
+import hashlib
+import threading
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Queue sentinel telling a worker to exit
+_DONE = object()
+
+class IngestionPipeline:
+    """Batched, concurrent embed -> upsert pipeline with backpressure and resume
+
+    Documents are grouped into batches of `batch_size` and flow through two
+    bounded queues: a pool of embedding workers feeds a pool of upsert
+    workers. When the store slows down the upsert queue fills, embedding
+    workers block, the embed queue fills and the producer stops reading
+    input, so at most `max_pending_batches` batches are held per stage.
+
+    Each batch is identified by a hash of its chunk ids. Completed batch
+    hashes are written to `checkpoint_path` every `checkpoint_every`
+    batches (after vector_store.commit()), so a crashed run skips batches
+    that were already committed when restarted. The checkpoint records the
+    index it was written for (vector_store.index_key) and the default path
+    is derived from it, so a checkpoint left by a run against another
+    backend or index is never applied; a checkpointed batch is only skipped
+    if all of its ids are still in the index (e.g. not after a reset). The
+    checkpoint is removed once a run finishes cleanly.
+    """
+
+    def __init__(self, vector_store, batch_size: int = None, embed_workers: int = None,
+                 upsert_workers: int = None, max_pending_batches: int = None,
+                 checkpoint_path: str = None, checkpoint_every: int = None):
+        self.vector_store = vector_store
+        self.batch_size = batch_size or settings.embedding_batch_size
+        self.embed_workers = embed_workers or settings.ingest_embed_workers
+        self.upsert_workers = upsert_workers or settings.ingest_upsert_workers
+        self.max_pending_batches = max_pending_batches or settings.ingest_max_pending_batches
+        self.index_key = vector_store.index_key
+        self.checkpoint_path = checkpoint_path or self.default_checkpoint_path(self.index_key)
+        self.checkpoint_every = checkpoint_every or settings.ingest_checkpoint_every
+
+        self._embed_queue: queue.Queue = queue.Queue(maxsize=self.max_pending_batches)
+        self._upsert_queue: queue.Queue = queue.Queue(maxsize=self.max_pending_batches)
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+
+        # The in-process indexes are not thread-safe; Pinecone upserts run in parallel
+        self._write_lock = threading.Lock() if vector_store.is_local else None
+        self._checkpoint_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+
+        self._completed: Set[str] = set()
+        self._uncheckpointed = 0
+
+        # Metrics
+        self.chunks = 0
+        self.batches = 0
+        self.skipped_batches = 0
+        self.skipped_chunks = 0
+        self.embed_seconds = 0.0
+        self.upsert_seconds = 0.0
+        self.backpressure_seconds = 0.0
+
+    @staticmethod
+    def batch_key(ids: List[str]) -> str:
+        """Stable identity of a batch for checkpointing"""
+        return hashlib.sha1('\n'.join(ids).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def default_checkpoint_path(index_key: str) -> str:
+        """Per-index checkpoint file next to settings.ingest_checkpoint_path"""
+        root, ext = os.path.splitext(settings.ingest_checkpoint_path)
+        return f"{root}.{hashlib.sha1(index_key.encode('utf-8')).hexdigest()[:12]}{ext}"
+
+    def _load_checkpoint(self) -> Set[str]:
+        if not os.path.exists(self.checkpoint_path):
+            return set()
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable ingestion checkpoint {self.checkpoint_path}: {e}")
+            return set()
+        if state.get('index') != self.index_key:
+            logger.warning(f"Ignoring ingestion checkpoint {self.checkpoint_path} written for "
+                           f"{state.get('index')!r}, not {self.index_key!r}")
+            return set()
+        completed = set(state.get('completed_batches', []))
+        logger.info(f"Resuming ingestion: {len(completed)} batches already committed")
+        return completed
+
+    def _checkpoint(self):
+        """Commit the store, then record every batch written so far"""
+        with self._checkpoint_lock:
+            if self._write_lock:
+                with self._write_lock:
+                    self.vector_store.commit()
+            else:
+                self.vector_store.commit()
+
+            with self._state_lock:
+                completed = sorted(self._completed)
+                self._uncheckpointed = 0
+
+            Path(self.checkpoint_path).parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = f"{self.checkpoint_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'index': self.index_key, 'completed_batches': completed, 'updated_at': time.time()}, f)
+            os.replace(tmp_path, self.checkpoint_path)
+
+    def _batches(self, documents: Iterable[Dict[str, Any]]) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        batch = []
+        for doc in documents:
+            if not doc.get('id'):
+                doc = {**doc, 'id': str(uuid.uuid4())}
+            batch.append(doc)
+            if len(batch) >= self.batch_size:
+                yield self.batch_key([d['id'] for d in batch]), batch
+                batch = []
+        if batch:
+            yield self.batch_key([d['id'] for d in batch]), batch
+
+    def _put(self, target: queue.Queue, item) -> bool:
+        """Blocking put that gives up once the pipeline is stopping; time spent blocked counts as backpressure"""
+        started = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.5)
+                waited = time.monotonic() - started
+                with self._state_lock:
+                    self.backpressure_seconds += waited
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fail(self, error: BaseException):
+        with self._state_lock:
+            if self._error is None:
+                self._error = error
+        self._stop.set()
+
+    def _embed_worker(self):
+        while True:
+            item = self._embed_queue.get()
+            if item is _DONE:
+                return
+            if self._stop.is_set():
+                # Keep draining so shutdown never blocks on a full queue
+                continue
+            key, batch = item
+            try:
+                started = time.monotonic()
+                vectors = self.vector_store.embed_texts([doc['text'] for doc in batch])
+                with self._state_lock:
+                    self.embed_seconds += time.monotonic() - started
+            except Exception as e:
+                logger.error(f"Embedding batch failed: {e}")
+                self._fail(e)
+                continue
+            self._put(self._upsert_queue, (key, batch, vectors))
+
+    def _upsert_worker(self):
+        while True:
+            item = self._upsert_queue.get()
+            if item is _DONE:
+                return
+            if self._stop.is_set():
+                continue
+            key, batch, vectors = item
+            # The chunk text is stored under the metadata "text" key, as
+            # langchain's Pinecone text_key expects
+            ids = [doc['id'] for doc in batch]
+            metadatas = [{**doc['metadata'], 'text': doc['text']} for doc in batch]
+            try:
+                started = time.monotonic()
+                if self._write_lock:
+                    with self._write_lock:
+                        self.vector_store.upsert_vectors(ids, vectors, metadatas)
+                else:
+                    self.vector_store.upsert_vectors(ids, vectors, metadatas)
+                elapsed = time.monotonic() - started
+            except Exception as e:
+                logger.error(f"Upsert batch failed: {e}")
+                self._fail(e)
+                continue
+
+            with self._state_lock:
+                self.upsert_seconds += elapsed
+                self._completed.add(key)
+                self._uncheckpointed += 1
+                self.chunks += len(batch)
+                self.batches += 1
+                chunks, checkpoint_due = self.chunks, self._uncheckpointed >= self.checkpoint_every
+            logger.info(f"Ingested {chunks} chunks ({self.batches} batches)")
+
+            if checkpoint_due:
+                try:
+                    self._checkpoint()
+                except Exception as e:
+                    logger.error(f"Writing ingestion checkpoint failed: {e}")
+                    self._fail(e)
+
+    def run(self, documents: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Ingest documents, returning a throughput report; raises the first worker error"""
+        started = time.monotonic()
+        done = self._load_checkpoint()
+        self._completed = set(done)
+        # Checkpointed batches are verified against the index before being skipped
+        indexed = self.vector_store.get_indexed_ids() if done else set()
+
+        embedders = [threading.Thread(target=self._embed_worker, daemon=True) for _ in range(self.embed_workers)]
+        upserters = [threading.Thread(target=self._upsert_worker, daemon=True) for _ in range(self.upsert_workers)]
+        for worker in embedders + upserters:
+            worker.start()
+
+        try:
+            for key, batch in self._batches(documents):
+                if key in done and all(doc['id'] in indexed for doc in batch):
+                    self.skipped_batches += 1
+                    self.skipped_chunks += len(batch)
+                    continue
+                if not self._put(self._embed_queue, (key, batch)):
+                    break
+        except BaseException as e:
+            self._fail(e)
+
+        # Shut the stages down in order so queued batches drain first
+        for _ in embedders:
+            self._embed_queue.put(_DONE)
+        for worker in embedders:
+            worker.join()
+        for _ in upserters:
+            self._upsert_queue.put(_DONE)
+        for worker in upserters:
+            worker.join()
+
+        # Record whatever was written, even on failure, so a rerun resumes from here
+        self._checkpoint()
+        if self._error is not None:
+            raise self._error
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+        report = self.report(time.monotonic() - started)
+        logger.info(f"Ingestion finished: {report}")
+        return report
+
+    def queues(self) -> Dict[str, queue.Queue]:
+        """The bounded stage queues (for occupancy monitoring)"""
+        return {'embed': self._embed_queue, 'upsert': self._upsert_queue}
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        """Throughput and stage timings for a finished run"""
+        return {
+            'chunks': self.chunks,
+            'batches': self.batches,
+            'skipped_batches': self.skipped_batches,
+            'skipped_chunks': self.skipped_chunks,
+            'seconds': round(elapsed, 2),
+            'chunks_per_second': round(self.chunks / elapsed, 2) if elapsed > 0 else 0.0,
+            'embed_seconds': round(self.embed_seconds, 2),
+            'upsert_seconds': round(self.upsert_seconds, 2),
+            'backpressure_seconds': round(self.backpressure_seconds, 2)
+        }
@@ -0,0 +1,222 @@
+import time
+import random
+import asyncio
+import threading
+import logging
+from typing import Dict, Any, Callable, Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses of transient Gemini errors: timeout, rate limit/quota, server overload
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+def status_code(error: BaseException) -> Optional[int]:
+    """HTTP status carried by an API error, if any
+
+    google-api-core exceptions expose it as `code` (e.g. ResourceExhausted
+    is 429, DeadlineExceeded 504); HTTP client errors as `status_code` or
+    on their `response`.
+    """
+    for source in (error, getattr(error, 'response', None)):
+        for attribute in ('code', 'status_code'):
+            value = getattr(source, attribute, None)
+            if isinstance(value, int) and not isinstance(value, bool):
+                return value
+    return None
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an LLM error is transient (rate limiting, overload, timeouts)"""
+    if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    return status_code(error) in RETRYABLE_STATUS_CODES
+
+class CircuitOpenError(Exception):
+    """Raised without calling the LLM while the circuit breaker is open"""
+
+class CircuitBreaker:
+    """Per-process circuit breaker: fail fast after repeated transient LLM failures
+
+    closed -> open after `failure_threshold` consecutive failed calls;
+    open -> half_open once `reset_timeout` seconds have passed, letting a
+    single trial call through; the trial closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = "closed"
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.times_opened = 0
+        self.open_seconds_total = 0.0
+        self.rejected_calls = 0
+
+    def allow_request(self) -> bool:
+        """Check whether a call may go to the LLM right now"""
+        with self._lock:
+            if self.state == "closed":
+                return True
+
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+
+            self.rejected_calls += 1
+            return False
+
+    def record_success(self):
+        """Record a call that reached a healthy LLM"""
+        with self._lock:
+            if self.state != "closed":
+                self.open_seconds_total += time.monotonic() - self._opened_at
+                logger.info("LLM circuit breaker closed")
+            self.state = "closed"
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Free the half-open trial slot after a call that ended without a verdict (e.g. cancelled)"""
+        with self._lock:
+            if self.state == "half_open":
+                self._trial_in_flight = False
+
+    def record_failure(self):
+        """Record a call that failed with a transient error after all retries"""
+        with self._lock:
+            self._consecutive_failures += 1
+            if self.state == "half_open":
+                # Failed trial: stay open for another reset period
+                self.open_seconds_total += time.monotonic() - self._opened_at
+                self._open()
+            elif self.state == "closed" and self._consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        """Trip the breaker (caller holds the lock)"""
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+        self.times_opened += 1
+        logger.warning(f"LLM circuit breaker opened for {self.reset_timeout}s after {self._consecutive_failures} failures")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get breaker state and metrics"""
+        open_seconds = self.open_seconds_total
+        if self.state != "closed":
+            open_seconds += time.monotonic() - self._opened_at
+        return {
+            'state': self.state,
+            'consecutive_failures': self._consecutive_failures,
+            'times_opened': self.times_opened,
+            'open_seconds_total': round(open_seconds, 2),
+            'rejected_calls': self.rejected_calls
+        }
+
+class LLMCallWrapper:
+    """Shared wrapper for Gemini calls: jittered exponential backoff + circuit breaker"""
+
+    def __init__(self, max_retries: int = 3, backoff_base: float = 0.3, backoff_max: float = 4.0,
+                 breaker: CircuitBreaker = None, scheduler=None, quota_kind: str = "generate"):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+
+        # Optional QuotaScheduler; every attempt (including retries) takes quota
+        self.scheduler = scheduler
+        self.quota_kind = quota_kind
+
+        # Metrics
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _before_call(self):
+        self.calls += 1
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Gemini is temporarily unavailable (circuit open)")
+
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        """Record a failed attempt; returns True if the call should be retried"""
+        if is_retryable(error) and attempt < self.max_retries:
+            self.retries += 1
+            logger.warning(f"Transient LLM error (attempt {attempt + 1}/{self.max_retries + 1}): {error}")
+            return True
+
+        self.record_error(error)
+        return False
+
+    def record_error(self, error: Exception):
+        """Report a final LLM error to the breaker (also for errors raised while consuming a stream)"""
+        self.failures += 1
+        if is_retryable(error):
+            self.breaker.record_failure()
+        else:
+            # Gemini answered (e.g. rejected the prompt), so it is healthy
+            self.breaker.record_success()
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call fn with retries, raising CircuitOpenError while the breaker is open"""
+        self._before_call()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    if self.scheduler:
+                        self.scheduler.acquire(self.quota_kind)
+                    result = fn(*args, **kwargs)
+                    self.breaker.record_success()
+                    return result
+                except Exception as e:
+                    if not self._should_retry(e, attempt):
+                        raise
+                    time.sleep(self._backoff(attempt))
+                    attempt += 1
+        except BaseException:
+            # Errors were recorded above; an interrupted call must not hold the half-open trial
+            self.breaker.release_trial()
+            raise
+
+    async def acall(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Async variant of call for coroutine functions"""
+        self._before_call()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    if self.scheduler:
+                        await self.scheduler.aacquire(self.quota_kind)
+                    result = await fn(*args, **kwargs)
+                    self.breaker.record_success()
+                    return result
+                except Exception as e:
+                    if not self._should_retry(e, attempt):
+                        raise
+                    await asyncio.sleep(self._backoff(attempt))
+                    attempt += 1
+        except BaseException:
+            # Cancelled (e.g. the client disconnected): free the half-open trial for the next call
+            self.breaker.release_trial()
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Get retry and circuit breaker metrics"""
+        return {
+            'calls': self.calls,
+            'retries': self.retries,
+            'failures': self.failures,
+            'circuit': self.breaker.stats()
+        }
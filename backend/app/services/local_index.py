@@ -0,0 +1,219 @@
+import os
+import json
+import shutil
+import logging
+from typing import List, Dict, Any, Optional, Tuple, Set
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class LocalVectorIndex:
+    """In-process vector index backed by a contiguous float32 matrix"""
+
+    SUPPORTED_METRICS = ("cosine", "dotproduct")
+
+    def __init__(self, dimension: int, metric: str = "cosine"):
+        if metric not in self.SUPPORTED_METRICS:
+            raise ValueError(f"Unsupported metric for local index: {metric}")
+
+        self.dimension = dimension
+        self.metric = metric
+
+        # Row-major embedding matrix; capacity grows geometrically so appends stay amortized O(1)
+        self._vectors = np.zeros((0, dimension), dtype=np.float32)
+        self._size = 0
+
+        # Metadata table, aligned with matrix rows
+        self.ids: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self._id_to_row: Dict[str, int] = {}
+
+        # Cached per-field metadata columns used for filtering
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """View of the populated rows of the embedding matrix"""
+        return self._vectors[:self._size]
+
+    def _prepare_vectors(self, vectors) -> np.ndarray:
+        """Convert vectors to a float32 matrix, normalizing rows for cosine similarity"""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if matrix.shape[1] != self.dimension:
+            raise ValueError(f"Expected vectors of dimension {self.dimension}, got {matrix.shape[1]}")
+
+        if self.metric == "cosine":
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix = matrix / norms
+
+        return np.ascontiguousarray(matrix, dtype=np.float32)
+
+    def _reserve(self, capacity: int):
+        """Grow the embedding matrix to hold at least `capacity` rows"""
+        if capacity <= self._vectors.shape[0]:
+            return
+        new_capacity = max(capacity, 2 * self._vectors.shape[0], 64)
+        grown = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+        grown[:self._size] = self._vectors[:self._size]
+        self._vectors = grown
+
+    def add(self, ids: List[str], vectors, metadatas: List[Dict[str, Any]]) -> List[int]:
+        """Insert or overwrite vectors by id; returns the affected row numbers"""
+        matrix = self._prepare_vectors(vectors)
+        if not (len(ids) == len(metadatas) == matrix.shape[0]):
+            raise ValueError("ids, vectors and metadatas must have the same length")
+
+        self._reserve(self._size + len(ids))
+
+        rows = []
+        for vector_id, vector, metadata in zip(ids, matrix, metadatas):
+            row = self._id_to_row.get(vector_id)
+            if row is None:
+                row = self._size
+                self._size += 1
+                self.ids.append(vector_id)
+                self.metadatas.append(metadata)
+                self._id_to_row[vector_id] = row
+            else:
+                self.metadatas[row] = metadata
+            self._vectors[row] = vector
+            rows.append(row)
+
+        self._columns.clear()
+        return rows
+
+    def delete(self, ids: List[str]) -> int:
+        """Delete vectors by id; returns the number of rows removed"""
+        rows = sorted({self._id_to_row[i] for i in ids if i in self._id_to_row})
+        if not rows:
+            return 0
+
+        keep = np.ones(self._size, dtype=bool)
+        keep[rows] = False
+
+        self._vectors = np.ascontiguousarray(self.vectors[keep])
+        self.ids = [vector_id for vector_id, kept in zip(self.ids, keep) if kept]
+        self.metadatas = [metadata for metadata, kept in zip(self.metadatas, keep) if kept]
+        self._size = len(self.ids)
+        self._id_to_row = {vector_id: row for row, vector_id in enumerate(self.ids)}
+        self._columns.clear()
+
+        return len(rows)
+
+    def _column(self, field: str) -> np.ndarray:
+        """Get (and cache) a metadata field as an array aligned with matrix rows"""
+        column = self._columns.get(field)
+        if column is None:
+            column = np.array([metadata.get(field) for metadata in self.metadatas], dtype=object)
+            self._columns[field] = column
+        return column
+
+    def _filter_mask(self, filter_dict: Dict[str, Any]) -> np.ndarray:
+        """Build a row mask for a Pinecone-style metadata filter ($eq / $in / plain values)"""
+        mask = np.ones(self._size, dtype=bool)
+        for field, condition in filter_dict.items():
+            column = self._column(field)
+            if isinstance(condition, dict):
+                if "$eq" in condition:
+                    mask &= column == condition["$eq"]
+                if "$in" in condition:
+                    mask &= np.isin(column, list(condition["$in"]))
+            else:
+                mask &= column == condition
+        return mask
+
+    def score(self, query_vector) -> np.ndarray:
+        """Score every stored vector against a query vector"""
+        query = self._prepare_vectors(query_vector)[0]
+        return self.vectors @ query
+
+    def _row_mask(self, filter_dict: Optional[Dict]) -> Optional[np.ndarray]:
+        """Rows eligible for a search, or None when every row is eligible"""
+        return self._filter_mask(filter_dict) if filter_dict else None
+
+    def search(self, query_vector, k: int = 5, filter_dict: Optional[Dict] = None) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Exact top-k search; returns (id, score, metadata) tuples, best first"""
+        if self._size == 0 or k <= 0:
+            return []
+
+        scores = self.score(query_vector)
+
+        mask = self._row_mask(filter_dict)
+        if mask is not None:
+            candidates = np.flatnonzero(mask)
+            if candidates.size == 0:
+                return []
+            scores = scores[candidates]
+        else:
+            candidates = None
+
+        k = min(k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        rows = candidates[top] if candidates is not None else top
+
+        return [(self.ids[row], float(scores[i]), self.metadatas[row]) for i, row in zip(top, rows)]
+
+    def indexed_ids(self) -> Set[str]:
+        """Ids of the live vectors (self.ids is row-aligned and may include deleted rows)"""
+        return set(self._id_to_row)
+
+    def distinct(self, field: str) -> List[Any]:
+        """Get the distinct non-empty values of a metadata field"""
+        return sorted({value for value in self._column(field) if value})
+
+    def stats(self) -> Dict[str, Any]:
+        """Get statistics about the index"""
+        return {
+            'total_vector_count': self._size,
+            'dimension': self.dimension,
+            'metric': self.metric,
+            'memory_bytes': int(self.vectors.nbytes)
+        }
+
+    def save(self, path: str):
+        """Persist the index to a directory (vectors.npy + metadata.json)"""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "vectors.npy"), self.vectors)
+        with open(os.path.join(path, "metadata.json"), 'w', encoding='utf-8') as f:
+            json.dump({
+                'dimension': self.dimension,
+                'metric': self.metric,
+                'ids': self.ids,
+                'metadatas': self.metadatas
+            }, f, ensure_ascii=False)
+        logger.info(f"Saved local index with {self._size} vectors to {path}")
+
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        """Check whether a persisted index exists at path"""
+        return os.path.exists(os.path.join(path, "metadata.json"))
+
+    @classmethod
+    def load(cls, path: str) -> "LocalVectorIndex":
+        """Load an index previously written with `save`"""
+        with open(os.path.join(path, "metadata.json"), 'r', encoding='utf-8') as f:
+            header = json.load(f)
+
+        index = cls(dimension=header['dimension'], metric=header['metric'])
+        vectors = np.load(os.path.join(path, "vectors.npy"))
+        index._vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        index._size = vectors.shape[0]
+        index.ids = header['ids']
+        index.metadatas = header['metadatas']
+        index._id_to_row = {vector_id: row for row, vector_id in enumerate(index.ids)}
+
+        logger.info(f"Loaded local index with {index._size} vectors from {path}")
+        return index
+
+    @staticmethod
+    def remove(path: str):
+        """Delete a persisted index directory"""
+        if os.path.isdir(path):
+            shutil.rmtree(path)
@@ -0,0 +1,153 @@
+import hashlib
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def make_document_id(item: Dict[str, Any], content_type: str, text: str) -> str:
+    """Deterministic chunk id: "<url hash>#<content hash>"
+
+    The same page content always maps to the same id, so reindexing can
+    diff against what is stored instead of re-embedding everything.
+    """
+    url_hash = hashlib.sha1(item.get('url', '').encode('utf-8')).hexdigest()[:16]
+    content = '\x1f'.join([content_type, item.get('title', ''), item.get('product', ''), text])
+    content_hash = hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]
+    return f"{url_hash}#{content_hash}"
+
+# Per-worker preparer, installed once by the pool initializer
+_worker_preparer: Optional["DocumentPreparer"] = None
+
+def _init_worker(preparer: "DocumentPreparer"):
+    global _worker_preparer
+    _worker_preparer = preparer
+
+def _prepare_batch(pages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    return _worker_preparer.prepare_batch(pages)
+
+class DocumentPreparer:
+    """Turns scraped pages into chunk documents (main content, FAQ items, troubleshooting steps)
+
+    Serial by default; with workers > 1, pages are sharded into batches of
+    `batch_pages` across a process pool. At most `workers * 4` batches are
+    in flight, and results are yielded in submission order, so the output
+    stream is identical to the serial path while input is still read lazily.
+    """
+
+    BOILERPLATE_COUNTERS = ('chars_seen', 'chars_removed', 'blocks_removed')
+
+    def __init__(self, text_splitter, boilerplate=None):
+        self.text_splitter = text_splitter
+        self.boilerplate = boilerplate
+
+    def prepare_page(self, item: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Prepare the documents for one scraped page"""
+        # Create main document from content
+        if item.get('content'):
+            content = item['content']
+            if self.boilerplate:
+                content = self.boilerplate.strip(content)
+            if len(content) > 100:  # Only process substantial content
+                # Split content into chunks
+                chunks = self.text_splitter.split_text(content)
+
+                for i, chunk in enumerate(chunks):
+                    yield {
+                        'id': make_document_id(item, 'main_content', chunk),
+                        'text': chunk,
+                        'metadata': {
+                            'url': item.get('url', ''),
+                            'title': item.get('title', ''),
+                            'product': item.get('product', ''),
+                            'chunk_id': i,
+                            'total_chunks': len(chunks),
+                            'content_type': 'main_content'
+                        }
+                    }
+
+        # Add FAQ items as separate documents
+        for faq in item.get('faq_items', []):
+            if faq.get('question') and faq.get('answer'):
+                if self.boilerplate and self.boilerplate.is_boilerplate_block(faq['answer']):
+                    continue
+                faq_text = f"Question: {faq['question']}\nAnswer: {faq['answer']}"
+                yield {
+                    'id': make_document_id(item, 'faq', faq_text),
+                    'text': faq_text,
+                    'metadata': {
+                        'url': item.get('url', ''),
+                        'title': item.get('title', ''),
+                        'product': item.get('product', ''),
+                        'content_type': 'faq',
+                        'question': faq['question']
+                    }
+                }
+
+        # Add troubleshooting steps
+        for i, step in enumerate(item.get('troubleshooting', [])):
+            if step and len(step) > 20:  # Only substantial steps
+                if self.boilerplate and self.boilerplate.is_boilerplate_block(step):
+                    continue
+                yield {
+                    'id': make_document_id(item, 'troubleshooting', step),
+                    'text': step,
+                    'metadata': {
+                        'url': item.get('url', ''),
+                        'title': item.get('title', ''),
+                        'product': item.get('product', ''),
+                        'content_type': 'troubleshooting',
+                        'step_number': i + 1
+                    }
+                }
+
+    def prepare_batch(self, pages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """Prepare a batch of pages; also returns the boilerplate counters it added (for worker processes)"""
+        before = self._boilerplate_counters()
+        documents = [doc for item in pages for doc in self.prepare_page(item)]
+        after = self._boilerplate_counters()
+        return documents, {key: after[key] - before[key] for key in after}
+
+    def _boilerplate_counters(self) -> Dict[str, int]:
+        if not self.boilerplate:
+            return {}
+        return {key: getattr(self.boilerplate, key) for key in self.BOILERPLATE_COUNTERS}
+
+    def _collect(self, future: Future) -> List[Dict[str, Any]]:
+        """Take a worker batch's documents, folding its boilerplate counters into ours"""
+        documents, counters = future.result()
+        for key, value in counters.items():
+            setattr(self.boilerplate, key, getattr(self.boilerplate, key) + value)
+        return documents
+
+    def iter_documents(self, data: Iterable[Dict[str, Any]], workers: int = 1,
+                       batch_pages: int = 16) -> Iterator[Dict[str, Any]]:
+        """Yield documents for every page, in page order"""
+        if workers <= 1:
+            for item in data:
+                yield from self.prepare_page(item)
+            return
+
+        logger.info(f"Preparing documents with {workers} worker processes")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as pool:
+            pending: deque = deque()
+            try:
+                batch = []
+                for item in data:
+                    batch.append(item)
+                    if len(batch) >= batch_pages:
+                        pending.append(pool.submit(_prepare_batch, batch))
+                        batch = []
+                        # Bound the work in flight; wait on the oldest batch to keep order
+                        if len(pending) >= workers * 4:
+                            yield from self._collect(pending.popleft())
+                if batch:
+                    pending.append(pool.submit(_prepare_batch, batch))
+
+                while pending:
+                    yield from self._collect(pending.popleft())
+            finally:
+                # Consumer stopped early or a batch failed: drop queued work
+                for future in pending:
+                    future.cancel()
@@ -0,0 +1,267 @@
+import time
+import heapq
+import sqlite3
+import asyncio
+import itertools
+import threading
+import logging
+from enum import IntEnum
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class Priority(IntEnum):
+    """Quota priority classes; lower values are served first"""
+    LIVE = 0   # chat and voice traffic
+    BULK = 1   # indexing / reindexing
+    EVAL = 2   # evaluation runs
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate_per_minute`
+
+    try_take() only succeeds if `floor` tokens are left afterwards, which is
+    how lower priority classes leave headroom for higher ones.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(1.0, rate_per_minute / 6.0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _wait(self, tokens: float, needed: float) -> float:
+        return (needed - tokens) / self.rate if self.rate > 0 else float('inf')
+
+    def level(self) -> float:
+        """Tokens currently in the bucket"""
+        self._refill()
+        return self.tokens
+
+    def try_take(self, cost: float, floor: float = 0.0) -> float:
+        """Take `cost` tokens if `floor` remain afterwards; returns 0 on success, else seconds to wait"""
+        self._refill()
+        if self.tokens < cost + floor:
+            return self._wait(self.tokens, cost + floor)
+        self.tokens -= cost
+        return 0.0
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket whose level lives in SQLite, shared by every process using the same path
+
+    The API server, index_data.py, ingest.py and evaluate_agent.py all draw
+    on one Gemini quota per API key; sharing the bucket keeps their combined
+    rate within it. Refill and take happen in one IMMEDIATE transaction, so
+    concurrent processes never spend the same tokens.
+    """
+
+    def __init__(self, path: str, kind: str, rate_per_minute: float, capacity: Optional[float] = None):
+        super().__init__(rate_per_minute, capacity)
+        self.path = path
+        self.kind = kind
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use so importing the scheduler never touches the disk
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "kind TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+        return self._conn
+
+    def _update(self, cost: float, floor: float) -> Tuple[float, float]:
+        """Refill the shared level and take `cost` if allowed; returns (tokens left, seconds to wait)"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE kind = ?", (self.kind,)).fetchone()
+            tokens = self.capacity if row is None else min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+            wait = 0.0
+            if tokens < cost + floor:
+                wait = self._wait(tokens, cost + floor)
+            else:
+                tokens -= cost
+            conn.execute("INSERT OR REPLACE INTO buckets (kind, tokens, updated) VALUES (?, ?, ?)",
+                         (self.kind, tokens, now))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.tokens = tokens
+        return tokens, wait
+
+    def level(self) -> float:
+        return self._update(0.0, 0.0)[0]
+
+    def try_take(self, cost: float, floor: float = 0.0) -> float:
+        return self._update(cost, floor)[1]
+
+class QuotaScheduler:
+    """Priority scheduler for Gemini generation and embedding quota
+
+    Callers queue per quota kind ("generate", "embed") ordered by priority
+    then arrival, and block until the head of the queue can take tokens
+    from the kind's bucket. Requests are delayed, never rejected.
+
+    Quota is per API key and shared by every process using it, so with a
+    `state_path` the buckets live in SQLite and all processes draw on the
+    same level. Priority also holds across processes: each class may only
+    draw a bucket down to its reserve (see reserve()), so LIVE chat can
+    always spend the headroom BULK indexing leaves, and EVAL runs leave
+    more headroom than BULK. Processes declare their default class with
+    set_process_priority; a call may override it with `priority`.
+    """
+
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, limits: Dict[str, float], background_share: float = 0.5,
+                 state_path: Optional[str] = None, burst_seconds: float = 10.0):
+        self.limits = dict(limits)
+        self.background_share = background_share
+        self.state_path = state_path
+        self.process_priority = Priority.LIVE
+
+        self._buckets: Dict[str, TokenBucket] = {}
+        for kind, rate in self.limits.items():
+            capacity = max(1.0, rate * burst_seconds / 60.0)
+            self._buckets[kind] = (SharedTokenBucket(state_path, kind, rate, capacity) if state_path
+                                   else TokenBucket(rate, capacity))
+        self._queues: Dict[str, list] = {kind: [] for kind in self.limits}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+        # Metrics
+        self._granted: Dict[str, int] = {kind: 0 for kind in self.limits}
+        self._total_wait: Dict[str, float] = {kind: 0.0 for kind in self.limits}
+        self._max_wait: Dict[str, float] = {kind: 0.0 for kind in self.limits}
+
+    def set_process_priority(self, priority: Priority):
+        """Declare this process's default priority class"""
+        with self._condition:
+            self.process_priority = priority
+            logger.info(f"Quota scheduler running as {priority.name}, "
+                        f"keeping {self.reserve(priority):.0%} of each bucket in reserve")
+
+    def reserve(self, priority: Priority) -> float:
+        """Fraction of a bucket a class must leave for higher classes
+
+        LIVE may empty the bucket; BULK may use `background_share` of it and
+        EVAL half of that.
+        """
+        if priority == Priority.LIVE:
+            return 0.0
+        if priority == Priority.BULK:
+            return 1.0 - self.background_share
+        return 1.0 - self.background_share / 2
+
+    def _enqueue(self, kind: str, priority: Optional[Priority]) -> Tuple[int, int]:
+        ticket = (int(self.process_priority if priority is None else priority), next(self._sequence))
+        heapq.heappush(self._queues[kind], ticket)
+        return ticket
+
+    def _try_acquire(self, kind: str, ticket: Tuple[int, int], cost: float) -> float:
+        """Take tokens if ticket is at the head of its queue; returns 0 on success, else seconds to wait"""
+        queue = self._queues[kind]
+        if queue[0] != ticket:
+            return self.POLL_INTERVAL
+
+        bucket = self._buckets[kind]
+        wait = bucket.try_take(cost, floor=bucket.capacity * self.reserve(Priority(ticket[0])))
+        if wait > 0:
+            return wait
+
+        heapq.heappop(queue)
+        self._condition.notify_all()
+        return 0.0
+
+    def _record(self, kind: str, waited: float):
+        self._granted[kind] += 1
+        self._total_wait[kind] += waited
+        self._max_wait[kind] = max(self._max_wait[kind], waited)
+
+    def acquire(self, kind: str, priority: Optional[Priority] = None, cost: float = 1) -> float:
+        """Block until quota for one call is available; returns the seconds waited"""
+        if kind not in self._buckets:
+            return 0.0
+
+        started = time.monotonic()
+        with self._condition:
+            ticket = self._enqueue(kind, priority)
+            while True:
+                wait = self._try_acquire(kind, ticket, cost)
+                if wait == 0:
+                    break
+                self._condition.wait(timeout=min(wait, 1.0))
+
+            waited = time.monotonic() - started
+            self._record(kind, waited)
+        return waited
+
+    async def aacquire(self, kind: str, priority: Optional[Priority] = None, cost: float = 1) -> float:
+        """Async variant of acquire; waits without blocking the event loop"""
+        if kind not in self._buckets:
+            return 0.0
+
+        started = time.monotonic()
+        with self._condition:
+            ticket = self._enqueue(kind, priority)
+        try:
+            while True:
+                with self._condition:
+                    wait = self._try_acquire(kind, ticket, cost)
+                    if wait == 0:
+                        waited = time.monotonic() - started
+                        self._record(kind, waited)
+                        return waited
+                await asyncio.sleep(min(wait, self.POLL_INTERVAL))
+        except asyncio.CancelledError:
+            # Leave the queue so later callers are not stuck behind a dead ticket
+            with self._condition:
+                queue = self._queues[kind]
+                if ticket in queue:
+                    queue.remove(ticket)
+                    heapq.heapify(queue)
+                    self._condition.notify_all()
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Get current queue depth and wait times per quota kind"""
+        with self._condition:
+            stats = {'process_priority': self.process_priority.name, 'kinds': {}}
+            for kind, queue in self._queues.items():
+                granted = self._granted[kind]
+                depth_by_priority = {p.name: 0 for p in Priority}
+                for priority, _ in queue:
+                    depth_by_priority[Priority(priority).name] += 1
+                bucket = self._buckets[kind]
+                stats['kinds'][kind] = {
+                    'rate_per_minute': round(bucket.rate * 60, 2),
+                    'tokens': round(bucket.level(), 2),
+                    'shared': isinstance(bucket, SharedTokenBucket),
+                    'queue_depth': len(queue),
+                    'queue_depth_by_priority': depth_by_priority,
+                    'granted': granted,
+                    'avg_wait_seconds': round(self._total_wait[kind] / granted, 4) if granted else 0.0,
+                    'max_wait_seconds': round(self._max_wait[kind], 4)
+                }
+            return stats
+
+# Global instance
+quota_scheduler = QuotaScheduler(
+    limits={
+        'generate': settings.gemini_generate_rpm,
+        'embed': settings.gemini_embed_rpm
+    },
+    background_share=settings.quota_background_share,
+    state_path=settings.quota_state_path or None
+)
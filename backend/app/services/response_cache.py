@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import uuid
+import threading
+import logging
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, FrozenSet
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def source_key(search_results: List[Dict[str, Any]], top_n: int = 3) -> FrozenSet:
+    """Identify the retrieved context an answer was grounded on (the chunks used in the prompt)"""
+    return frozenset(
+        (result['metadata'].get('url', ''), hash(result['content']))
+        for result in search_results[:top_n]
+    )
+
+class IndexGeneration:
+    """Per-index change token shared between processes through a small JSON file
+
+    Whatever writes to an index (index_data.py, ingest.py, reset_index.py)
+    calls bump() afterwards; the API server reads current(), which rereads
+    the file only when it has been replaced, so a check is one stat().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file_id = None
+        self._tokens: Dict[str, str] = {}
+
+    def _read(self) -> Dict[str, str]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._file_id, self._tokens = None, {}
+            return self._tokens
+        file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if file_id != self._file_id:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._tokens = json.load(f)
+                self._file_id = file_id
+            except (OSError, ValueError) as e:
+                logger.warning(f"Unreadable index generation file {self.path}: {e}")
+        return self._tokens
+
+    def current(self, index_key: str) -> str:
+        """The index's current token ('' if it was never bumped)"""
+        with self._lock:
+            return self._read().get(index_key, '')
+
+    def bump(self, index_key: str) -> str:
+        """Record that the index changed; returns the new token"""
+        with self._lock:
+            tokens = dict(self._read())
+            tokens[index_key] = uuid.uuid4().hex
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(tokens, f)
+            os.replace(tmp_path, self.path)
+            return tokens[index_key]
+
+class SemanticResponseCache:
+    """Answer cache keyed on query embeddings
+
+    A lookup hits when a cached question's embedding is at least
+    `similarity_threshold` cosine-similar to the new one AND the same
+    chunks were retrieved for it. Entries are evicted LRU under an entry
+    and byte budget and expire after a TTL.
+
+    Callers also pass the index's generation (IndexGeneration token). A
+    lookup under a new generation drops every entry, and a store under
+    an outdated one is ignored, so after any sync, prune or reset (often by
+    another process) no answer built from removed documents is served. The
+    source check covers what the generation cannot: retrieval runs fresh
+    for every lookup, so a newly ranked chunk misses the cache.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.95, max_entries: int = 1000,
+                 max_bytes: int = 16 * 1024 * 1024, ttl_seconds: float = 3600):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        # entry id -> entry; ordered oldest to most recently used
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._bytes = 0
+        self._generation = ''
+        self._lock = threading.Lock()
+
+        # Stacked embeddings for one vectorized similarity pass, rebuilt lazily
+        self._matrix = None
+        self._matrix_ids: List[int] = []
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        self._bytes -= entry['size']
+        self._matrix = None
+
+    def _clear(self):
+        self._entries.clear()
+        self._bytes = 0
+        self._matrix = None
+
+    def lookup(self, embedding, sources: FrozenSet, generation: str = '') -> Optional[Dict[str, Any]]:
+        """Find a cached response for a near-duplicate question with the same retrieved sources"""
+        query = self._normalize(embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            if generation != self._generation:
+                # The index changed since these answers were built
+                if self._entries:
+                    logger.info(f"Index changed; dropping {len(self._entries)} cached responses")
+                self._clear()
+                self._generation = generation
+
+            # Drop expired entries before matching
+            if self.ttl_seconds:
+                for entry_id in [i for i, e in self._entries.items() if now - e['stored_at'] > self.ttl_seconds]:
+                    self._remove(entry_id)
+
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            if self._matrix is None:
+                self._matrix_ids = list(self._entries.keys())
+                self._matrix = np.stack([self._entries[i]['embedding'] for i in self._matrix_ids])
+
+            similarities = self._matrix @ query
+            for position in np.argsort(-similarities):
+                if similarities[position] < self.similarity_threshold:
+                    break
+                entry_id = self._matrix_ids[position]
+                entry = self._entries[entry_id]
+                if entry['sources'] == sources:
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return dict(entry['response'])
+
+            self.misses += 1
+            return None
+
+    def store(self, embedding, sources: FrozenSet, response: Dict[str, Any], generation: str = ''):
+        """Cache a response, evicting least recently used entries past the entry/byte budget"""
+        vector = self._normalize(embedding)
+        size = vector.nbytes + len(json.dumps(response, default=str))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if generation != self._generation:
+                # Built against an index that has changed since
+                return
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {
+                'embedding': vector,
+                'sources': sources,
+                'response': dict(response),
+                'size': size,
+                'stored_at': time.monotonic()
+            }
+            self._bytes += size
+            self._matrix = None
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all cached responses"""
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'bytes': self._bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'similarity_threshold': self.similarity_threshold,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            'evictions': self.evictions
+        }
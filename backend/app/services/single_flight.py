@@ -0,0 +1,61 @@
+import asyncio
+import logging
+from typing import Dict, Any, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Coalesce concurrent identical async calls into one in-flight computation
+
+    The first caller for a key starts the computation as a task; callers
+    arriving while it is running await the same task and receive its
+    result (or exception). The task is shielded, so a caller that
+    disconnects does not cancel the work for everyone else.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._group_sizes: Dict[str, int] = {}
+
+        # Counters
+        self.executions = 0
+        self.merged_callers = 0
+        self.largest_group = 0
+
+    def _finish(self, key: str, task: asyncio.Task):
+        """Forget a completed computation and record how many callers shared it"""
+        self._inflight.pop(key, None)
+        group_size = self._group_sizes.pop(key, 1)
+        self.largest_group = max(self.largest_group, group_size)
+        if group_size > 1:
+            logger.info(f"Coalesced {group_size} identical requests into one computation")
+
+        # Mark the exception as retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory() for key, or join the run already in flight for it"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            self._group_sizes[key] = 1
+            self.executions += 1
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+        else:
+            self._group_sizes[key] += 1
+            self.merged_callers += 1
+
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get coalescing counters"""
+        total = self.executions + self.merged_callers
+        return {
+            'in_flight': len(self._inflight),
+            'executions': self.executions,
+            'merged_callers': self.merged_callers,
+            'merge_rate': round(self.merged_callers / total, 4) if total else 0.0,
+            'largest_group': self.largest_group
+        }
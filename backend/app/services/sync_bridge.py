@@ -0,0 +1,37 @@
+import asyncio
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+
+T = TypeVar('T')
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """The event loop blocking callers run coroutines on, started on first use"""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="sync-bridge", daemon=True).start()
+        return _loop
+
+def run_sync(coroutine: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion from blocking code and return its result
+
+    The blocking APIs (generate_response, search, ...) are thin wrappers
+    over their async counterparts through this. Every call runs on one
+    long-lived background loop rather than a fresh asyncio.run() loop, so
+    loop-bound clients (Gemini's async transport, httpx pools) are created
+    once and reused, and callers that already run inside an event loop
+    (scripts, notebooks) do not hit "event loop is already running".
+    """
+    loop = _background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        # Blocking here would deadlock the loop the coroutine needs
+        raise RuntimeError("run_sync() called from the bridge loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
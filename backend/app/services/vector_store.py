@@ -1,12 +1,23 @@
 import os
 import json
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from typing import List, Dict, Any, Optional, Set, Iterable, Iterator, Union, Callable
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_community.vectorstores import Pinecone
 from pinecone import Pinecone as PineconeClient, ServerlessSpec
 from app.core.config import settings
+from app.services.local_index import LocalVectorIndex
+from app.services.hnsw_index import HNSWIndex
+from app.services.embedding_cache import EmbeddingCache, DocumentEmbeddingStore, fit_dimension
+from app.services.quota_scheduler import quota_scheduler
+from app.services.ingestion import IngestionPipeline
+from app.services.boilerplate import BoilerplateDetector
+from app.services.dedup import NearDuplicateFilter
+from app.services.chunking import create_text_splitter
+from app.services.preparation import DocumentPreparer, make_document_id
+from app.services.sync_bridge import run_sync
+from app.services.response_cache import IndexGeneration
 
 logger = logging.getLogger(__name__)
 
@@ -17,37 +28,106 @@ class VectorStoreService:
         self.pinecone_index_name = settings.pinecone_index_name
         self.google_api_key = settings.google_api_key
 
+        self.backend = settings.vector_backend.lower()
+        self.local_index_path = settings.local_index_path
+
         # Check if API keys are provided
-        if not self.pinecone_api_key:
+        if self.is_local:
+            # Local backends keep vectors in-process; no Pinecone client needed
+            self.pc = None
+        elif not self.pinecone_api_key:
             logger.warning("Pinecone API key not provided. Vector store functionality will be limited.")
             self.pc = None
-            self.embeddings = None
         else:
             # Initialize Pinecone client
             self.pc = PineconeClient(api_key=self.pinecone_api_key)
 
-            # Initialize Gemini embeddings
-            if self.google_api_key:
-                self.embeddings = GoogleGenerativeAIEmbeddings(
-                    model=settings.embedding_model,
-                    google_api_key=self.google_api_key
-                )
-            else:
+        # Initialize Gemini embeddings
+        if self.google_api_key and (self.pc or self.is_local):
+            self.embeddings = GoogleGenerativeAIEmbeddings(
+                model=settings.embedding_model,
+                google_api_key=self.google_api_key
+            )
+        else:
+            if not self.google_api_key:
                 logger.warning("Google API key not provided. Embeddings will not work.")
-                self.embeddings = None
+            self.embeddings = None
 
-        # Initialize text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
+        # Cache query embeddings so repeated questions skip the embedding API
+        self.query_cache = EmbeddingCache(
+            max_size=settings.embedding_cache_size,
+            ttl_seconds=settings.embedding_cache_ttl_seconds
         )
 
+        # Persist document embeddings so re-indexing unchanged text skips the API
+        self.embedding_store = (
+            DocumentEmbeddingStore(settings.document_embedding_cache_path)
+            if settings.document_embedding_cache_enabled else None
+        )
+
+        # Initialize text splitter (configurable: character or token-budget chunker)
+        self.text_splitter = create_text_splitter()
+
+        # Change token other processes' response caches check (bumped after every write)
+        self.index_generation = IndexGeneration(settings.index_generation_path)
+
+        # Fitted on the corpus by fit_boilerplate() before documents are prepared
+        self.boilerplate: Optional[BoilerplateDetector] = None
+
         self.index = None
         self.vectorstore = None
+        self.local_index = None
+
+    @property
+    def is_local(self) -> bool:
+        """Whether an in-process index (exact or HNSW) is the selected backend"""
+        return self.backend in ("local", "hnsw")
+
+    @property
+    def index_key(self) -> str:
+        """Identity of the configured index (backend plus index name or path)"""
+        if self.is_local:
+            return f"{self.backend}:{os.path.abspath(self.local_index_path)}"
+        return f"{self.backend}:{self.pinecone_index_name}"
+
+    def generation(self) -> str:
+        """Token that changes whenever any process writes to the configured index"""
+        return self.index_generation.current(self.index_key)
+
+    def _index_changed(self):
+        self.index_generation.bump(self.index_key)
+
+    def _load_local_index(self) -> LocalVectorIndex:
+        """Load the local index from disk, or start an empty one"""
+        if self.local_index is None:
+            if self.backend == "hnsw":
+                if HNSWIndex.exists(self.local_index_path):
+                    self.local_index = HNSWIndex.load(self.local_index_path)
+                    self.local_index.ef_search = settings.hnsw_ef_search
+                else:
+                    self.local_index = HNSWIndex(
+                        dimension=settings.vector_dimension,
+                        metric=settings.vector_metric,
+                        m=settings.hnsw_m,
+                        ef_construction=settings.hnsw_ef_construction,
+                        ef_search=settings.hnsw_ef_search
+                    )
+            elif LocalVectorIndex.exists(self.local_index_path):
+                self.local_index = LocalVectorIndex.load(self.local_index_path)
+            else:
+                self.local_index = LocalVectorIndex(
+                    dimension=settings.vector_dimension,
+                    metric=settings.vector_metric
+                )
+        return self.local_index
 
     def create_index(self):
         """Create Pinecone index if it doesn't exist"""
+        if self.is_local:
+            self._load_local_index()
+            logger.info(f"Using local vector index at {self.local_index_path}")
+            return
+
         try:
             index_names = [idx.name for idx in self.pc.list_indexes()]
             if self.pinecone_index_name not in index_names:
@@ -70,6 +150,10 @@ class VectorStoreService:
 
     def load_vectorstore(self):
         """Load the vector store"""
+        if self.is_local:
+            self._load_local_index()
+            return
+
         try:
             self.vectorstore = Pinecone.from_existing_index(
                 index_name=self.pinecone_index_name,
@@ -80,155 +164,339 @@ class VectorStoreService:
             logger.error(f"Error loading vector store: {e}")
             raise
 
-    def prepare_documents(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def fit_boilerplate(self, data: Iterable[Dict[str, Any]]) -> BoilerplateDetector:
+        """Learn site-wide boilerplate from the corpus so prepared documents exclude it"""
+        self.boilerplate = BoilerplateDetector(
+            shingle_size=settings.boilerplate_shingle_size,
+            min_page_fraction=settings.boilerplate_min_page_fraction
+        ).fit(data)
+        return self.boilerplate
+
+    def prepare_documents(self, data: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Prepare documents for vector storage"""
-        documents = []
-
-        for item in data:
-            # Create main document from content
-            if item.get('content'):
-                content = item['content']
-                if len(content) > 100:  # Only process substantial content
-                    # Split content into chunks
-                    chunks = self.text_splitter.split_text(content)
-
-                    for i, chunk in enumerate(chunks):
-                        documents.append({
-                            'text': chunk,
-                            'metadata': {
-                                'url': item.get('url', ''),
-                                'title': item.get('title', ''),
-                                'product': item.get('product', ''),
-                                'chunk_id': i,
-                                'total_chunks': len(chunks),
-                                'content_type': 'main_content'
-                            }
-                        })
-
-            # Add FAQ items as separate documents
-            for faq in item.get('faq_items', []):
-                if faq.get('question') and faq.get('answer'):
-                    faq_text = f"Question: {faq['question']}\nAnswer: {faq['answer']}"
-                    documents.append({
-                        'text': faq_text,
-                        'metadata': {
-                            'url': item.get('url', ''),
-                            'title': item.get('title', ''),
-                            'product': item.get('product', ''),
-                            'content_type': 'faq',
-                            'question': faq['question']
-                        }
-                    })
-
-            # Add troubleshooting steps
-            for i, step in enumerate(item.get('troubleshooting', [])):
-                if step and len(step) > 20:  # Only substantial steps
-                    documents.append({
-                        'text': step,
-                        'metadata': {
-                            'url': item.get('url', ''),
-                            'title': item.get('title', ''),
-                            'product': item.get('product', ''),
-                            'content_type': 'troubleshooting',
-                            'step_number': i + 1
-                        }
-                    })
-
-        return documents
-
-    def add_documents(self, documents: List[Dict[str, Any]]):
-        """Add documents to the vector store"""
-        try:
-            if not self.vectorstore:
-                self.load_vectorstore()
+        documents = self.iter_documents(data)
+        if settings.dedup_enabled:
+            return self.new_dedup_filter().filter(documents)
+        return list(documents)
+
+    def new_dedup_filter(self) -> NearDuplicateFilter:
+        """Create a near-duplicate filter for one pass over the prepared documents"""
+        return NearDuplicateFilter(
+            threshold=settings.dedup_threshold,
+            num_perm=settings.dedup_num_perm,
+            window=settings.dedup_window
+        )
 
-            # Prepare texts and metadatas
-            texts = [doc['text'] for doc in documents]
-            metadatas = [doc['metadata'] for doc in documents]
+    def iter_documents(self, data: Iterable[Dict[str, Any]], workers: int = None) -> Iterator[Dict[str, Any]]:
+        """Lazily prepare documents page by page, so a streamed corpus is chunked in constant memory
+        
+        With workers > 1 pages are prepared in a process pool; output is
+        identical to (and in the same order as) the serial path.
+        """
+        preparer = DocumentPreparer(self.text_splitter, self.boilerplate)
+        return preparer.iter_documents(
+            data,
+            workers=settings.prepare_workers if workers is None else workers,
+            batch_pages=settings.prepare_batch_pages
+        )
 
-            # Add to vector store
-            self.vectorstore.add_texts(texts=texts, metadatas=metadatas)
+    def add_documents(self, documents: Iterable[Dict[str, Any]],
+                      pipeline: Optional[IngestionPipeline] = None) -> Dict[str, Any]:
+        """Add documents to the vector store through the batched ingestion pipeline (or the one given)"""
+        pipeline = pipeline or IngestionPipeline(self)
+        try:
+            report = pipeline.run(documents)
 
-            logger.info(f"Added {len(documents)} documents to vector store")
+            logger.info(f"Added {report['chunks']} documents to vector store ({report['chunks_per_second']} chunks/sec)")
+            return report
 
         except Exception as e:
             logger.error(f"Error adding documents to vector store: {e}")
             raise
+        finally:
+            # Also after a failed run: some batches may already be written
+            if pipeline.chunks:
+                self._index_changed()
+
+    def sync_documents(self, documents: Iterable[Dict[str, Any]], prune: Union[bool, Callable[[], bool]] = True,
+                       full: bool = False, pipeline: Optional[IngestionPipeline] = None) -> Dict[str, Any]:
+        """Bring the index in line with prepared documents, touching only what changed
+        
+        Document ids are derived from URL + content hash, so unchanged chunks
+        keep their id and are skipped; new or edited chunks are embedded and
+        upserted; with prune=True, indexed ids no longer produced by the
+        corpus (edited/removed chunks, legacy random ids) are deleted.
+        full=True re-embeds every chunk. Documents are consumed as a stream;
+        only their ids are kept in memory. prune may be a callable, decided
+        once the stream is exhausted (e.g. only if a live crawl had no errors).
+        """
+        existing = self.get_indexed_ids()
+        seen: Set[str] = set()
+        counts = {'added': 0, 'unchanged': 0}
+
+        def changed() -> Iterator[Dict[str, Any]]:
+            for doc in documents:
+                # Later duplicates of the same chunk id collapse onto one vector
+                if doc['id'] in seen:
+                    continue
+                seen.add(doc['id'])
+                if full or doc['id'] not in existing:
+                    counts['added'] += 1
+                    yield doc
+                else:
+                    counts['unchanged'] += 1
+
+        ingest = self.add_documents(changed(), pipeline)
+        if callable(prune):
+            prune = prune()
+        to_delete = [doc_id for doc_id in existing if doc_id not in seen] if prune else []
+        if to_delete:
+            self.delete_vectors(to_delete)
+
+        summary = {
+            'added': counts['added'],
+            'deleted': len(to_delete),
+            'unchanged': counts['unchanged'],
+            'ingest': ingest if counts['added'] else None
+        }
+        logger.info(f"Synced vector store: {summary}")
+        return summary
+
+    def get_indexed_ids(self) -> Set[str]:
+        """Get the ids of every vector currently in the index"""
+        if self.is_local:
+            return self._load_local_index().indexed_ids()
+
+        if not self.index:
+            self.index = self.pc.Index(self.pinecone_index_name)
 
-    def search(self, query: str, k: int = 5, filter_dict: Optional[Dict] = None) -> List[Dict[str, Any]]:
-        """Search the vector store"""
-        try:
-            # Check if vector store is available
-            if not self.pinecone_api_key or not self.google_api_key:
-                logger.warning("API keys not available for vector store search")
-                return []
-            
-            if not self.vectorstore:
-                self.load_vectorstore()
-
-            # Perform search
-            results = self.vectorstore.similarity_search_with_score(
-                query=query,
-                k=k,
-                filter=filter_dict
+        ids = set()
+        # Paginated id listing (serverless indexes)
+        for page in self.index.list():
+            ids.update(page)
+        return ids
+
+    def delete_vectors(self, ids: List[str]):
+        """Delete vectors by id"""
+        if self.is_local:
+            self._load_local_index().delete(ids)
+            self.commit()
+        else:
+            if not self.index:
+                self.index = self.pc.Index(self.pinecone_index_name)
+            for start in range(0, len(ids), 1000):
+                self.index.delete(ids=ids[start:start + 1000])
+
+        self._index_changed()
+        logger.info(f"Deleted {len(ids)} vectors from vector store")
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed document texts, reading the on-disk cache first and calling the API for misses"""
+        if self.embedding_store is None:
+            return self._embed_batches(texts)
+
+        model = settings.embedding_model
+        vectors = self.embedding_store.get_many(model, texts, settings.vector_dimension)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            # Written per batch so an interrupted run keeps what it paid for
+            embedded = self._embed_batches(
+                missing_texts,
+                on_batch=lambda batch, batch_vectors: self.embedding_store.put_many(model, batch, batch_vectors)
             )
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+
+        logger.info(f"Embedded {len(texts)} texts ({len(texts) - len(missing)} from disk cache, {len(missing)} via API)")
+        return vectors
+
+    def _embed_batches(self, texts: List[str], on_batch=None) -> List[List[float]]:
+        """Embed texts in API-sized batches, taking embedding quota per batch
+
+        on_batch receives the full-width model output (what the disk cache
+        stores); the returned vectors are fitted to the index dimension.
+        """
+        vectors = []
+        batch_size = settings.embedding_batch_size
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            quota_scheduler.acquire('embed')
+            batch_vectors = self.embeddings.embed_documents(batch)
+            if on_batch:
+                on_batch(batch, batch_vectors)
+            vectors.extend(self._fit_vector(vector) for vector in batch_vectors)
+        return vectors
+
+    @staticmethod
+    def _fit_vector(vector: List[float]) -> List[float]:
+        """Fit a model vector to the index dimension (cached, fresh and query vectors alike)"""
+        return fit_dimension(vector, settings.vector_dimension, settings.embedding_model)
+
+    def upsert_vectors(self, ids: List[str], vectors: List[List[float]], metadatas: List[Dict[str, Any]]):
+        """Write embedded chunks to the configured backend"""
+        if self.is_local:
+            self._load_local_index().add(ids, vectors, metadatas)
+            return
+
+        if not self.index:
+            self.index = self.pc.Index(self.pinecone_index_name)
 
-            # Format results
-            formatted_results = []
-            for doc, score in results:
+        for start in range(0, len(ids), 100):
+            self.index.upsert(vectors=[
+                {'id': vector_id, 'values': list(vector), 'metadata': metadata}
+                for vector_id, vector, metadata in zip(
+                    ids[start:start + 100], vectors[start:start + 100], metadatas[start:start + 100]
+                )
+            ])
+
+    def commit(self):
+        """Persist pending writes (the local index is saved to disk; Pinecone writes are immediate)"""
+        if self.is_local and self.local_index is not None:
+            self.local_index.save(self.local_index_path)
+
+    def _embed_query(self, text: str) -> List[float]:
+        quota_scheduler.acquire('embed')
+        return self._fit_vector(self.embeddings.embed_query(text))
+
+    async def _aembed_query(self, text: str) -> List[float]:
+        await quota_scheduler.aacquire('embed')
+        return self._fit_vector(await self.embeddings.aembed_query(text))
+
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a search query, served from the query embedding cache when possible"""
+        return self.query_cache.get_or_compute(query, self._embed_query)
+
+    async def aembed_query(self, query: str) -> List[float]:
+        """Embed a search query without blocking the event loop"""
+        return await self.query_cache.aget_or_compute(query, self._aembed_query)
+
+    def _search_available(self) -> bool:
+        """Check that the configured backend has what it needs to serve searches"""
+        if self.is_local:
+            if not self.embeddings:
+                logger.warning("Google API key not available for local vector search")
+                return False
+            return True
+
+        # Check if vector store is available
+        if not self.pinecone_api_key or not self.google_api_key:
+            logger.warning("API keys not available for vector store search")
+            return False
+        return True
+
+    def _search_by_vector(self, query_vector: List[float], k: int, filter_dict: Optional[Dict]) -> List[Dict[str, Any]]:
+        """Run a top-k query for an embedded query against the configured backend"""
+        formatted_results = []
+
+        if self.is_local:
+            # Single vectorized top-k over the in-process index
+            for _, score, metadata in self._load_local_index().search(query_vector, k=k, filter_dict=filter_dict):
+                metadata = dict(metadata)
+                content = metadata.pop('text', '')
                 formatted_results.append({
-                    'content': doc.page_content,
-                    'metadata': doc.metadata,
-                    'score': float(score)
+                    'content': content,
+                    'metadata': metadata,
+                    'score': score
                 })
-
             return formatted_results
 
+        if not self.vectorstore:
+            self.load_vectorstore()
+
+        results = self.vectorstore.similarity_search_by_vector_with_score(
+            embedding=query_vector,
+            k=k,
+            filter=filter_dict
+        )
+
+        # Format results
+        for doc, score in results:
+            formatted_results.append({
+                'content': doc.page_content,
+                'metadata': doc.metadata,
+                'score': float(score)
+            })
+
+        return formatted_results
+
+    def search(self, query: str, k: int = 5, filter_dict: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        """Search the vector store (blocking wrapper over asearch)"""
+        return run_sync(self.asearch(query, k, filter_dict))
+
+    async def asearch(self, query: str, k: int = 5, filter_dict: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        """Search the vector store without blocking the event loop"""
+        try:
+            if not self._search_available():
+                return []
+
+            query_vector = await self.aembed_query(query)
+
+            if self.is_local:
+                # In-process top-k is sub-millisecond; no need to leave the loop
+                return self._search_by_vector(query_vector, k, filter_dict)
+
+            # The Pinecone client is synchronous, so run the query on a worker thread
+            return await asyncio.to_thread(self._search_by_vector, query_vector, k, filter_dict)
+
         except Exception as e:
             logger.error(f"Error searching vector store: {e}")
             return []
 
     def search_by_product(self, query: str, product: str, k: int = 5) -> List[Dict[str, Any]]:
-        """Search for a specific product"""
+        """Search for a specific product (blocking wrapper over asearch_by_product)"""
+        return run_sync(self.asearch_by_product(query, product, k))
+
+    async def asearch_by_product(self, query: str, product: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Search for a specific product without blocking the event loop"""
         filter_dict = {'product': product}
-        return self.search(query, k, filter_dict)
+        return await self.asearch(query, k, filter_dict)
 
     def get_product_summary(self, product: str) -> Dict[str, Any]:
-        """Get summary information for a specific product"""
+        """Get summary information for a specific product (blocking wrapper over aget_product_summary)"""
+        return run_sync(self.aget_product_summary(product))
+
+    async def aget_product_summary(self, product: str) -> Dict[str, Any]:
+        """Get summary information for a specific product without blocking the event loop"""
         try:
-            # Search for general information about the product
-            results = self.search_by_product(
+            results = await self.asearch_by_product(
                 query=f"general information about {product}",
                 product=product,
                 k=10
             )
-
-            # Extract unique URLs and titles
-            urls = set()
-            titles = set()
-
-            for result in results:
-                metadata = result['metadata']
-                if metadata.get('url'):
-                    urls.add(metadata['url'])
-                if metadata.get('title'):
-                    titles.add(metadata['title'])
-
-            return {
-                'product': product,
-                'document_count': len(results),
-                'unique_urls': len(urls),
-                'urls': list(urls)[:5],  # Limit to 5 URLs
-                'titles': list(titles)[:5]  # Limit to 5 titles
-            }
+            return self._summarize_product(product, results)
 
         except Exception as e:
             logger.error(f"Error getting product summary: {e}")
             return {'product': product, 'error': str(e)}
 
+    def _summarize_product(self, product: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Summarize search results for a product"""
+        # Extract unique URLs and titles
+        urls = set()
+        titles = set()
+
+        for result in results:
+            metadata = result['metadata']
+            if metadata.get('url'):
+                urls.add(metadata['url'])
+            if metadata.get('title'):
+                titles.add(metadata['title'])
+
+        return {
+            'product': product,
+            'document_count': len(results),
+            'unique_urls': len(urls),
+            'urls': list(urls)[:5],  # Limit to 5 URLs
+            'titles': list(titles)[:5]  # Limit to 5 titles
+        }
+
     def get_all_products(self) -> List[str]:
         """Get list of all products in the vector store"""
         try:
+            if self.is_local:
+                return self._load_local_index().distinct('product')
+
             if not self.index:
                 self.index = self.pc.Index(self.pinecone_index_name)
 
@@ -253,8 +521,16 @@ class VectorStoreService:
     def delete_index(self):
         """Delete the Pinecone index"""
         try:
+            if self.is_local:
+                LocalVectorIndex.remove(self.local_index_path)
+                self.local_index = None
+                self._index_changed()
+                logger.info(f"Deleted local index: {self.local_index_path}")
+                return
+
             if self.pinecone_index_name in [idx.name for idx in self.pc.list_indexes()]:
                 self.pc.delete_index(self.pinecone_index_name)
+                self._index_changed()
                 logger.info(f"Deleted Pinecone index: {self.pinecone_index_name}")
         except Exception as e:
             logger.error(f"Error deleting index: {e}")
@@ -262,6 +538,13 @@ class VectorStoreService:
     def get_index_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store"""
         try:
+            if self.is_local:
+                stats = self._load_local_index().stats()
+                stats['embedding_cache'] = self.query_cache.stats()
+                if self.embedding_store:
+                    stats['document_embedding_cache'] = self.embedding_store.stats()
+                return stats
+
             if not self.index:
                 self.index = self.pc.Index(self.pinecone_index_name)
 
@@ -271,7 +554,9 @@ class VectorStoreService:
                 'total_vector_count': stats.total_vector_count,
                 'dimension': stats.dimension,
                 'index_fullness': stats.index_fullness,
-                'namespaces': stats.namespaces
+                'namespaces': stats.namespaces,
+                'embedding_cache': self.query_cache.stats(),
+                'document_embedding_cache': self.embedding_store.stats() if self.embedding_store else None
             }
 
         except Exception as e:
@@ -1,4 +1,4 @@
-import json
+import argparse
 import os
 import sys
 from pathlib import Path
@@ -7,56 +7,89 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent))
 
 from app.services.vector_store import VectorStoreService
+from app.services.quota_scheduler import quota_scheduler, Priority
+from app.scrapers.corpus import iter_corpus, find_corpus
 from app.core.config import settings
 
-def load_data_to_vectorstore():
-    """Load scraped Apple support data into the vector store"""
+def load_data_to_vectorstore(full: bool = False, prune: bool = True, workers: int = None):
+    """Load scraped Apple support data into the vector store
+    
+    Only chunks whose content changed since the last run are embedded and
+    upserted; chunks no longer in the corpus are deleted (unless prune=False).
+    Pass full=True to re-embed everything, and workers > 1 to chunk pages
+    in a process pool.
+    """
+    
+    # Indexing is bulk work: yield Gemini quota to live chat
+    quota_scheduler.set_process_priority(Priority.BULK)
     
     # Initialize vector store service
     vector_store = VectorStoreService()
     
-    # Load scraped data
-    data_file = Path(__file__).parent.parent / "data" / "apple_support_data.json"
+    # Locate scraped data (JSON Lines preferred, legacy JSON array accepted)
+    data_dir = Path(__file__).parent.parent / "data"
+    data_file = find_corpus(str(data_dir))
     
-    if not data_file.exists():
-        print(f"Error: Data file not found at {data_file}")
+    if not data_file:
+        print(f"Error: No apple_support_data.jsonl or .json found in {data_dir}")
         return
     
-    print(f"Loading data from {data_file}")
+    print(f"Streaming data from {data_file}")
     
-    with open(data_file, 'r', encoding='utf-8') as f:
-        scraped_data = json.load(f)
+    # Pages are counted as they stream past, never held in memory
+    products = {}
     
-    print(f"Found {len(scraped_data)} pages to index")
+    def pages():
+        for item in iter_corpus(data_file):
+            product = item.get('product', 'Unknown')
+            products[product] = products.get(product, 0) + 1
+            yield item
     
     try:
         # Create index if it doesn't exist
-        print("Creating/checking Pinecone index...")
+        print(f"Creating/checking {settings.vector_backend} vector index...")
         vector_store.create_index()
         
         # Load vector store
         print("Loading vector store...")
         vector_store.load_vectorstore()
         
-        # Prepare documents for indexing
-        print("Preparing documents for indexing...")
-        documents = vector_store.prepare_documents(scraped_data)
+        # First pass: learn navigation/footer text repeated across pages
+        if settings.boilerplate_strip_enabled:
+            print("Detecting boilerplate across pages...")
+            vector_store.fit_boilerplate(iter_corpus(data_file))
         
-        print(f"Prepared {len(documents)} documents for indexing")
+        # Chunk pages lazily and sync them with what is already indexed
+        print("Preparing and syncing documents with vector store...")
+        documents = vector_store.iter_documents(pages(), workers=workers)
         
-        # Add documents to vector store
-        print("Adding documents to vector store...")
-        vector_store.add_documents(documents)
+        # Collapse near-duplicate chunks (overlapping list selectors, chunk overlap, mirrored pages)
+        dedup = vector_store.new_dedup_filter() if settings.dedup_enabled else None
+        if dedup:
+            documents = dedup.iter_filter(documents)
         
-        print("✅ Successfully indexed all Apple support data!")
+        summary = vector_store.sync_documents(documents, prune=prune, full=full)
         
-        # Print summary
-        products = {}
-        for item in scraped_data:
-            product = item.get('product', 'Unknown')
-            products[product] = products.get(product, 0) + 1
+        print(f"✅ Successfully indexed all Apple support data! "
+              f"({summary['added']} added, {summary['deleted']} deleted, {summary['unchanged']} unchanged)")
+        if summary['ingest']:
+            ingest = summary['ingest']
+            print(f"Throughput: {ingest['chunks_per_second']} chunks/sec "
+                  f"({ingest['chunks']} chunks in {ingest['seconds']}s, "
+                  f"{ingest['skipped_chunks']} resumed from checkpoint)")
+        
+        if vector_store.boilerplate:
+            boilerplate = vector_store.boilerplate.stats()
+            print(f"Boilerplate stripped: {boilerplate['removed_fraction']:.1%} of page text, "
+                  f"{boilerplate['blocks_removed']} repeated list items")
+        
+        if dedup:
+            duplicates = dedup.stats()
+            print(f"Near-duplicates removed: {duplicates['documents_seen'] - duplicates['kept']} "
+                  f"of {duplicates['documents_seen']} chunks")
         
-        print("\nIndexing Summary:")
+        # Print summary
+        print(f"\nIndexing Summary ({sum(products.values())} pages):")
         for product, count in products.items():
             print(f"  {product}: {count} pages")
             
@@ -66,4 +99,10 @@ def load_data_to_vectorstore():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    load_data_to_vectorstore() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Index scraped Apple support data")
+    parser.add_argument('--full', action='store_true', help="Re-embed and upsert every chunk")
+    parser.add_argument('--no-prune', action='store_true', help="Keep indexed chunks that are no longer in the corpus")
+    parser.add_argument('--workers', type=int, help="Worker processes for document preparation (default: PREPARE_WORKERS)")
+    args = parser.parse_args()
+    
+    load_data_to_vectorstore(full=args.full, prune=not args.no_prune, workers=args.workers) 
\ No newline at end of file
@@ -0,0 +1,266 @@
+import argparse
+import asyncio
+import os
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse
+
+# Add the app directory to the Python path
+sys.path.append(str(Path(__file__).parent))
+
+from app.services.vector_store import VectorStoreService
+from app.services.ingestion import IngestionPipeline
+from app.services.quota_scheduler import quota_scheduler, Priority
+from app.scrapers.async_crawler import AsyncCrawler
+from app.scrapers.corpus import CorpusWriter, iter_corpus, find_corpus
+from app.scrapers.frontier import CrawlFrontier
+from app.scrapers.http_cache import HTTPCache
+from app.core.config import settings
+from simple_scraper import SimpleAppleScraper
+
+# Page queue sentinel: the crawl has finished
+_DONE = object()
+
+class QueueMonitor:
+    """Samples the occupancy of bounded stage queues in the background"""
+
+    def __init__(self, queues: Dict[str, queue.Queue], interval: float = 0.2):
+        self.queues = queues
+        self.interval = interval
+        self.samples: Dict[str, list] = {name: [] for name in queues}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            for name, stage_queue in self.queues.items():
+                self.samples[name].append(stage_queue.qsize())
+
+    def start(self) -> "QueueMonitor":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Per queue: capacity, mean/max depth and the fraction of samples it was full or empty"""
+        report = {}
+        for name, stage_queue in self.queues.items():
+            samples = self.samples[name] or [0]
+            capacity = stage_queue.maxsize
+            report[name] = {
+                'capacity': capacity,
+                'mean': round(sum(samples) / len(samples), 2),
+                'max': max(samples),
+                'full_fraction': round(sum(1 for s in samples if s >= capacity) / len(samples), 3),
+                'empty_fraction': round(sum(1 for s in samples if s == 0) / len(samples), 3)
+            }
+        return report
+
+def find_bottleneck(occupancy: Dict[str, Dict[str, Any]]) -> str:
+    """The stage consuming the fullest queue; if every queue is mostly empty, fetching is the limit"""
+    consumers = {'pages': 'prepare (extract/chunk)', 'embed': 'embed', 'upsert': 'upsert'}
+    name, stats = max(occupancy.items(), key=lambda item: item[1]['mean'] / max(1, item[1]['capacity']))
+    if stats['mean'] / max(1, stats['capacity']) < 0.5:
+        return 'fetch'
+    return consumers[name]
+
+def ingest(base_url: str = "https://support.apple.com", depth: int = 0, max_pages: Optional[int] = None,
+           concurrency: int = 16, per_host: int = 4, delay: float = 0.25, use_cache: bool = True,
+           max_pending_pages: int = 64, workers: Optional[int] = None, full: bool = False,
+           prune: bool = False, output: Optional[str] = None):
+    """Crawl, extract, chunk, embed and upsert Apple support pages in one pipelined run
+
+    The async crawler feeds pages into a bounded queue; the main thread
+    chunks them (prepare_documents-style, optionally in a process pool)
+    and streams the chunks into the IngestionPipeline's embed and upsert
+    workers, so every stage runs at once. Chunks already indexed (same
+    content hash, e.g. pages answered 304 by the HTTP cache) are skipped.
+    Pages are also written to the corpus file so index_data.py can
+    rebuild from it; they go to `<output>.partial` first, which replaces
+    the corpus only once the crawl is complete (no errors, not cut short by
+    max_pages), so a partial crawl never shrinks the corpus that
+    index_data.py prunes against. With prune=True, chunks of pages no
+    longer produced are deleted, again only after a complete crawl.
+    """
+
+    # Indexing is bulk work: yield Gemini quota to live chat
+    quota_scheduler.set_process_priority(Priority.BULK)
+
+    data_dir = Path(__file__).parent.parent / "data"
+    output = output or str(data_dir / "apple_support_data.jsonl")
+    partial_output = f"{output}.partial"
+
+    vector_store = VectorStoreService()
+    print(f"Creating/checking {settings.vector_backend} vector index...")
+    vector_store.create_index()
+    vector_store.load_vectorstore()
+
+    # Boilerplate is learned from the previous crawl; pages stream through once
+    previous_corpus = find_corpus(str(data_dir))
+    if settings.boilerplate_strip_enabled and previous_corpus:
+        print(f"Detecting boilerplate from the previous crawl ({previous_corpus})...")
+        vector_store.fit_boilerplate(iter_corpus(previous_corpus))
+
+    scraper = SimpleAppleScraper(base_url=base_url)
+    crawler = AsyncCrawler(
+        extractor=scraper,
+        concurrency=concurrency,
+        per_host_concurrency=per_host,
+        per_host_delay=delay,
+        cache=HTTPCache(str(data_dir / "http_cache.sqlite3")) if use_cache else None
+    )
+    seeds = scraper.get_support_pages()
+    frontier = CrawlFrontier(max_depth=depth, allowed_hosts={urlparse(url).hostname for url in seeds})
+
+    page_queue: queue.Queue = queue.Queue(maxsize=max_pending_pages)
+    stopping = threading.Event()
+    crawl_error = []
+
+    def put(item) -> bool:
+        # Blocking put that gives up if the consuming side has failed
+        while not stopping.is_set():
+            try:
+                page_queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run_crawl():
+        async def enqueue(page: Dict[str, Any]):
+            # Blocks a worker thread, not the event loop, while the queue is full
+            if not await asyncio.to_thread(put, page):
+                raise RuntimeError("Ingestion stopped")
+
+        try:
+            crawler.crawl(seeds, frontier=frontier, max_pages=max_pages, on_page=enqueue)
+        except BaseException as e:
+            if not stopping.is_set():
+                crawl_error.append(e)
+        finally:
+            put(_DONE)
+
+    prepare = {'pages': 0, 'wait_seconds': 0.0}
+
+    def incomplete_reason() -> Optional[str]:
+        # None once every page was fetched without errors and max_pages did not stop the crawl early
+        if crawl_error:
+            return "the crawl failed"
+        if crawler.errors:
+            return f"{crawler.errors} page errors"
+        if frontier or (max_pages is not None and prepare['pages'] >= max_pages):
+            return f"stopped at max_pages={max_pages}"
+        return None
+
+    products = {}
+
+    def pages(writer: CorpusWriter):
+        while True:
+            started = time.monotonic()
+            page = page_queue.get()
+            prepare['wait_seconds'] += time.monotonic() - started
+            if page is _DONE:
+                return
+            writer.write(page)
+            prepare['pages'] += 1
+            product = page.get('product', 'Unknown')
+            products[product] = products.get(product, 0) + 1
+            yield page
+
+    pipeline = IngestionPipeline(vector_store)
+    monitor = QueueMonitor({'pages': page_queue, **pipeline.queues()})
+
+    print(f"Ingesting from {base_url} (depth {depth}, {concurrency} concurrent fetches)...")
+    started = time.monotonic()
+    crawler_thread = threading.Thread(target=run_crawl, daemon=True)
+    crawler_thread.start()
+    monitor.start()
+
+    try:
+        with CorpusWriter(partial_output) as writer:
+            documents = vector_store.iter_documents(pages(writer), workers=workers)
+            dedup = vector_store.new_dedup_filter() if settings.dedup_enabled else None
+            if dedup:
+                documents = dedup.iter_filter(documents)
+
+            def safe_to_prune() -> bool:
+                reason = incomplete_reason()
+                if prune and reason:
+                    print(f"⚠️  Not pruning: the crawl was incomplete ({reason})")
+                    return False
+                return prune
+
+            summary = vector_store.sync_documents(documents, prune=safe_to_prune, full=full, pipeline=pipeline)
+    except Exception as e:
+        print(f"❌ Error ingesting data: {e}")
+        import traceback
+        traceback.print_exc()
+        return
+    finally:
+        # Also on Ctrl-C: a crawler blocked on the full page queue gives up instead of hanging the join
+        stopping.set()
+        monitor.stop()
+        crawler_thread.join()
+
+    elapsed = time.monotonic() - started
+    if crawl_error:
+        print(f"❌ Crawl failed: {crawl_error[0]}")
+    reason = incomplete_reason()
+    if reason:
+        print(f"⚠️  Crawl incomplete ({reason}): kept the previous corpus at {output}, "
+              f"this crawl's pages are in {partial_output}")
+    else:
+        os.replace(partial_output, output)
+        print(f"Saved {writer.count} pages to {output}")
+
+    crawl = crawler.stats()
+    indexing = summary['ingest'] or pipeline.report(elapsed)
+    occupancy = monitor.report()
+
+    print(f"✅ Ingested {prepare['pages']} pages in {elapsed:.1f}s "
+          f"({summary['added']} chunks added, {summary['deleted']} deleted, {summary['unchanged']} unchanged)")
+    print("\nStage throughput:")
+    print(f"  fetch+extract  {crawl['pages']} pages, {crawl['pages_per_second']} pages/sec "
+          f"({crawl['unchanged']} unchanged since last crawl, {crawl['errors']} errors, {crawl['retries']} retries)")
+    print(f"  prepare        {prepare['pages'] / elapsed:.2f} pages/sec "
+          f"({prepare['wait_seconds']:.1f}s waiting for pages)")
+    print(f"  embed          {indexing['chunks']} chunks, {indexing['embed_seconds']}s busy across workers")
+    print(f"  upsert         {indexing['chunks']} chunks, {indexing['upsert_seconds']}s busy across workers "
+          f"({indexing['chunks_per_second']} chunks/sec end to end)")
+    print("\nQueue occupancy:")
+    for name, stats in occupancy.items():
+        print(f"  {name:<7} mean {stats['mean']}/{stats['capacity']}, max {stats['max']}, "
+              f"full {stats['full_fraction']:.0%}, empty {stats['empty_fraction']:.0%}")
+    print(f"Likely bottleneck: {find_bottleneck(occupancy)}")
+
+    print(f"\nIngestion Summary ({sum(products.values())} pages):")
+    for product, count in products.items():
+        print(f"  {product}: {count} pages")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl and index Apple support pages in one pipelined run")
+    parser.add_argument('--base-url', default="https://support.apple.com", help="Site to crawl (e.g. the fixture server)")
+    parser.add_argument('--depth', type=int, default=0, help="Follow links this many hops from the seed pages")
+    parser.add_argument('--max-pages', type=int, help="Stop after this many pages with content")
+    parser.add_argument('--concurrency', type=int, default=16, help="Max requests in flight overall")
+    parser.add_argument('--per-host', type=int, default=4, help="Max requests in flight per host")
+    parser.add_argument('--delay', type=float, default=0.25, help="Min seconds between request starts per host")
+    parser.add_argument('--no-cache', action='store_true', help="Fetch every page in full (no conditional GETs)")
+    parser.add_argument('--max-pending-pages', type=int, default=64, help="Pages buffered between fetch and chunking")
+    parser.add_argument('--workers', type=int, help="Worker processes for document preparation (default: PREPARE_WORKERS)")
+    parser.add_argument('--full', action='store_true', help="Re-embed and upsert every chunk")
+    parser.add_argument('--prune', action='store_true', help="Delete indexed chunks not produced by this crawl (skipped if it had errors)")
+    parser.add_argument('--output', help="Corpus file to write (default: data/apple_support_data.jsonl)")
+    args = parser.parse_args()
+
+    ingest(base_url=args.base_url, depth=args.depth, max_pages=args.max_pages, concurrency=args.concurrency,
+           per_host=args.per_host, delay=args.delay, use_cache=not args.no_cache,
+           max_pending_pages=args.max_pending_pages, workers=args.workers, full=args.full,
+           prune=args.prune, output=args.output)
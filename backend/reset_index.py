@@ -27,6 +27,8 @@ def reset_pinecone_index():
         print("✅ New index created successfully")
         
         print(f"Index '{settings.pinecone_index_name}' reset with {settings.vector_dimension} dimensions")
+        if vector_store.embedding_store:
+            print(f"Document embeddings cached at {settings.document_embedding_cache_path} will be reused by index_data.py")
         
     except Exception as e:
         print(f"❌ Error resetting index: {e}")
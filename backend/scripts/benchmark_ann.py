@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Recall vs latency report for the local HNSW index
+
+Builds HNSW indexes with different (M, ef_construction) settings over the
+same vectors, sweeps ef_search, and compares every query against the exact
+LocalVectorIndex top-k. Vectors come from an existing local index
+(--index-path) or a synthetic clustered corpus (--n / --dim).
+
+Usage:
+    python scripts/benchmark_ann.py --n 20000 --dim 768 --m 8 16 32 --ef 16 32 64 128
+    python scripts/benchmark_ann.py --index-path ../data/local_index
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import List, Dict, Any
+
+import numpy as np
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.local_index import LocalVectorIndex
+from app.services.hnsw_index import HNSWIndex
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+
+def synthetic_corpus(n: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """Generate clustered gaussian vectors, roughly shaped like topic embeddings"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    assignments = rng.integers(0, clusters, size=n)
+    return (centers[assignments] + 0.5 * rng.normal(size=(n, dim))).astype(np.float32)
+
+def percentile_ms(samples: List[float], pct: float) -> float:
+    return round(float(np.percentile(samples, pct)) * 1000, 3)
+
+def run_benchmark(vectors: np.ndarray, queries: np.ndarray, k: int, ms: List[int],
+                  ef_construction: int, efs: List[int]) -> Dict[str, Any]:
+    """Measure exact search and each HNSW setting on the same queries"""
+    ids = [str(i) for i in range(len(vectors))]
+    metadatas = [{} for _ in ids]
+
+    exact = LocalVectorIndex(dimension=vectors.shape[1])
+    exact.add(ids, vectors, metadatas)
+
+    truth = []
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        truth.append({r[0] for r in exact.search(query, k)})
+        latencies.append(time.perf_counter() - start)
+
+    report = {
+        'vectors': len(vectors),
+        'dimension': int(vectors.shape[1]),
+        'queries': len(queries),
+        'k': k,
+        'exact': {
+            'p50_ms': percentile_ms(latencies, 50),
+            'p99_ms': percentile_ms(latencies, 99)
+        },
+        'hnsw': []
+    }
+
+    for m in ms:
+        index = HNSWIndex(dimension=vectors.shape[1], m=m, ef_construction=ef_construction)
+        start = time.perf_counter()
+        # Build incrementally, as index_data.py does batch by batch
+        for offset in range(0, len(vectors), 1000):
+            index.add(ids[offset:offset + 1000], vectors[offset:offset + 1000], metadatas[offset:offset + 1000])
+        build_seconds = time.perf_counter() - start
+
+        for ef in efs:
+            recall = 0.0
+            latencies = []
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                found = {r[0] for r in index.search(query, k, ef=ef)}
+                latencies.append(time.perf_counter() - start)
+                recall += len(found & expected) / len(expected)
+
+            row = {
+                'm': m,
+                'ef_construction': ef_construction,
+                'ef_search': ef,
+                'build_seconds': round(build_seconds, 2),
+                'recall': round(recall / len(queries), 4),
+                'p50_ms': percentile_ms(latencies, 50),
+                'p99_ms': percentile_ms(latencies, 99)
+            }
+            report['hnsw'].append(row)
+            print(f"  M={m:<3} ef={ef:<4} recall@{k}={row['recall']:.4f}  p50={row['p50_ms']}ms  p99={row['p99_ms']}ms")
+
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="HNSW recall vs latency report")
+    parser.add_argument('--index-path', help="Benchmark on vectors from an existing local index")
+    parser.add_argument('--n', type=int, default=20000, help="Synthetic corpus size")
+    parser.add_argument('--dim', type=int, default=768, help="Synthetic vector dimension")
+    parser.add_argument('--clusters', type=int, default=200)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--m', type=int, nargs='+', default=[8, 16, 32])
+    parser.add_argument('--ef-construction', type=int, default=200)
+    parser.add_argument('--ef', type=int, nargs='+', default=[16, 32, 64, 128, 256])
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.index_path:
+        vectors = LocalVectorIndex.load(args.index_path).vectors.copy()
+        # Perturbed corpus vectors stand in for real queries
+        picks = rng.integers(0, len(vectors), size=args.queries)
+        queries = vectors[picks] + 0.05 * rng.normal(size=(args.queries, vectors.shape[1])).astype(np.float32)
+    else:
+        vectors = synthetic_corpus(args.n + args.queries, args.dim, args.clusters, args.seed)
+        vectors, queries = vectors[:args.n], vectors[args.n:]
+
+    print(f"Benchmarking {len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, k={args.k}")
+    report = run_benchmark(vectors, queries, args.k, args.m, args.ef_construction, args.ef)
+    print(f"  exact             recall@{args.k}=1.0000  p50={report['exact']['p50_ms']}ms  p99={report['exact']['p99_ms']}ms")
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    report_file = os.path.join(DATA_DIR, f"ann_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_file, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved to: {report_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Chunker comparison: RecursiveCharacterTextSplitter vs TokenBudgetChunker
+
+For each chunker, reports chunk count, embedding volume (characters and
+estimated tokens embedded, and how much of it is overlap), chunk size
+distribution, chunking throughput, and retrieval recall@k.
+
+Recall uses answer sentences sampled from the corpus: the query is a
+random subset of a sentence's words, and a hit means a top-k chunk
+contains the whole sentence. Retrieval is lexical TF-IDF by default (no
+API calls); --embed uses Gemini embeddings through the vector store's
+on-disk embedding cache.
+
+Usage:
+    python scripts/benchmark_chunkers.py
+    python scripts/benchmark_chunkers.py --max-tokens 128 256 384 --overlap 0 32 --scale 50
+    python scripts/benchmark_chunkers.py --embed --k 3
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from typing import List, Dict, Any
+
+import numpy as np
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scrapers.corpus import iter_corpus, find_corpus
+from app.services.chunking import TokenBudgetChunker, estimate_tokens, split_sentences
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r'\w+', text.lower())
+
+def sample_queries(pages: List[str], per_page: int, seed: int) -> List[Dict[str, str]]:
+    """Pick answer sentences and build partial-word queries for them"""
+    rng = random.Random(seed)
+    queries = []
+    for content in pages:
+        sentences = [s for s in split_sentences(content) if 8 <= len(s.split()) <= 40]
+        for sentence in rng.sample(sentences, min(per_page, len(sentences))):
+            words = sentence.split()
+            keep = sorted(rng.sample(range(len(words)), max(4, int(len(words) * 0.6))))
+            queries.append({'query': ' '.join(words[i] for i in keep), 'answer': sentence})
+    return queries
+
+class TfidfRetriever:
+    """Minimal lexical retriever used as an offline recall proxy"""
+
+    def __init__(self, chunks: List[str]):
+        self.docs = [Counter(tokenize(chunk)) for chunk in chunks]
+        df = Counter(term for doc in self.docs for term in doc)
+        self.idf = {term: math.log(len(self.docs) / count) + 1 for term, count in df.items()}
+        self.norms = [math.sqrt(sum((tf * self.idf[t]) ** 2 for t, tf in doc.items())) or 1.0 for doc in self.docs]
+
+    def search(self, query: str, k: int) -> List[int]:
+        terms = Counter(tokenize(query))
+        scores = []
+        for i, doc in enumerate(self.docs):
+            score = sum(tf * doc.get(t, 0) * self.idf.get(t, 0) ** 2 for t, tf in terms.items())
+            scores.append(score / self.norms[i])
+        return list(np.argsort(scores)[::-1][:k])
+
+class EmbeddingRetriever:
+    """Gemini-embedding retriever (uses the vector store's disk embedding cache)"""
+
+    def __init__(self, chunks: List[str]):
+        from app.services.vector_store import VectorStoreService
+        from app.services.local_index import LocalVectorIndex
+        self.vector_store = VectorStoreService()
+        vectors = self.vector_store.embed_texts(chunks)
+        self.index = LocalVectorIndex(dimension=len(vectors[0]))
+        self.index.add([str(i) for i in range(len(chunks))], vectors, [{} for _ in chunks])
+
+    def search(self, query: str, k: int) -> List[int]:
+        return [int(r[0]) for r in self.index.search(self.vector_store.embed_query(query), k)]
+
+def evaluate(name: str, splitter, pages: List[str], queries: List[Dict[str, str]],
+             k: int, scale: int, embed: bool) -> Dict[str, Any]:
+    """Chunk the corpus with one splitter and measure volume, speed and recall"""
+    start = time.perf_counter()
+    for _ in range(scale):
+        chunks = [chunk for content in pages for chunk in splitter.split_text(content)]
+    seconds = (time.perf_counter() - start) / scale
+
+    source_tokens = sum(estimate_tokens(content) for content in pages)
+    chunk_tokens = [estimate_tokens(chunk) for chunk in chunks]
+
+    retriever = EmbeddingRetriever(chunks) if embed else TfidfRetriever(chunks)
+    hits = 0
+    for query in queries:
+        found = retriever.search(query['query'], k)
+        if any(query['answer'] in chunks[i] for i in found):
+            hits += 1
+
+    row = {
+        'chunker': name,
+        'chunks': len(chunks),
+        'embedded_chars': sum(len(chunk) for chunk in chunks),
+        'embedded_tokens': sum(chunk_tokens),
+        'overlap_fraction': round(1 - source_tokens / max(1, sum(chunk_tokens)), 4),
+        'tokens_p50': int(np.percentile(chunk_tokens, 50)),
+        'tokens_p95': int(np.percentile(chunk_tokens, 95)),
+        'tokens_max': max(chunk_tokens),
+        'pages_per_second': round(len(pages) / seconds, 1) if seconds else None,
+        'seconds_per_100k_pages': round(seconds / len(pages) * 100000, 2),
+        f'recall@{k}': round(hits / len(queries), 4) if queries else None
+    }
+    print(f"  {name:<28} chunks={row['chunks']:<6} tokens={row['embedded_tokens']:<8} "
+          f"overlap={row['overlap_fraction']:.1%}  p95={row['tokens_p95']:<4} "
+          f"recall@{k}={row[f'recall@{k}']}  {row['pages_per_second']} pages/s")
+    return row
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare document chunkers")
+    parser.add_argument('--corpus', help="Corpus file (.jsonl or .json); defaults to data/apple_support_data.*")
+    parser.add_argument('--max-tokens', type=int, nargs='+', default=[256])
+    parser.add_argument('--overlap', type=int, nargs='+', default=[0, 32])
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--queries-per-page', type=int, default=5)
+    parser.add_argument('--scale', type=int, default=20, help="Chunk the corpus this many times when timing")
+    parser.add_argument('--embed', action='store_true', help="Measure recall with Gemini embeddings instead of TF-IDF")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = args.corpus or find_corpus(DATA_DIR)
+    if not corpus:
+        print("Error: no corpus found; run a scraper first or pass --corpus")
+        return
+
+    # Identical pages would make recall ambiguous, so keep one copy of each
+    pages = list(dict.fromkeys(page['content'] for page in iter_corpus(corpus) if page.get('content')))
+    queries = sample_queries(pages, args.queries_per_page, args.seed)
+    print(f"Benchmarking chunkers on {len(pages)} pages from {corpus}, {len(queries)} queries, k={args.k}")
+
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    splitters = [('recursive chars=1000/200', RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, length_function=len))]
+    for max_tokens in args.max_tokens:
+        for overlap in args.overlap:
+            if overlap < max_tokens:
+                splitters.append((f'token max={max_tokens}/{overlap}', TokenBudgetChunker(max_tokens, overlap)))
+
+    report = {
+        'corpus': corpus,
+        'pages': len(pages),
+        'queries': len(queries),
+        'k': args.k,
+        'retriever': 'gemini-embedding' if args.embed else 'tfidf',
+        'results': [evaluate(name, splitter, pages, queries, args.k, args.scale, args.embed)
+                    for name, splitter in splitters]
+    }
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    report_file = os.path.join(DATA_DIR, f"chunker_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_file, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved to: {report_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+HTML extraction benchmark: legacy per-selector BeautifulSoup vs single-pass extract_page
+
+Times per-page extraction on saved HTML fixtures and compares output:
+parse time (mean/p50/p95 ms, pages/sec), FAQ pairs and steps emitted,
+duplicates among them, and how many of the legacy items the single-pass
+engine also finds (normalized text).
+
+Fixtures come from --fixtures (a directory of .html files), --cache (the
+scrapers' HTTP cache), or are synthesized once from the scraped corpus
+into data/html_fixtures/ (page furniture, paragraphs, step lists, FAQ
+blocks; git-ignored) and reused on later runs. The report is written to
+data/ at the repository root, wherever the script is run from.
+
+Usage:
+    python scripts/benchmark_extraction.py
+    python scripts/benchmark_extraction.py --cache ../data/http_cache.sqlite3 --repeat 20
+    python scripts/benchmark_extraction.py --fixtures ../data/html_fixtures
+"""
+
+import argparse
+import hashlib
+import html as html_lib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+from bs4 import BeautifulSoup
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scrapers.corpus import iter_corpus, find_corpus
+from app.scrapers.extraction import extract_page, lxml
+from app.services.chunking import split_sentences
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+
+def legacy_extract(html) -> Dict[str, Any]:
+    """The scrapers' previous extraction: html.parser, one soup.select per selector"""
+    soup = BeautifulSoup(html, 'html.parser')
+    title = soup.find('title')
+    main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content') or soup.find('body')
+    if main_content:
+        for script in main_content(["script", "style", "nav", "header", "footer"]):
+            script.decompose()
+        content = main_content.get_text(separator=' ', strip=True)
+    else:
+        content = soup.get_text(separator=' ', strip=True)
+
+    faq_items = []
+    for selector in ['div[class*="faq"]', 'div[class*="accordion"]', 'details', 'div[class*="question"]', 'h3', 'h4', 'h5']:
+        for element in soup.select(selector):
+            text = element.get_text(strip=True)
+            if text and len(text) > 10 and '?' in text:
+                next_elem = element.find_next_sibling(['p', 'div'])
+                if next_elem:
+                    answer = next_elem.get_text(strip=True)
+                    if answer and len(answer) > 20:
+                        faq_items.append({'question': text, 'answer': answer})
+
+    troubleshooting = []
+    for selector in ['ol li', 'div[class*="step"]', 'div[class*="troubleshoot"]', 'li']:
+        for element in soup.select(selector):
+            text = element.get_text(strip=True)
+            if text and len(text) > 20:
+                troubleshooting.append(text)
+
+    return {
+        'title': title.get_text(strip=True) if title else '',
+        'content': ' '.join(content.split()),
+        'faq_items': faq_items,
+        'troubleshooting': troubleshooting
+    }
+
+def synthesize_page(page: Dict[str, Any]) -> str:
+    """Render a corpus record as a support-article-like HTML page"""
+    e = html_lib.escape
+    nav = ''.join(f'<li><a href="/{name.lower().replace(" ", "-")}">{e(name)}</a></li>'
+                  for name in ['Store', 'Mac', 'iPad', 'iPhone', 'Watch', 'AirPods', 'TV & Home', 'Support'])
+    sentences = split_sentences(page.get('content', ''))
+    paragraphs = ''.join(f'<p>{e(" ".join(sentences[i:i + 4]))}</p>' for i in range(0, len(sentences), 4))
+    steps = ''.join(f'<li><span class="step-text">{e(step)}</span></li>' for step in page.get('troubleshooting', []))
+    faqs = ''.join(
+        f'<div class="faq-item"><h3>{e(faq["question"])}</h3><p>{e(faq["answer"])}</p></div>'
+        f'<details><summary>{e(faq["question"])}</summary><div>{e(faq["answer"])}</div></details>'
+        for faq in page.get('faq_items', [])
+    )
+    return (
+        f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>{e(page.get("title", ""))}</title>'
+        '<style>body{font-family:sans-serif}</style><script>window.analytics = {};</script></head><body>'
+        f'<header><nav class="globalnav"><ul>{nav}</ul></nav></header>'
+        f'<main><article><h1>{e(page.get("title", ""))}</h1>{paragraphs}'
+        f'<section class="troubleshooting"><ol>{steps}</ol></section>'
+        f'<section class="faq">{faqs}</section></article></main>'
+        f'<footer><ul>{nav}</ul><p>Copyright &copy; Apple Inc. All rights reserved.</p></footer>'
+        '<script>console.log("loaded");</script></body></html>'
+    )
+
+def load_fixtures(args) -> Tuple[List[Tuple[str, bytes]], str]:
+    """Collect (name, html) fixtures from a directory, the HTTP cache, or the corpus"""
+    if args.cache:
+        from app.scrapers.http_cache import HTTPCache
+        return list(HTTPCache(args.cache).iter_html()), args.cache
+
+    fixtures_dir = args.fixtures or os.path.join(DATA_DIR, 'html_fixtures')
+    if not args.fixtures and not os.path.isdir(fixtures_dir):
+        corpus = find_corpus(DATA_DIR)
+        if not corpus:
+            return [], fixtures_dir
+        os.makedirs(fixtures_dir, exist_ok=True)
+        for page in iter_corpus(corpus):
+            if page.get('content'):
+                name = hashlib.sha1(page['url'].encode('utf-8')).hexdigest()[:12]
+                with open(os.path.join(fixtures_dir, f"{name}.html"), 'w', encoding='utf-8') as f:
+                    f.write(synthesize_page(page))
+        print(f"Synthesized fixtures from {corpus} into {fixtures_dir}")
+
+    fixtures = []
+    if not os.path.isdir(fixtures_dir):
+        return fixtures, fixtures_dir
+    for name in sorted(os.listdir(fixtures_dir)):
+        if name.endswith('.html'):
+            with open(os.path.join(fixtures_dir, name), 'rb') as f:
+                fixtures.append((name, f.read()))
+    return fixtures, fixtures_dir
+
+def _key(text: str) -> str:
+    return ''.join(text.lower().split())
+
+def evaluate(name: str, extract, fixtures: List[Tuple[str, bytes]], repeat: int,
+             reference: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Time an extractor per page and summarize what it emits"""
+    timings = []
+    outputs = []
+    for _, html in fixtures:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            output = extract(html)
+        timings.append((time.perf_counter() - start) / repeat * 1000)
+        outputs.append(output)
+
+    faqs = [faq['question'] for output in outputs for faq in output['faq_items']]
+    steps = [step for output in outputs for step in output['troubleshooting']]
+    unique_faqs = sum(len({_key(f['question']) for f in o['faq_items']}) for o in outputs)
+    unique_steps = sum(len({_key(s) for s in o['troubleshooting']}) for o in outputs)
+
+    # Coverage of the legacy extractor's (distinct) items
+    found = expected = 0
+    for output, ref in zip(outputs, reference):
+        ref_items = {_key(f['question']) for f in ref['faq_items']} | {_key(s) for s in ref['troubleshooting']}
+        got_items = {_key(f['question']) for f in output['faq_items']} | {_key(s) for s in output['troubleshooting']}
+        expected += len(ref_items)
+        found += len(ref_items & got_items)
+
+    row = {
+        'extractor': name,
+        'ms_per_page_mean': round(float(np.mean(timings)), 3),
+        'ms_per_page_p50': round(float(np.percentile(timings, 50)), 3),
+        'ms_per_page_p95': round(float(np.percentile(timings, 95)), 3),
+        'pages_per_second': round(1000 / float(np.mean(timings)), 1),
+        'faq_items': len(faqs),
+        'duplicate_faq_items': len(faqs) - unique_faqs,
+        'steps': len(steps),
+        'duplicate_steps': len(steps) - unique_steps,
+        'content_chars': sum(len(output['content']) for output in outputs),
+        'legacy_item_coverage': round(found / expected, 4) if expected else None
+    }
+    print(f"  {name:<24} {row['ms_per_page_mean']:>8.2f} ms/page (p95 {row['ms_per_page_p95']:.2f})  "
+          f"{row['pages_per_second']:>7} pages/s  faq={row['faq_items']} (dup {row['duplicate_faq_items']})  "
+          f"steps={row['steps']} (dup {row['duplicate_steps']})  coverage={row['legacy_item_coverage']}")
+    return row
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML extraction")
+    parser.add_argument('--fixtures', help="Directory of saved .html pages")
+    parser.add_argument('--cache', help="Use the HTML stored in an HTTP cache (http_cache.sqlite3)")
+    parser.add_argument('--repeat', type=int, default=10, help="Extract each page this many times when timing")
+    args = parser.parse_args()
+
+    fixtures, source = load_fixtures(args)
+    if not fixtures:
+        print("Error: no HTML fixtures; run a scraper first or pass --fixtures/--cache")
+        return
+    print(f"Benchmarking extraction on {len(fixtures)} pages from {source} "
+          f"({sum(len(html) for _, html in fixtures) / len(fixtures) / 1024:.1f} KiB avg)")
+
+    reference = [legacy_extract(html) for _, html in fixtures]
+    extractors = [
+        ('legacy bs4 selectors', legacy_extract),
+        ('single-pass html.parser', lambda html: extract_page(html, parser='html.parser'))
+    ]
+    if lxml is not None:
+        extractors.append(('single-pass lxml', lambda html: extract_page(html, parser='lxml')))
+
+    report = {
+        'source': source,
+        'pages': len(fixtures),
+        'repeat': args.repeat,
+        'results': [evaluate(name, extract, fixtures, args.repeat, reference) for name, extract in extractors]
+    }
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    report_file = os.path.join(DATA_DIR, f"extraction_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_file, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved to: {report_file}")
+
+if __name__ == "__main__":
+    main()
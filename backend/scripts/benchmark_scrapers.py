@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Scraper throughput benchmark against the local fixture server
+
+Replays recorded pages through scripts/fixture_server.py and runs each
+scraper against it:
+
+- SimpleAppleScraper (sequential, --delay between requests)
+- AppleSupportScraper (sequential BFS, static fetches only; skipped when
+  selenium is not installed)
+- AsyncCrawler at each --concurrency level
+- AsyncCrawler recrawl with an HTTP cache (second pass, conditional GETs)
+
+For each run it reports pages/sec, requests and bytes served, response
+status counts, and extraction parity: the fraction of scraped pages whose
+title, content, FAQ items and steps equal extract_page() on the recorded
+HTML.
+
+Usage:
+    python scripts/benchmark_scrapers.py
+    python scripts/benchmark_scrapers.py --latency 0.1 --error-rate 0.05 --concurrency 4 16 32
+    python scripts/benchmark_scrapers.py --cache ../data/http_cache.sqlite3 --delay 1.0
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Callable
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fixture_server import DATA_DIR, FixtureServer, load_recorded_pages, url_path
+from app.scrapers.async_crawler import AsyncCrawler
+from app.scrapers.extraction import extract_page
+from app.scrapers.http_cache import HTTPCache
+from simple_scraper import SimpleAppleScraper
+
+FIELDS = ('title', 'content', 'faq_items', 'troubleshooting')
+
+def parity(pages: List[Dict[str, Any]], reference: Dict[str, Dict[str, Any]]) -> float:
+    """Fraction of scraped pages whose extracted fields match the recorded HTML's"""
+    matched = [all(page[field] == reference[url_path(page['url'])][field] for field in FIELDS)
+               for page in pages if url_path(page['url']) in reference]
+    return round(sum(matched) / len(matched), 4) if matched else None
+
+def run(name: str, server: FixtureServer, scrape: Callable[[], List[Dict[str, Any]]],
+        reference: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Run one scraper against a fresh server counter and summarize it"""
+    server.reset_stats()
+    start = time.perf_counter()
+    pages = [page for page in scrape() if page.get('content')]
+    seconds = time.perf_counter() - start
+    served = server.stats()
+
+    row = {
+        'scraper': name,
+        'pages': len(pages),
+        'seconds': round(seconds, 3),
+        'pages_per_second': round(len(pages) / seconds, 2) if seconds else None,
+        'requests': served['requests'],
+        'bytes_served': served['bytes_sent'],
+        'status_counts': served['status_counts'],
+        'parity': parity(pages, reference)
+    }
+    print(f"  {name:<32} {row['pages']:>4} pages in {row['seconds']:>7.2f}s  {row['pages_per_second']:>8} pages/s  "
+          f"{row['requests']:>4} req  {row['bytes_served'] / 1024:>8.1f} KiB  parity={row['parity']}  "
+          f"{row['status_counts']}")
+    return row
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scrapers against the fixture server")
+    parser.add_argument('--cache', help="Replay the HTML stored in an HTTP cache (http_cache.sqlite3)")
+    parser.add_argument('--corpus', help="Synthesize pages from this corpus (default: data/apple_support_data.*)")
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds added to every response")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help="Politeness delay for the sequential scrapers (they default to 1s against the live site)")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[4, 16])
+    parser.add_argument('--depth', type=int, default=1, help="Link depth for the crawlers that follow links")
+    args = parser.parse_args()
+
+    # Keep scraper logging (one line per page) out of the results
+    logging.disable(logging.ERROR)
+
+    recorded = load_recorded_pages(args.cache, args.corpus)
+    if not recorded:
+        print("Error: no recorded pages; run a scraper first or pass --cache/--corpus")
+        return
+
+    server = FixtureServer(recorded, latency=args.latency, error_rate=args.error_rate).start()
+    base_url = server.base_url
+    reference = {path: extract_page(html.replace(server.origin, base_url.encode('utf-8')))
+                 for path, html in recorded.items()}
+    seeds = SimpleAppleScraper(base_url=base_url).get_support_pages()
+    print(f"Benchmarking scrapers on {len(recorded)} recorded pages at {base_url} "
+          f"(latency {args.latency}s, error rate {args.error_rate}, {len(seeds)} seed URLs)")
+
+    results = []
+    try:
+        results.append(run(f'SimpleAppleScraper delay={args.delay}', server,
+                           lambda: SimpleAppleScraper(base_url=base_url).scrape_all_pages(delay=args.delay),
+                           reference))
+
+        try:
+            from app.scrapers.apple_scraper import AppleSupportScraper
+        except ImportError as e:
+            print(f"  {'AppleSupportScraper':<32} skipped ({e})")
+        else:
+            results.append(run(f'AppleSupportScraper depth={args.depth}', server,
+                               lambda: AppleSupportScraper(render_hints_path=None, base_url=base_url)
+                               .scrape_all_support_pages(max_pages=len(recorded), max_depth=args.depth, render=False),
+                               reference))
+
+        for concurrency in args.concurrency:
+            crawler = AsyncCrawler(SimpleAppleScraper(base_url=base_url), concurrency=concurrency,
+                                   per_host_concurrency=concurrency, per_host_delay=0.0, backoff_base=0.05)
+            results.append(run(f'AsyncCrawler concurrency={concurrency}', server,
+                               lambda: crawler.crawl(seeds, max_depth=args.depth), reference))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = HTTPCache(os.path.join(tmp, 'http_cache.sqlite3'))
+            concurrency = max(args.concurrency)
+
+            def recrawl():
+                crawler = AsyncCrawler(SimpleAppleScraper(base_url=base_url), concurrency=concurrency,
+                                       per_host_concurrency=concurrency, per_host_delay=0.0,
+                                       backoff_base=0.05, cache=cache)
+                return crawler.crawl(seeds, max_depth=args.depth)
+
+            recrawl()
+            results.append(run(f'AsyncCrawler recrawl (304s) c={concurrency}', server, recrawl, reference))
+    finally:
+        server.stop()
+
+    report = {
+        'source': args.cache or args.corpus or 'corpus',
+        'recorded_pages': len(recorded),
+        'latency': args.latency,
+        'error_rate': args.error_rate,
+        'depth': args.depth,
+        'results': results
+    }
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    report_file = os.path.join(DATA_DIR, f"scraper_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_file, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved to: {report_file}")
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from app.services.ai_agent import ai_agent
 from app.services.vector_store import vector_store
+from app.services.quota_scheduler import quota_scheduler, Priority
 
 class AgentEvaluator:
     def __init__(self):
@@ -621,7 +622,7 @@ class AgentEvaluator:
         
         try:
             # Get AI response
-            response = ai_agent.generate_response(scenario['question'])
+            response = await ai_agent.agenerate_response(scenario['question'])
             
             # Evaluate accuracy
             accuracy_score = self._evaluate_accuracy(response, scenario)
@@ -913,6 +914,9 @@ class AgentEvaluator:
 
 async def main():
     """Main evaluation function"""
+    # Evaluation runs behind live chat and indexing for Gemini quota
+    quota_scheduler.set_process_priority(Priority.EVAL)
+    
     evaluator = AgentEvaluator()
     
     # Run evaluation
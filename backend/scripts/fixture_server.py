@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Local HTTP fixture server that replays recorded support pages
+
+Serves a recorded page set on localhost so scrapers can be measured
+without touching support.apple.com. Pages come from the scrapers' HTTP
+cache (real recorded HTML) or are synthesized from the scraped corpus.
+Links to the recorded origin are rewritten to the fixture server, and
+"/" lists every page when it was not itself recorded.
+
+Behaviour is configurable: per-request latency (with jitter), a 503 error
+rate (with Retry-After: 0), and conditional-GET handling:
+
+    honor   send ETag/Last-Modified and answer 304 to matching validators
+    ignore  send validators but always answer 200 with the full page
+    none    send no validators
+
+Usage:
+    python scripts/fixture_server.py --port 8800 --latency 0.05 --error-rate 0.02
+    python scripts/fixture_server.py --cache ../data/http_cache.sqlite3 --conditional ignore
+"""
+
+import argparse
+import hashlib
+import html as html_lib
+import os
+import random
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+# Add the backend directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scrapers.corpus import iter_corpus, find_corpus
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+ORIGIN = "https://support.apple.com"
+
+def url_path(url: str) -> str:
+    parts = urlsplit(url)
+    path = parts.path.rstrip('/') or '/'
+    return f"{path}?{parts.query}" if parts.query else path
+
+def load_recorded_pages(cache: Optional[str] = None, corpus: Optional[str] = None) -> Dict[str, bytes]:
+    """Recorded pages keyed by path: HTML from an HTTP cache, else synthesized from a corpus"""
+    if cache:
+        from app.scrapers.http_cache import HTTPCache
+        return {url_path(url): html for url, html in HTTPCache(cache).iter_html()}
+
+    from benchmark_extraction import synthesize_page
+    corpus = corpus or find_corpus(DATA_DIR)
+    if not corpus:
+        return {}
+    return {url_path(page['url']): synthesize_page(page).encode('utf-8')
+            for page in iter_corpus(corpus) if page.get('content')}
+
+class _Server(ThreadingHTTPServer):
+    # The default listen backlog (5) drops connection bursts from concurrent crawlers
+    request_queue_size = 128
+    daemon_threads = True
+
+class FixtureServer:
+    """Threaded replay server for recorded pages (run in the background with start()/stop())"""
+
+    def __init__(self, pages: Dict[str, bytes], host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0, jitter: float = 0.5, error_rate: float = 0.0,
+                 conditional: str = 'honor', origin: str = ORIGIN, seed: int = 0):
+        if conditional not in ('honor', 'ignore', 'none'):
+            raise ValueError(f"conditional must be honor, ignore or none, not {conditional!r}")
+        self.pages = pages
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.conditional = conditional
+        self.origin = origin.encode('utf-8')
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        self.etags = {path: f'"{hashlib.sha1(html).hexdigest()[:16]}"' for path, html in pages.items()}
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.reset_stats()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = _Server((host, port), Handler)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests = 0
+            self.bytes_sent = 0
+            self.status_counts: Dict[int, int] = {}
+
+    def _random(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def _index(self) -> bytes:
+        links = ''.join(f'<li><a href="{html_lib.escape(path)}">{html_lib.escape(path)}</a></li>'
+                        for path in sorted(self.pages))
+        return f'<html><head><title>Support</title></head><body><main><ul>{links}</ul></main></body></html>'.encode('utf-8')
+
+    def _handle(self, request: BaseHTTPRequestHandler):
+        if self.latency:
+            time.sleep(self.latency * (1 + self.jitter * (2 * self._random() - 1)))
+
+        path = url_path(request.path)
+        headers = {'Content-Type': 'text/html; charset=utf-8'}
+        body = b''
+        if self.error_rate and self._random() < self.error_rate:
+            status = 503
+            headers['Retry-After'] = '0'
+        elif path in self.pages or path == '/':
+            html = self.pages.get(path) or self._index()
+            etag = self.etags.get(path, f'"{hashlib.sha1(html).hexdigest()[:16]}"')
+            if self.conditional != 'none':
+                headers['ETag'] = etag
+                headers['Last-Modified'] = self.last_modified
+            if self.conditional == 'honor' and (
+                    request.headers.get('If-None-Match') == etag or
+                    (request.headers.get('If-Modified-Since') and not request.headers.get('If-None-Match'))):
+                status = 304
+            else:
+                status = 200
+                body = html.replace(self.origin, self.base_url.encode('utf-8'))
+        else:
+            status = 404
+            body = b'<html><body><h1>Not Found</h1></body></html>'
+
+        request.send_response(status)
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        if body:
+            request.wfile.write(body)
+
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += len(body)
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get request counters"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'bytes_sent': self.bytes_sent,
+                'status_counts': dict(sorted(self.status_counts.items()))
+            }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded support pages over HTTP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--cache', help="Serve the HTML stored in an HTTP cache (http_cache.sqlite3)")
+    parser.add_argument('--corpus', help="Synthesize pages from this corpus (default: data/apple_support_data.*)")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.5, help="Latency varies by +/- this fraction")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument('--conditional', choices=['honor', 'ignore', 'none'], default='honor')
+    args = parser.parse_args()
+
+    pages = load_recorded_pages(args.cache, args.corpus)
+    if not pages:
+        print("Error: no recorded pages; run a scraper first or pass --cache/--corpus")
+        return
+
+    server = FixtureServer(pages, args.host, args.port, args.latency, args.jitter, args.error_rate, args.conditional)
+    print(f"Serving {len(pages)} recorded pages at {server.base_url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"Served: {server.stats()}")
+
+if __name__ == "__main__":
+    main()
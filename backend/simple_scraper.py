@@ -1,62 +1,67 @@
 import requests
-from bs4 import BeautifulSoup
 import json
 import os
 import time
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from urllib.parse import urljoin, urlparse
 import logging
+from app.scrapers.checkpoint import CrawlCheckpoint
+from app.scrapers.corpus import CorpusWriter
+from app.scrapers.extraction import extract_page
+from app.scrapers.frontier import CrawlFrontier
+from app.scrapers.http_cache import HTTPCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class SimpleAppleScraper:
-    def __init__(self):
-        self.base_url = "https://support.apple.com"
+    def __init__(self, cache: Optional[HTTPCache] = None, base_url: str = "https://support.apple.com"):
+        self.base_url = base_url.rstrip('/')
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         self.scraped_data = []
+        self.cache = cache
         
     def get_support_pages(self) -> List[str]:
         """Get a list of Apple support pages to scrape"""
         # Common Apple support pages for different products
         support_pages = [
-            "https://support.apple.com/iphone",
-            "https://support.apple.com/ipad", 
-            "https://support.apple.com/mac",
-            "https://support.apple.com/watch",
-            "https://support.apple.com/airpods",
-            "https://support.apple.com/tv",
-            "https://support.apple.com/iphone/guide",
-            "https://support.apple.com/ipad/guide",
-            "https://support.apple.com/mac/guide",
-            "https://support.apple.com/watch/guide",
-            "https://support.apple.com/airpods/guide",
-            "https://support.apple.com/tv/guide",
-            "https://support.apple.com/iphone/troubleshooting",
-            "https://support.apple.com/ipad/troubleshooting", 
-            "https://support.apple.com/mac/troubleshooting",
-            "https://support.apple.com/watch/troubleshooting",
-            "https://support.apple.com/airpods/troubleshooting",
-            "https://support.apple.com/tv/troubleshooting"
+            f"{self.base_url}/iphone",
+            f"{self.base_url}/ipad", 
+            f"{self.base_url}/mac",
+            f"{self.base_url}/watch",
+            f"{self.base_url}/airpods",
+            f"{self.base_url}/tv",
+            f"{self.base_url}/iphone/guide",
+            f"{self.base_url}/ipad/guide",
+            f"{self.base_url}/mac/guide",
+            f"{self.base_url}/watch/guide",
+            f"{self.base_url}/airpods/guide",
+            f"{self.base_url}/tv/guide",
+            f"{self.base_url}/iphone/troubleshooting",
+            f"{self.base_url}/ipad/troubleshooting", 
+            f"{self.base_url}/mac/troubleshooting",
+            f"{self.base_url}/watch/troubleshooting",
+            f"{self.base_url}/airpods/troubleshooting",
+            f"{self.base_url}/tv/troubleshooting"
         ]
         
         # Add some specific support articles
         specific_articles = [
-            "https://support.apple.com/en-us/HT201270",  # iPhone reset
-            "https://support.apple.com/en-us/HT201263",  # iPad reset
-            "https://support.apple.com/en-us/HT201295",  # Mac reset
-            "https://support.apple.com/en-us/HT204306",  # Apple Watch reset
-            "https://support.apple.com/en-us/HT201945",  # AirPods reset
-            "https://support.apple.com/en-us/HT201265",  # iPhone backup
-            "https://support.apple.com/en-us/HT201269",  # iPad backup
-            "https://support.apple.com/en-us/HT201250",  # Mac backup
-            "https://support.apple.com/en-us/HT201296",  # iPhone update
-            "https://support.apple.com/en-us/HT204204",  # iPad update
-            "https://support.apple.com/en-us/HT201541",  # Mac update
-            "https://support.apple.com/en-us/HT204507",  # Apple Watch update
+            f"{self.base_url}/en-us/HT201270",  # iPhone reset
+            f"{self.base_url}/en-us/HT201263",  # iPad reset
+            f"{self.base_url}/en-us/HT201295",  # Mac reset
+            f"{self.base_url}/en-us/HT204306",  # Apple Watch reset
+            f"{self.base_url}/en-us/HT201945",  # AirPods reset
+            f"{self.base_url}/en-us/HT201265",  # iPhone backup
+            f"{self.base_url}/en-us/HT201269",  # iPad backup
+            f"{self.base_url}/en-us/HT201250",  # Mac backup
+            f"{self.base_url}/en-us/HT201296",  # iPhone update
+            f"{self.base_url}/en-us/HT204204",  # iPad update
+            f"{self.base_url}/en-us/HT201541",  # Mac update
+            f"{self.base_url}/en-us/HT204507",  # Apple Watch update
         ]
         
         return support_pages + specific_articles
@@ -65,61 +70,51 @@ class SimpleAppleScraper:
         """Scrape a single support page"""
         try:
             logger.info(f"Scraping: {url}")
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract title
-            title = soup.find('title')
-            title_text = title.get_text(strip=True) if title else ""
-            
-            # Extract main content
-            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content') or soup.find('body')
-            
-            if main_content:
-                # Remove script and style elements
-                for script in main_content(["script", "style", "nav", "header", "footer"]):
-                    script.decompose()
-                    
-                content_text = main_content.get_text(separator=' ', strip=True)
-            else:
-                content_text = soup.get_text(separator=' ', strip=True)
-            
-            # Clean up content
-            content_text = ' '.join(content_text.split())
+            headers = self.cache.conditional_headers(url) if self.cache is not None else None
+            response = self.session.get(url, headers=headers, timeout=10)
             
-            # Extract product from URL
-            product = self._extract_product_from_url(url)
-            
-            # Extract FAQ items
-            faq_items = self._extract_faq_items(soup)
-            
-            # Extract troubleshooting steps
-            troubleshooting = self._extract_troubleshooting(soup)
+            # Unchanged since the last crawl: reuse the stored record without parsing
+            cached = self.cache.reuse(url, response.status_code, response.content) if self.cache is not None else None
+            if cached is not None:
+                return cached
+            response.raise_for_status()
             
-            return {
-                'url': url,
-                'title': title_text,
-                'content': content_text,
-                'faq_items': faq_items,
-                'troubleshooting': troubleshooting,
-                'product': product,
-                'scraped_at': time.time()
-            }
+            page = self.parse_page(url, response.content)
+            if self.cache is not None:
+                self.cache.store(url, response.headers, response.content, page)
+            return page
             
         except Exception as e:
             logger.error(f"Error scraping {url}: {e}")
-            return {
-                'url': url,
-                'title': '',
-                'content': '',
-                'faq_items': [],
-                'troubleshooting': [],
-                'product': 'Unknown',
-                'scraped_at': time.time(),
-                'error': str(e)
-            }
+            return self.error_page(url, e)
+    
+    def parse_page(self, url: str, html) -> Dict[str, Any]:
+        """Extract a page record from fetched HTML (shared with the async crawler)"""
+        # Title, content, FAQ items and troubleshooting steps in one pass
+        page = extract_page(html)
+        
+        return {
+            'url': url,
+            'title': page['title'],
+            'content': page['content'],
+            'faq_items': page['faq_items'],
+            'troubleshooting': page['troubleshooting'],
+            'product': self._extract_product_from_url(url),
+            'scraped_at': time.time()
+        }
+    
+    def error_page(self, url: str, error: Exception) -> Dict[str, Any]:
+        """Placeholder record for a page that could not be scraped"""
+        return {
+            'url': url,
+            'title': '',
+            'content': '',
+            'faq_items': [],
+            'troubleshooting': [],
+            'product': 'Unknown',
+            'scraped_at': time.time(),
+            'error': str(error)
+        }
     
     def _extract_product_from_url(self, url: str) -> str:
         """Extract product name from URL"""
@@ -139,72 +134,53 @@ class SimpleAppleScraper:
         else:
             return 'Other'
     
-    def _extract_faq_items(self, soup: BeautifulSoup) -> List[Dict[str, str]]:
-        """Extract FAQ items from the page"""
-        faq_items = []
+    def scrape_all_pages(self, writer: Optional[CorpusWriter] = None, delay: float = 1.0,
+                         checkpoint: Optional[CrawlCheckpoint] = None):
+        """Scrape all support pages
         
-        # Look for common FAQ patterns
-        faq_selectors = [
-            'div[class*="faq"]',
-            'div[class*="accordion"]',
-            'details',
-            'div[class*="question"]',
-            'h3', 'h4', 'h5'
-        ]
-        
-        for selector in faq_selectors:
-            elements = soup.select(selector)
-            for element in elements:
-                text = element.get_text(strip=True)
-                if text and len(text) > 10 and '?' in text:
-                    # Look for answer in next sibling
-                    next_elem = element.find_next_sibling(['p', 'div'])
-                    if next_elem:
-                        answer = next_elem.get_text(strip=True)
-                        if answer and len(answer) > 20:
-                            faq_items.append({
-                                'question': text,
-                                'answer': answer
-                            })
-                    
-        return faq_items
-    
-    def _extract_troubleshooting(self, soup: BeautifulSoup) -> List[str]:
-        """Extract troubleshooting steps from the page"""
-        troubleshooting = []
+        With a writer, each page is streamed to it as soon as it is scraped
+        instead of being buffered in self.scraped_data. `delay` seconds are
+        left between requests. With a checkpoint (and a writer opened by
+        checkpoint.open_writer), progress is saved periodically and a
+        restarted run continues with the pages not yet scraped.
+        """
+        if checkpoint is not None and writer is None:
+            raise ValueError("Checkpointing needs a writer: buffered pages cannot be resumed")
         
-        # Look for numbered lists or steps
-        step_selectors = [
-            'ol li',
-            'div[class*="step"]',
-            'div[class*="troubleshoot"]',
-            'li'
-        ]
-        
-        for selector in step_selectors:
-            elements = soup.select(selector)
-            for element in elements:
-                text = element.get_text(strip=True)
-                if text and len(text) > 20:  # Filter out very short text
-                    troubleshooting.append(text)
-                    
-        return troubleshooting
-    
-    def scrape_all_pages(self):
-        """Scrape all support pages"""
-        pages = self.get_support_pages()
-        logger.info(f"Found {len(pages)} pages to scrape")
+        # Normalized seen-URL tracking, so no page is fetched twice under different spellings
+        frontier = checkpoint.restore_frontier() if checkpoint is not None else None
+        if frontier is None:
+            frontier = CrawlFrontier(max_depth=0)
+            frontier.add_many(self.get_support_pages(), depth=0)
+        pages = frontier.popped + len(frontier)
+        logger.info(f"Found {pages} pages to scrape ({len(frontier)} remaining)")
         
-        for i, page in enumerate(pages):
-            logger.info(f"Scraping page {i+1}/{len(pages)}: {page}")
+        scraped_count = 0
+        while frontier:
+            page, _ = frontier.pop()
+            logger.info(f"Scraping page {frontier.popped}/{pages}: {page}")
             data = self.scrape_page(page)
             if data['content']:
-                self.scraped_data.append(data)
-            time.sleep(1)  # Be respectful to Apple's servers
-            
-        logger.info(f"Scraped {len(self.scraped_data)} pages successfully")
+                if writer:
+                    writer.write(data)
+                else:
+                    self.scraped_data.append(data)
+                scraped_count += 1
+            if checkpoint is not None:
+                checkpoint.step(frontier, writer)
+            time.sleep(delay)  # Be respectful to Apple's servers
+        
+        if checkpoint is not None:
+            checkpoint.complete()
+        logger.info(f"Scraped {scraped_count} pages successfully")
+        if self.cache is not None:
+            logger.info(f"HTTP cache: {self.cache.stats()}")
         return self.scraped_data
     
+    def open_writer(self, filename: str = "apple_support_data.jsonl") -> CorpusWriter:
+        """Open a streaming JSON Lines writer in the data directory"""
+        return CorpusWriter(os.path.join("../data", filename))
+    
     def save_data(self, filename: str = "apple_support_data.json"):
         """Save scraped data to JSON file"""
         os.makedirs("../data", exist_ok=True)
@@ -218,27 +194,22 @@ class SimpleAppleScraper:
 
 def main():
     """Main function to run the scraper"""
-    scraper = SimpleAppleScraper()
+    scraper = SimpleAppleScraper(cache=HTTPCache(os.path.join("../data", "http_cache.sqlite3")))
     
     print("Starting Simple Apple Support scraper...")
-    print("This will scrape Apple support pages and save them to data/apple_support_data.json")
+    print("This will scrape Apple support pages and save them to data/apple_support_data.jsonl")
     
-    # Scrape all support pages
-    scraped_data = scraper.scrape_all_pages()
+    # Scrape all support pages, streaming each one to disk; an interrupted run resumes from its checkpoint
+    output = os.path.join("../data", "apple_support_data.jsonl")
+    checkpoint = CrawlCheckpoint(f"{output}.checkpoint", every=10)
+    with checkpoint.open_writer(output) as writer:
+        scraper.scrape_all_pages(writer, checkpoint=checkpoint)
     
-    # Save the data
-    filepath = scraper.save_data()
-    
-    print(f"Scraping completed! Saved {len(scraped_data)} pages to {filepath}")
+    print(f"Scraping completed! Saved {writer.count} pages to {writer.path}")
     
     # Print summary
-    products = {}
-    for item in scraped_data:
-        product = item.get('product', 'Unknown')
-        products[product] = products.get(product, 0) + 1
-    
     print("\nScraping Summary:")
-    for product, count in products.items():
+    for product, count in writer.product_counts.items():
         print(f"  {product}: {count} pages")
 
 if __name__ == "__main__":
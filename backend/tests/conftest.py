@@ -0,0 +1,15 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Tests import the app the same way the backend scripts do
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Module-level services open their on-disk stores at import; keep them out of the repo's data/
+_DATA_DIR = tempfile.mkdtemp(prefix="support-agent-tests-")
+os.environ.setdefault("LOCAL_INDEX_PATH", os.path.join(_DATA_DIR, "local_index"))
+os.environ.setdefault("DOCUMENT_EMBEDDING_CACHE_PATH", os.path.join(_DATA_DIR, "embedding_cache.sqlite3"))
+os.environ.setdefault("INGEST_CHECKPOINT_PATH", os.path.join(_DATA_DIR, "ingest_checkpoint.json"))
+os.environ.setdefault("QUOTA_STATE_PATH", os.path.join(_DATA_DIR, "quota_state.sqlite3"))
+os.environ.setdefault("INDEX_GENERATION_PATH", os.path.join(_DATA_DIR, "index_generation.json"))
@@ -0,0 +1,58 @@
+import asyncio
+
+import httpx
+
+from app.scrapers.async_crawler import AsyncCrawler
+from app.scrapers.http_cache import HTTPCache
+from simple_scraper import SimpleAppleScraper
+
+BASE = "https://support.example.com"
+
+def article(title):
+    return f"<html><head><title>{title}</title></head><body><main><p>{title} steps.</p></main></body></html>"
+
+class FakeRenderer:
+    """Duck-typed RenderOnDemand whose hints say /mac needs JavaScript"""
+
+    def __init__(self):
+        self.rendered = []
+
+    def hint(self, url):
+        return 'js' if url.endswith('/mac') else None
+
+    def extract_rendered(self, url, parse):
+        self.rendered.append(url)
+        html = article("Rendered Mac")
+        return html, parse(url, html)
+
+    def extract(self, url, html, parse):
+        return html, parse(url, html)
+
+    def stats(self):
+        return {'rendered_pages': len(self.rendered)}
+
+def crawler(requested, **kwargs):
+    def handler(request):
+        requested.append(str(request.url))
+        return httpx.Response(200, text=article(request.url.path), headers={'Content-Type': 'text/html'})
+
+    crawler = AsyncCrawler(SimpleAppleScraper(base_url=BASE), concurrency=2, per_host_delay=0, **kwargs)
+    crawler._new_client = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return crawler
+
+def test_crawl_extracts_every_page():
+    requested = []
+    pages = asyncio.run(crawler(requested).acrawl([f"{BASE}/iphone", f"{BASE}/ipad"]))
+    assert sorted(page['title'] for page in pages) == ["/ipad", "/iphone"]
+    assert len(requested) == 2
+
+def test_js_hinted_urls_are_rendered_without_a_static_request(tmp_path):
+    requested = []
+    renderer = FakeRenderer()
+    cache = HTTPCache(str(tmp_path / "http_cache.sqlite3"))
+    pages = asyncio.run(crawler(requested, renderer=renderer, cache=cache).acrawl([f"{BASE}/iphone", f"{BASE}/mac"]))
+
+    assert requested == [f"{BASE}/iphone"]
+    assert renderer.rendered == [f"{BASE}/mac"]
+    assert {page['title'] for page in pages} == {"/iphone", "Rendered Mac"}
+    assert b"Rendered Mac" in cache.get_html(f"{BASE}/mac")
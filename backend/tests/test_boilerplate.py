@@ -0,0 +1,33 @@
+from app.services.boilerplate import BoilerplateDetector
+
+NAV = "Apple Store Mac iPad iPhone Watch Vision AirPods TV Home Support"
+FOOTER = "Copyright 2024 Apple Inc. All rights reserved. Privacy Policy Terms of Use"
+
+def pages(n=5):
+    return [{'content': f"{NAV}\n\nArticle {i} explains how to fix problem number {i}.\n{FOOTER}"} for i in range(n)]
+
+def detector():
+    return BoilerplateDetector(shingle_size=4, min_page_fraction=0.5).fit(pages())
+
+def test_strip_keeps_the_pages_own_line_and_paragraph_breaks():
+    text = f"Intro line.\n{NAV}\n\nFirst paragraph about resetting.\nSecond line.\n\nSecond paragraph."
+    stripped = detector().strip(text)
+    assert stripped == "Intro line.\n\nFirst paragraph about resetting.\nSecond line.\n\nSecond paragraph."
+
+def test_strip_drops_leading_and_trailing_furniture():
+    text = f"{NAV}\n\nHow to reset your iPhone.\nHold the side button.\n{FOOTER}"
+    assert detector().strip(text) == "How to reset your iPhone.\nHold the side button."
+
+def test_run_inside_a_line_leaves_a_single_separator():
+    assert detector().strip(f"Before {NAV} after") == "Before after"
+
+def test_chars_removed_counts_only_the_removed_runs():
+    boilerplate = detector()
+    boilerplate.strip(f"Keep   this\n\n\n{NAV}\n\n\nand this")
+    assert boilerplate.chars_removed == len(NAV)
+
+def test_text_without_boilerplate_is_unchanged():
+    text = "Hold  the side button\n\nuntil the logo appears."
+    boilerplate = detector()
+    assert boilerplate.strip(text) == text
+    assert boilerplate.chars_removed == 0
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from app.scrapers.checkpoint import CrawlCheckpoint
+from app.scrapers.corpus import CorpusWriter, iter_corpus
+from app.scrapers.frontier import CrawlFrontier
+from simple_scraper import SimpleAppleScraper
+
+def page(url, product="iPhone"):
+    return {'url': url, 'title': url, 'content': f"content of {url}", 'faq_items': [], 'troubleshooting': [],
+            'product': product}
+
+def test_writer_resume_truncates_to_the_saved_offset(tmp_path):
+    path = str(tmp_path / "corpus.jsonl")
+    with CorpusWriter(path) as writer:
+        writer.write(page("https://a.example/1"))
+        state = writer.state()
+        writer.write(page("https://a.example/2", product="Mac"))
+
+    with CorpusWriter(path, resume=state) as writer:
+        assert writer.count == 1 and writer.product_counts == {"iPhone": 1}
+        writer.write(page("https://a.example/3"))
+
+    assert [p['url'] for p in iter_corpus(path)] == ["https://a.example/1", "https://a.example/3"]
+
+def test_writer_refuses_to_resume_a_shorter_file(tmp_path):
+    path = str(tmp_path / "corpus.jsonl")
+    with pytest.raises(ValueError):
+        CorpusWriter(path, resume={'offset': 100, 'count': 1, 'product_counts': {}}).open()
+
+def test_checkpoint_saves_every_n_pages_and_is_removed_on_completion(tmp_path):
+    output = str(tmp_path / "corpus.jsonl")
+    checkpoint = CrawlCheckpoint(output + ".checkpoint", every=2)
+    frontier = CrawlFrontier(max_depth=0)
+    frontier.add_many([f"https://a.example/{i}" for i in range(4)], depth=0)
+
+    with checkpoint.open_writer(output) as writer:
+        frontier.pop()
+        checkpoint.step(frontier, writer)
+        assert not os.path.exists(checkpoint.path)
+        frontier.pop()
+        checkpoint.step(frontier, writer, extra={'scraped_count': 2})
+        assert os.path.exists(checkpoint.path)
+
+    resumed = CrawlCheckpoint(checkpoint.path)
+    assert resumed.resumed and resumed.extra == {'scraped_count': 2}
+    assert len(resumed.restore_frontier()) == 2
+
+    with pytest.raises(ValueError):
+        resumed.open_writer(str(tmp_path / "other.jsonl"))
+
+    resumed.complete()
+    assert not os.path.exists(checkpoint.path) and not resumed.resumed
+
+def test_unreadable_checkpoint_starts_a_fresh_crawl(tmp_path):
+    path = tmp_path / "corpus.jsonl.checkpoint"
+    path.write_text("{not json")
+    assert not CrawlCheckpoint(str(path)).resumed
+
+def test_interrupted_scrape_resumes_without_losing_or_repeating_pages(tmp_path, monkeypatch):
+    output = str(tmp_path / "corpus.jsonl")
+    scraper = SimpleAppleScraper(base_url="https://support.example.com")
+    fetched = []
+
+    def scrape_page(url):
+        if len(fetched) == 7 and not crashed:
+            raise KeyboardInterrupt
+        fetched.append(url)
+        return page(url)
+
+    monkeypatch.setattr(scraper, "scrape_page", scrape_page)
+    crashed = False
+    checkpoint = CrawlCheckpoint(output + ".checkpoint", every=3)
+    with pytest.raises(KeyboardInterrupt):
+        with checkpoint.open_writer(output) as writer:
+            scraper.scrape_all_pages(writer, delay=0, checkpoint=checkpoint)
+
+    crashed = True
+    checkpoint = CrawlCheckpoint(output + ".checkpoint", every=3)
+    assert checkpoint.state['output']['count'] == 6
+    with checkpoint.open_writer(output) as writer:
+        scraper.scrape_all_pages(writer, delay=0, checkpoint=checkpoint)
+
+    urls = [p['url'] for p in iter_corpus(output)]
+    expected = scraper.get_support_pages()
+    assert sorted(urls) == sorted(expected)
+    assert writer.count == len(expected)
+    # Only the page scraped after the last checkpoint was fetched twice
+    assert len(fetched) == len(expected) + 1
+    assert not os.path.exists(output + ".checkpoint")
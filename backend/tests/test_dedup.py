@@ -0,0 +1,54 @@
+from app.services.dedup import NearDuplicateFilter
+
+TEXT = "To reset your device, open Settings, tap General, then tap Transfer or Reset and follow the steps shown"
+
+def doc(doc_id, text, product, url=None, content_type="content"):
+    return {
+        'id': doc_id,
+        'text': text,
+        'metadata': {'url': url or f"https://support.example.com/{doc_id}", 'product': product,
+                     'content_type': content_type}
+    }
+
+def test_duplicates_within_a_product_are_merged():
+    docs = [doc("a", TEXT, "iPhone"), doc("b", TEXT, "iPhone", content_type="troubleshooting")]
+    kept = NearDuplicateFilter().filter(docs)
+
+    assert len(kept) == 1
+    metadata = kept[0]['metadata']
+    assert metadata['product'] == "iPhone"
+    assert metadata['duplicate_count'] == 2
+    assert metadata['urls'] == ["https://support.example.com/a", "https://support.example.com/b"]
+    assert metadata['content_types'] == ["content", "troubleshooting"]
+    assert 'products' not in metadata
+
+def test_duplicates_across_products_keep_one_chunk_per_product():
+    products = ["iPhone", "iPad", "Mac", "Apple Watch", "AirPods", "Apple TV"]
+    kept = NearDuplicateFilter().filter([doc(str(i), TEXT, product) for i, product in enumerate(products)])
+
+    assert sorted(d['metadata']['product'] for d in kept) == sorted(products)
+    assert all(d['metadata'].get('duplicate_count', 1) == 1 for d in kept)
+
+def test_distinct_texts_are_kept():
+    docs = [doc("a", TEXT, "iPhone"), doc("b", "Charge AirPods in their case for at least thirty minutes before pairing", "iPhone")]
+    assert [d['id'] for d in NearDuplicateFilter().filter(docs)] == ["a", "b"]
+
+def test_window_bounds_signatures_and_buckets():
+    dedup = NearDuplicateFilter(window=3)
+    docs = [doc(str(i), f"unique chunk number {i} " + " ".join(f"word{i}x{j}" for j in range(12)), "Mac")
+            for i in range(50)]
+
+    stream = dedup.iter_filter(docs)
+    yielded = [next(stream) for _ in range(10)]
+    assert len(dedup._signatures) <= 4
+    assert len({doc_id for bucket in dedup._buckets.values() for doc_id in bucket}) <= 4
+
+    yielded.extend(stream)
+    assert len(yielded) == 50
+    assert not dedup._signatures and not dedup._buckets
+
+def test_streaming_merges_duplicates_inside_the_window():
+    docs = [doc("a", TEXT, "iPhone"), doc("x", "Pair AirPods by holding the setup button on the back of the case", "iPhone"),
+            doc("b", TEXT, "iPhone")]
+    kept = list(NearDuplicateFilter(window=5).iter_filter(docs))
+    assert [d['metadata'].get('duplicate_count', 1) for d in kept] == [2, 1]
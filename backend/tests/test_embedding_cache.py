@@ -0,0 +1,84 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.embedding_cache import DocumentEmbeddingStore, EmbeddingCache, fit_dimension
+
+MATRYOSHKA = "models/gemini-embedding-001"
+
+def test_fit_dimension_truncates_and_renormalizes_matryoshka_models():
+    fitted = fit_dimension([3.0, 4.0, 12.0], 2, MATRYOSHKA)
+    assert np.allclose(fitted, [0.6, 0.8])
+
+def test_fit_dimension_keeps_exact_width_and_rejects_short_vectors():
+    assert np.allclose(fit_dimension([0.5, 0.5], 2, "models/embedding-001"), [0.5, 0.5])
+    with pytest.raises(ValueError, match="returned 1 dimensions"):
+        fit_dimension([1.0], 2, MATRYOSHKA)
+
+def test_fit_dimension_refuses_to_truncate_other_models():
+    with pytest.raises(ValueError, match="models/embedding-001 returned 3 dimensions; the index needs 2"):
+        fit_dimension([3.0, 4.0, 12.0], 2, "models/embedding-001")
+
+def test_store_serves_requested_dimension(tmp_path):
+    store = DocumentEmbeddingStore(str(tmp_path / "embeddings.sqlite3"))
+    full = [3.0, 4.0, 12.0, 0.0]
+    store.put_many(MATRYOSHKA, ["a"], [full])
+    store.put_many("models/embedding-001", ["a"], [full])
+
+    assert np.allclose(store.get_many(MATRYOSHKA, ["a"], 4)[0], full)
+    assert np.allclose(store.get_many(MATRYOSHKA, ["a"], 2)[0], fit_dimension(full, 2, MATRYOSHKA))
+    assert store.get_many("other-model", ["a"], 2) == [None]
+    with pytest.raises(ValueError):
+        store.get_many(MATRYOSHKA, ["a"], 8)
+    with pytest.raises(ValueError):
+        store.get_many("models/embedding-001", ["a"], 2)
+
+def test_cached_and_fresh_document_vectors_have_the_same_width(tmp_path, monkeypatch):
+    vector_store = pytest.importorskip("app.services.vector_store")
+    from app.core.config import settings
+
+    class Embeddings:
+        def embed_documents(self, texts):
+            return [[float(len(text)), 1.0, 2.0, 3.0] for text in texts]
+
+        def embed_query(self, text):
+            return [float(len(text)), 1.0, 2.0, 3.0]
+
+    monkeypatch.setattr(settings, "vector_dimension", 2)
+    monkeypatch.setattr(settings, "embedding_model", MATRYOSHKA)
+    service = vector_store.VectorStoreService.__new__(vector_store.VectorStoreService)
+    service.embeddings = Embeddings()
+    service.embedding_store = DocumentEmbeddingStore(str(tmp_path / "embeddings.sqlite3"))
+    service.query_cache = EmbeddingCache()
+
+    service.embed_texts(["cached"])
+    vectors = service.embed_texts(["cached", "fresh text"])
+    assert [len(vector) for vector in vectors] == [2, 2]
+    assert len(service.embed_query("a question")) == 2
+    # The disk cache keeps the full model output
+    assert len(service.embedding_store.get_many(settings.embedding_model, ["fresh text"])[0]) == 4
+
+def test_query_cache_embeds_the_original_text_and_shares_the_key():
+    cache = EmbeddingCache()
+    embedded = []
+
+    def compute(text):
+        embedded.append(text)
+        return [1.0, 0.0]
+
+    cache.get_or_compute("How do I reset my iPhone?", compute)
+    cache.get_or_compute("how do i reset my iphone", compute)
+    assert embedded == ["How do I reset my iPhone?"]
+    assert cache.stats()['hits'] == 1
+
+def test_async_query_cache_embeds_the_original_text():
+    cache = EmbeddingCache()
+    embedded = []
+
+    async def compute(text):
+        embedded.append(text)
+        return [1.0, 0.0]
+
+    asyncio.run(cache.aget_or_compute("Why won't AirPods connect?", compute))
+    assert embedded == ["Why won't AirPods connect?"]
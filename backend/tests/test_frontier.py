@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from app.scrapers.frontier import BloomFilter, CrawlFrontier, extract_links, normalize_url
+
+def test_normalize_url_canonicalizes_spellings():
+    assert normalize_url("HTTPS://Support.Apple.com:443/iphone/?utm_source=x&b=2&a=1#top") == \
+        "https://support.apple.com/iphone?a=1&b=2"
+    assert normalize_url("guide//setup/", base="https://support.apple.com/iphone/") == \
+        "https://support.apple.com/iphone/guide/setup"
+    assert normalize_url("mailto:help@apple.com") is None
+
+def test_extract_links_resolves_and_deduplicates():
+    html = '<a href="/mac">Mac</a><a href="/mac/">again</a><a href="#top">top</a><a href="ipad">iPad</a>'
+    assert extract_links("https://support.apple.com/en-us/", html) == [
+        "https://support.apple.com/mac", "https://support.apple.com/en-us/ipad"]
+
+def test_frontier_skips_duplicates_out_of_scope_and_too_deep():
+    frontier = CrawlFrontier(max_depth=1, allowed_hosts=["support.apple.com"])
+    assert frontier.add("https://support.apple.com/iphone")
+    assert not frontier.add("https://SUPPORT.apple.com/iphone/")
+    assert not frontier.add("https://www.apple.com/iphone")
+    assert not frontier.add("https://support.apple.com/mac", depth=2)
+
+    stats = frontier.stats()
+    assert (stats['enqueued'], stats['duplicates_avoided'], stats['out_of_scope'], stats['too_deep']) == (1, 1, 1, 1)
+
+def test_frontier_pops_breadth_first_then_by_priority():
+    frontier = CrawlFrontier(max_depth=2)
+    frontier.add("https://a.example/deep", depth=1)
+    frontier.add("https://a.example/seed", depth=0)
+    assert frontier.pop() == ("https://a.example/seed", 0)
+
+    frontier = CrawlFrontier(priority_fn=lambda url, depth: 0 if "troubleshooting" in url else 1)
+    frontier.add_many(["https://a.example/guide", "https://a.example/troubleshooting"], depth=0)
+    assert frontier.pop()[0] == "https://a.example/troubleshooting"
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    urls = [f"https://a.example/{i}" for i in range(1000)]
+    for url in urls:
+        bloom.add(url)
+    assert all(url in bloom for url in urls)
+    false_positives = sum(f"https://b.example/{i}" in bloom for i in range(1000))
+    assert false_positives < 50
+
+@pytest.mark.parametrize("use_bloom", [False, True])
+def test_state_round_trip_keeps_queue_seen_set_and_counters(use_bloom):
+    frontier = CrawlFrontier(max_depth=1, allowed_hosts=["a.example"], use_bloom=use_bloom, bloom_capacity=1000)
+    frontier.add_many([f"https://a.example/{i}" for i in range(5)], depth=0)
+    in_flight = frontier.pop()
+    frontier.pop()
+
+    state = json.loads(json.dumps(frontier.to_state(pending=[in_flight])))
+    restored = CrawlFrontier.from_state(state)
+
+    # The in-flight page is queued again; the finished one is not
+    assert len(restored) == 4
+    assert restored.pop() == in_flight
+    assert not restored.add("https://a.example/1")
+    assert restored.add("https://a.example/new")
+    assert not restored.add("https://b.example/")
+    stats = restored.stats()
+    assert stats['seen_store'] == ("bloom" if use_bloom else "set")
+    assert stats['enqueued'] == 6 and stats['by_depth'] == {0: 6}
@@ -0,0 +1,52 @@
+import numpy as np
+
+from app.services.hnsw_index import HNSWIndex
+from app.services.local_index import LocalVectorIndex
+
+def build(count=1500, dimension=24, seed=7):
+    rng = np.random.RandomState(seed)
+    vectors = rng.normal(size=(count, dimension)).astype(np.float32)
+    ids = [f"doc-{i}" for i in range(count)]
+    index = HNSWIndex(dimension=dimension, m=8, ef_construction=64, ef_search=32)
+    index.add(ids, vectors, [{'product': "iPhone" if i % 2 else "Mac"} for i in range(count)])
+    return index, ids, vectors, rng
+
+def recall(index, exact, queries, k):
+    found = expected = 0
+    for query in queries:
+        truth = {hit[0] for hit in exact.search(query, k)}
+        hits = index.search(query, k)
+        assert len(hits) == k
+        found += len(truth & {hit[0] for hit in hits})
+        expected += len(truth)
+    return found / expected
+
+def test_recall_and_result_count_under_deletions():
+    index, ids, vectors, rng = build()
+    # 20% tombstones: below the 25% compaction threshold, so they stay in the graph
+    deleted = set(rng.choice(len(ids), size=len(ids) // 5, replace=False).tolist())
+    index.delete([ids[i] for i in deleted])
+    assert index.stats()['deleted_vector_count'] == len(deleted)
+
+    live = [i for i in range(len(ids)) if i not in deleted]
+    exact = LocalVectorIndex(dimension=vectors.shape[1])
+    exact.add([ids[i] for i in live], vectors[live], [{} for _ in live])
+
+    queries = rng.normal(size=(40, vectors.shape[1]))
+    assert recall(index, exact, queries, k=30) >= 0.9
+    for query in queries[:5]:
+        assert not {hit[0] for hit in index.search(query, 10)} & {ids[i] for i in deleted}
+
+def test_returns_every_live_vector_when_k_exceeds_the_beam():
+    index, ids, _, _ = build(count=200)
+    index.delete(ids[:40])
+    hits = index.search(np.ones(24), k=160, ef=8)
+    assert len(hits) == 160
+    assert {hit[0] for hit in hits} == set(ids[40:])
+
+def test_compaction_drops_tombstones():
+    index, ids, _, _ = build(count=200)
+    index.delete(ids[:60])
+    assert index.stats()['deleted_vector_count'] == 0
+    assert len(index) == 140
+    assert index.indexed_ids() == set(ids[60:])
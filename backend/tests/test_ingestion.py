@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+from app.services.ingestion import IngestionPipeline
+
+class FakeStore:
+    """In-memory stand-in for VectorStoreService's write path"""
+
+    is_local = True
+
+    def __init__(self, index_key="local:/tmp/index"):
+        self.index_key = index_key
+        self.vectors = {}
+        self.fail_after = None
+
+    def embed_texts(self, texts):
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def upsert_vectors(self, ids, vectors, metadatas):
+        if self.fail_after is not None and len(self.vectors) >= self.fail_after:
+            raise RuntimeError("index unavailable")
+        self.vectors.update(zip(ids, vectors))
+
+    def commit(self):
+        pass
+
+    def get_indexed_ids(self):
+        return set(self.vectors)
+
+def documents(n=20):
+    return [{'id': f"doc-{i}", 'text': f"chunk {i}", 'metadata': {}} for i in range(n)]
+
+def pipeline(store, path):
+    return IngestionPipeline(store, batch_size=4, embed_workers=1, upsert_workers=1,
+                             checkpoint_path=str(path), checkpoint_every=1)
+
+def failed_run(store, path):
+    store.fail_after = 8
+    with pytest.raises(RuntimeError):
+        pipeline(store, path).run(documents())
+    store.fail_after = None
+    assert json.loads(path.read_text())['index'] == store.index_key
+
+def test_rerun_skips_batches_committed_before_a_failure(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    store = FakeStore()
+    failed_run(store, path)
+
+    report = pipeline(store, path).run(documents())
+    assert report['skipped_chunks'] == 8 and report['chunks'] == 12
+    assert len(store.vectors) == 20
+    assert not os.path.exists(path)
+
+def test_checkpointed_batches_missing_from_the_index_are_ingested_again(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    store = FakeStore()
+    failed_run(store, path)
+
+    # e.g. reset_index.py ran between the two runs
+    store.vectors.clear()
+    report = pipeline(store, path).run(documents())
+    assert report['skipped_chunks'] == 0
+    assert len(store.vectors) == 20
+
+def test_checkpoint_for_another_index_is_ignored(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    failed_run(FakeStore(index_key="pinecone:apple-support"), path)
+
+    other = FakeStore(index_key="hnsw:/tmp/index")
+    other.vectors = {f"doc-{i}": [0.0, 0.0] for i in range(8)}
+    report = pipeline(other, path).run(documents())
+    assert report['skipped_chunks'] == 0 and report['chunks'] == 20
+
+def test_default_checkpoint_path_is_per_index():
+    assert (IngestionPipeline.default_checkpoint_path("pinecone:apple-support")
+            != IngestionPipeline.default_checkpoint_path("local:/data/local_index"))
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from app.services.llm_client import CircuitBreaker, CircuitOpenError, LLMCallWrapper, is_retryable
+
+class APIError(Exception):
+    def __init__(self, code, message=""):
+        super().__init__(message)
+        self.code = code
+
+def failing(code):
+    def fn():
+        raise APIError(code)
+    return fn
+
+def tripped_wrapper(reset_timeout=0.0):
+    wrapper = LLMCallWrapper(max_retries=0, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=reset_timeout))
+    with pytest.raises(APIError):
+        wrapper.call(failing(503))
+    assert wrapper.breaker.state == "open"
+    return wrapper
+
+def test_is_retryable_uses_status_codes_and_types():
+    assert is_retryable(APIError(429))
+    assert is_retryable(APIError(503))
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(APIError(400, "internal validation failed at step 500"))
+    assert not is_retryable(ValueError("Internal error 500"))
+
+def test_breaker_opens_and_rejects_until_reset():
+    wrapper = tripped_wrapper(reset_timeout=60)
+    with pytest.raises(CircuitOpenError):
+        wrapper.call(lambda: "ok")
+    assert wrapper.breaker.stats()['rejected_calls'] == 1
+
+def test_half_open_trial_success_closes_circuit():
+    wrapper = tripped_wrapper()
+    assert wrapper.call(lambda: "ok") == "ok"
+    assert wrapper.breaker.state == "closed"
+
+def test_half_open_trial_failure_reopens_circuit():
+    wrapper = tripped_wrapper()
+    with pytest.raises(APIError):
+        wrapper.call(failing(500))
+    assert wrapper.breaker.state == "open"
+
+def test_non_transient_error_does_not_trip_breaker():
+    wrapper = LLMCallWrapper(max_retries=0, breaker=CircuitBreaker(failure_threshold=1))
+    with pytest.raises(APIError):
+        wrapper.call(failing(400))
+    assert wrapper.breaker.state == "closed"
+
+def test_cancelled_half_open_trial_releases_the_slot():
+    wrapper = tripped_wrapper()
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(60)
+
+        trial = asyncio.create_task(wrapper.acall(hang))
+        await started.wait()
+        # The trial holds the only half-open slot
+        with pytest.raises(CircuitOpenError):
+            await wrapper.acall(asyncio.sleep, 0)
+
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        async def ok():
+            return "ok"
+        return await wrapper.acall(ok)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert wrapper.breaker.state == "closed"
+
+def test_interrupted_sync_trial_releases_the_slot():
+    wrapper = tripped_wrapper()
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        wrapper.call(interrupted)
+    assert wrapper.call(lambda: "ok") == "ok"
+
+def test_stream_errors_are_recorded():
+    wrapper = LLMCallWrapper(max_retries=0, breaker=CircuitBreaker(failure_threshold=2))
+    for _ in range(2):
+        wrapper.call(lambda: "stream opened")
+        wrapper.record_error(APIError(503))
+    assert wrapper.breaker.state == "closed"
+
+    wrapper.record_error(APIError(503))
+    assert wrapper.breaker.state == "open"
+    assert wrapper.stats()['failures'] == 3
@@ -0,0 +1,28 @@
+import numpy as np
+
+from app.services.hnsw_index import HNSWIndex
+from app.services.local_index import LocalVectorIndex
+
+def populated(index_cls):
+    index = index_cls(dimension=3)
+    index.add(["a", "b", "c"], np.eye(3), [{'product': "iPhone"}, {'product': "Mac"}, {'product': "iPhone"}])
+    return index
+
+def test_search_returns_best_match_first_and_applies_filters():
+    index = populated(LocalVectorIndex)
+    assert index.search([0.9, 0.1, 0.0], k=1)[0][0] == "a"
+    assert [hit[0] for hit in index.search([0.0, 1.0, 0.0], k=3, filter_dict={'product': "iPhone"})] == ["a", "c"]
+
+def test_indexed_ids_track_adds_and_deletes():
+    for index_cls in (LocalVectorIndex, HNSWIndex):
+        index = populated(index_cls)
+        assert index.indexed_ids() == {"a", "b", "c"}
+        index.delete(["b"])
+        assert index.indexed_ids() == {"a", "c"}
+
+def test_save_and_load_round_trip(tmp_path):
+    index = populated(LocalVectorIndex)
+    index.save(str(tmp_path))
+    loaded = LocalVectorIndex.load(str(tmp_path))
+    assert loaded.indexed_ids() == {"a", "b", "c"}
+    assert loaded.search([0.0, 0.0, 1.0], k=1)[0][0] == "c"
@@ -0,0 +1,52 @@
+import threading
+import time
+
+from app.services.quota_scheduler import Priority, QuotaScheduler
+
+def scheduler(path, priority=Priority.LIVE, rpm=1200):
+    # 20 tokens/second with a one-second (20 token) burst
+    scheduler = QuotaScheduler({'generate': rpm}, background_share=0.5, state_path=str(path), burst_seconds=1)
+    scheduler.set_process_priority(priority)
+    return scheduler
+
+def test_processes_share_one_bucket_and_bulk_leaves_headroom_for_live(tmp_path):
+    path = tmp_path / "quota.sqlite3"
+    indexer = scheduler(path, Priority.BULK)
+    api = scheduler(path, Priority.LIVE)
+
+    assert indexer.acquire('generate', cost=10) < 0.1
+    # The indexer has drawn the shared bucket down to its reserve
+    assert api.stats()['kinds']['generate']['tokens'] < 10.5
+
+    # Live chat in the other process still spends the reserve at once
+    assert api.acquire('generate', cost=10) < 0.1
+    assert indexer.stats()['kinds']['generate']['tokens'] < 1
+
+def test_eval_keeps_more_in_reserve_than_bulk():
+    scheduler = QuotaScheduler({'generate': 60})
+    assert scheduler.reserve(Priority.LIVE) < scheduler.reserve(Priority.BULK) < scheduler.reserve(Priority.EVAL) < 1
+
+def test_mixed_priorities_contending_for_one_bucket_are_served_live_bulk_eval(tmp_path):
+    quota = scheduler(tmp_path / "quota.sqlite3")
+    quota.acquire('generate', cost=20)
+    order = []
+
+    def call(priority):
+        quota.acquire('generate', priority=priority)
+        order.append(priority)
+
+    threads = []
+    for priority in (Priority.EVAL, Priority.BULK, Priority.LIVE):
+        threads.append(threading.Thread(target=call, args=(priority,)))
+        threads[-1].start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert order == [Priority.LIVE, Priority.BULK, Priority.EVAL]
+
+def test_in_process_buckets_without_a_state_path():
+    quota = QuotaScheduler({'generate': 1200}, burst_seconds=1)
+    assert quota.acquire('generate', cost=20) < 0.1
+    assert quota.stats()['kinds']['generate']['shared'] is False
+    assert 0.03 < quota.acquire('generate') < 1
@@ -0,0 +1,51 @@
+from app.services.response_cache import IndexGeneration, SemanticResponseCache, source_key
+
+def results(*contents):
+    return [{'content': content, 'metadata': {'url': f"https://support.example.com/{i}"}}
+            for i, content in enumerate(contents)]
+
+def test_near_duplicate_question_with_same_sources_hits():
+    cache = SemanticResponseCache(similarity_threshold=0.95)
+    sources = source_key(results("Hold the side button", "Then slide to power off"))
+    cache.store([1.0, 0.0, 0.0], sources, {'message': "answer"})
+
+    assert cache.lookup([0.99, 0.05, 0.0], sources) == {'message': "answer"}
+    assert cache.lookup([0.0, 1.0, 0.0], sources) is None
+
+def test_reindexed_content_changes_the_sources_and_misses():
+    cache = SemanticResponseCache()
+    cache.store([1.0, 0.0], source_key(results("Hold the side button")), {'message': "old answer"})
+
+    # The same question now retrieves an edited chunk
+    assert cache.lookup([1.0, 0.0], source_key(results("Press and hold the side button"))) is None
+
+def test_new_index_generation_drops_cached_answers():
+    cache = SemanticResponseCache()
+    sources = source_key(results("Hold the side button"))
+    assert cache.lookup([1.0, 0.0], sources, generation="a") is None
+    cache.store([1.0, 0.0], sources, {'message': "answer"}, generation="a")
+    assert cache.lookup([1.0, 0.0], sources, generation="a") == {'message': "answer"}
+
+    # Same question, same sources, but the index was synced, pruned or reset since
+    assert cache.lookup([1.0, 0.0], sources, generation="b") is None
+    assert cache.stats()['size'] == 0
+
+def test_answer_built_against_an_outdated_generation_is_not_stored():
+    cache = SemanticResponseCache()
+    sources = source_key(results("Hold the side button"))
+    cache.lookup([1.0, 0.0], sources, generation="b")
+
+    cache.store([1.0, 0.0], sources, {'message': "stale answer"}, generation="a")
+    assert cache.lookup([1.0, 0.0], sources, generation="b") is None
+
+def test_index_generation_is_shared_through_the_file(tmp_path):
+    path = str(tmp_path / "index_generation.json")
+    writer, reader = IndexGeneration(path), IndexGeneration(path)
+    assert reader.current("local:/index") == ''
+
+    token = writer.bump("local:/index")
+    assert reader.current("local:/index") == token
+    assert reader.current("pinecone:other") == ''
+
+    assert writer.bump("local:/index") != token
+    assert reader.current("local:/index") != token
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.sync_bridge import run_sync
+
+async def loop_of_caller():
+    await asyncio.sleep(0)
+    return asyncio.get_running_loop()
+
+def test_blocking_calls_share_one_background_loop():
+    first, second = run_sync(loop_of_caller()), run_sync(loop_of_caller())
+    assert first is second
+    assert first.is_running()
+
+def test_exceptions_reach_the_blocking_caller():
+    async def fail():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError, match="bad request"):
+        run_sync(fail())
+
+def test_usable_from_code_already_inside_an_event_loop():
+    async def caller():
+        # e.g. a sync helper called from a notebook or an async script
+        return run_sync(loop_of_caller())
+
+    assert asyncio.run(caller()) is run_sync(loop_of_caller())
+
+def test_usable_from_many_threads():
+    results = []
+
+    async def square(n):
+        await asyncio.sleep(0.01)
+        return n * n
+
+    threads = [threading.Thread(target=lambda n=n: results.append(run_sync(square(n)))) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [n * n for n in range(8)]
+
+def test_search_delegates_to_the_async_path(monkeypatch):
+    vector_store = pytest.importorskip("app.services.vector_store")
+    service = vector_store.VectorStoreService.__new__(vector_store.VectorStoreService)
+    calls = []
+
+    async def asearch(query, k=5, filter_dict=None):
+        calls.append((query, k, filter_dict))
+        return [{'content': query, 'metadata': {}, 'score': 1.0}]
+
+    monkeypatch.setattr(service, "asearch", asearch)
+    assert service.search("reset iphone", k=3)[0]['content'] == "reset iphone"
+    assert service.search_by_product("reset", "iPhone") == [{'content': "reset", 'metadata': {}, 'score': 1.0}]
+    assert calls == [("reset iphone", 3, None), ("reset", 5, {'product': "iPhone"})]